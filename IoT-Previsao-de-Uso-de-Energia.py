@@ -66,6 +66,8 @@
 # In[1]:
 
 
+import os
+import sys
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -82,10 +84,8 @@ from matplotlib.colors import ListedColormap
 from math import ceil
 from statsmodels.graphics.gofplots import qqplot
 from scipy.stats import normaltest, kurtosis
-from statsmodels.stats.outliers_influence import variance_inflation_factor
 from smogn import smoter
 from sklearn.preprocessing import MinMaxScaler, StandardScaler
-from holidays import Belgium
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.feature_selection import SelectFromModel
 from sklearn.linear_model import LinearRegression, Ridge, LassoCV
@@ -100,6 +100,10 @@ from catboost import CatBoostRegressor
 from catboost import Pool, cv
 from pickle import dump, load
 
+# O notebook é executado um nivel abaixo da raiz do projeto (caminhos '../data', '../modelos'), onde ficam os módulos de treinamento
+sys.path.append(os.path.abspath('..'))
+from treinamento import calendario, colinearidade, explicacao, preprocessamento, selecao
+
 
 # In[2]:
 
@@ -532,12 +536,9 @@ scatter_plot_conjunto(dtProcessado_Temp, ['RH_5', 'RH_9', 'Press_mm_hg', 'Visibi
 # In[46]:
 
 
+# VIF de todas as variaveis pela inversa da matriz X'X normalizada, mesmo resultado do variance_inflation_factor sem constante
 def calcular_VIF(X):
-    vif = pd.DataFrame()
-    vif['Features'] = X.columns
-    vif['VIF'] = [variance_inflation_factor(X.values, i) for i in range(X.shape[1])]
-    
-    return vif
+    return colinearidade.calcular_vif(X, centralizar = False)
 
 
 # In[47]:
@@ -594,6 +595,16 @@ X_temp = X.drop(['T1', 'T2', 'T9', 'Press_mm_hg', 'RH_1', 'RH_3', 'RH_4', 'T7',
 calcular_VIF(X_temp)
 
 
+# A mesma remoção pode ser feita de forma automatica, retirando a cada passo a variavel de maior VIF até que todas fiquem abaixo do limite. Abaixo a ordem de remoção e o VIF de cada variavel no momento em que foi removida.
+
+# In[ ]:
+
+
+variaveis_vif, ordem_remocao = colinearidade.remover_colinearidade(X, limite = 5, centralizar = False)
+print(variaveis_vif)
+ordem_remocao
+
+
 # Iremos verificar o valor das variaveis utilizando tanto o dataset original quanto com as variaveis removidas apartir do calculo de VIF. Para isso iremos utilizar um modelo base de regressão lienar do StatsModels.
 
 # In[53]:
@@ -868,10 +879,8 @@ dtProcessado_temporal.head()
 # Calculando media por data
 dtProcessado_Dia = dtProcessado_temporal['Appliances'].resample('D').mean()
 
-# Calculando media até a data atual
-media_momentanea = pd.Series(                        [np.mean(dtProcessado_Dia[:x]) for x in range(len(dtProcessado_Dia))]                        )
-
-media_momentanea.index = dtProcessado_Dia.index
+# Calculando media até a data atual (media acumulada, deslocada em um dia para considerar somente os dias anteriores)
+media_momentanea = dtProcessado_Dia.expanding().mean().shift(1)
 
 
 # Percebe-se que o gasto de energia vem oscilando bastante entre os meses, porém mantem uma média constante devido ao alto volume de dados. Talvez a coluna 'Mês' e 'Dia' possuam uma representatividade interessante para o modelo.
@@ -957,42 +966,9 @@ boxplot_individuais(dtProcessado, quantitativas[18:27])
 # In[83]:
 
 
-def calcular_limites_IQR(column):
-    # Calcular Q1 e Q3 do array
-    Q1 = column.quantile(0.25)
-    Q3 = column.quantile(0.75)
-    IQR = Q3 - Q1
-    limite_inferior = Q1 - 1.5 * IQR
-    limite_superior = Q3 + 1.5 * IQR
-    
-    return limite_inferior, limite_superior
-
-def aplicar_IQR_coluna(column, superior, inferior):
-    limite_inferior, limite_superior = calcular_limites_IQR(column)
-    
-    if inferior:
-        column = [limite_inferior if x < limite_inferior else x for x in column]
-        
-    if superior:      
-        column = [limite_superior if x > limite_superior else x for x in column]
-    
-    return column
-
-def aplicar_IQR(data, columns = [], superior = True, inferior = True):
-    
-    if len(columns) == 0:
-        especificar = False
-    else:
-        especificar = True
-    
-    for i, column in enumerate(data.columns):
-        if especificar:
-            if column in columns:
-                data[column] = aplicar_IQR_coluna(data[column], superior, inferior)
-        else:
-            data[column] = aplicar_IQR_coluna(data[column], superior, inferior)
-            
-    return data
+# A correção usa as mesmas funções do pipeline de treinamento: os limites de todas as colunas são calculados de uma vez
+# e aplicados com np.clip, e ficam salvos junto ao scaler para que a API aplique a mesma correção nas previsões
+colunas_IQR = dtProcessado.columns.drop(['lights', 'Weekend', 'Day_of_week', 'Month', 'Day', 'Hour'])
 
 
 # Dataset antes da aplicação do IQR para correção de outliers.
@@ -1006,8 +982,7 @@ dtProcessado.describe()
 # In[85]:
 
 
-dtProcessado_IQR = dtProcessado.copy()
-dtProcessado_IQR = aplicar_IQR(dtProcessado_IQR, columns = dtProcessado_IQR.columns.copy().drop(['lights',                                                                    'Weekend', 'Day_of_week', 'Month', 'Day', 'Hour']))
+dtProcessado_IQR, limites_IQR = preprocessamento.aplicar_IQR(dtProcessado.copy(), colunas_IQR)
 
 
 # Dataset após aplicação do IQR para correção de outliers. Percebe-se que valores minimos e maximos passaram a ser muito mais realistas, também é perceptivel mudanças na média. Considerando que temos mais de 19 mil registros, uma mudança na média passa a ser muito significativo.
@@ -1127,19 +1102,15 @@ boxplot_individuais(dtProcessado_IQR_normalizado, quantitativas[18:27])
 # In[99]:
 
 
-feriados = []
-
-# Criando lista com todos feriados do ano em que o dataset foi gerado
-for data in Belgium(years = [2016]).items():
-    feriados.append(data)
+# Tabela de calendário do ano em que o dataset foi gerado, com os feriados da Bélgica
+dtferiados = calendario.tabela_calendario(2016, 2016)
 
 
 # In[100]:
 
 
-# Converter para dataframe e renomear colunas
-dtferiados = pd.DataFrame(feriados)
-dtferiados.columns = ['data', 'feriado']
+# Somente os dias de feriado
+dtferiados = dtferiados[dtferiados['Holiday'] == 1]
 
 
 # In[101]:
@@ -1151,34 +1122,9 @@ dtferiados.head()
 # In[102]:
 
 
-# Criar uma copia do dataset original para recuperar a coluna 'date', desconsiderando horario
-dtTemp = dtFull.copy()
-dtTemp['date'] = pd.to_datetime(dtTemp['date'], format='%Y-%m-%d %H:%M:%S').dt.date
-
-
-# In[103]:
-
-
-def isHoliday(row):
-    
-    # Verifica se a data da linha atual esta no dataframe de feriados
-    holiday = dtferiados.apply(lambda x: 1 if (row['date'] == x['data']) else 0, axis = 1)
-    
-    holiday = sum(holiday)
-    
-    if holiday > 0:
-        holiday = 1
-    else:
-        holiday = 0
-    
-    return holiday
-
-
-# In[104]:
-
-
-# Preenche a coluna feriados do dataframe temporario
-dtTemp['Holiday'] = dtTemp.apply(isHoliday, axis = 1)
+# Criar uma copia da coluna 'date' do dataset original e adicionar a coluna de feriados pela data de cada linha,
+# com uma única junção na tabela de calendário
+dtTemp = calendario.adicionar_calendario(dtFull[['date']].copy(), 'date', colunas = ['Holiday'])
 
 
 # In[105]:
@@ -1380,6 +1326,17 @@ print(variaveis_v4)
 X_fs[variaveis_v4].head()
 
 
+# Os metodos acima também podem ser executados em paralelo sobre os mesmos folds de validação cruzada, resultando em um ranking de consenso entre os metodos e no tempo de execução de cada um. O RFE remove 3 variaveis por ajuste.
+
+# In[ ]:
+
+
+resultado_selecao = selecao.selecionar(X_fs, y_fs, cv = 5)
+print(resultado_selecao['tempos'])
+print(resultado_selecao['selecionadas'])
+resultado_selecao['ranking']
+
+
 # ## 6.5 Analisando Seleção
 
 # In[129]:
@@ -1798,10 +1755,9 @@ shap.initjs()
 # In[162]:
 
 
-# Construindo shap
+# Construindo shap, com o treino resumido em 50 centroides como fundo e os valores salvos em cache
 amostras = 20
-explainer = shap.Explainer(modelo_svr_final.predict, x_train)
-shap_values = explainer(x_test[:amostras])
+shap_values = explicacao.explicar(modelo_svr_final, x_test[:amostras], fundo = x_train, k = 50)
 
 
 # In[163]:
@@ -2139,6 +2095,9 @@ pickle_out.close()
 # Salvando Scale
 dump(scaler, open('../modelos/scaler.pkl', mode = 'wb'))
 
+# Salvando os limites do IQR junto ao scaler, usados pela API para corrigir os outliers das leituras
+preprocessamento.salvar_limites(limites_IQR, '../modelos')
+
 
 # In[116]:
 
@@ -2166,8 +2125,8 @@ amostras = 1000
 x_shap = x_train[:amostras]
 y_shap =  y_train[:amostras]
 
-explainer = shap.TreeExplainer(modelo_cat_final)
-shap_values = explainer.shap_values(Pool(x_shap, y_shap))
+# SHAP nativo do CatBoost, salvo em cache
+shap_values, valor_esperado = explicacao.valores_shap(modelo_cat_final, x_shap)
 
 
 # Abaixo temos o impacto da predição 0 e 13, assim conseguimos ver como o resultado é afetado por cada variavel. 
@@ -2177,7 +2136,7 @@ shap_values = explainer.shap_values(Pool(x_shap, y_shap))
 
 shap.initjs()
 n = 0
-shap.force_plot(explainer.expected_value, shap_values[n,:], x_shap.iloc[n,:])
+shap.force_plot(valor_esperado, shap_values[n,:], x_shap.iloc[n,:])
 
 
 # In[174]:
@@ -2185,7 +2144,7 @@ shap.force_plot(explainer.expected_value, shap_values[n,:], x_shap.iloc[n,:])
 
 shap.initjs()
 n = 13
-shap.force_plot(explainer.expected_value, shap_values[n,:], x_shap.iloc[n,:])
+shap.force_plot(valor_esperado, shap_values[n,:], x_shap.iloc[n,:])
 
 
 # Abaixo possuimos a distribiução dos dados e seus respectivos impactos ao longo de n observações, assim conseguimos entender de forma simples o impacto de cada variavel e ainda realizar filtros.
@@ -2194,7 +2153,7 @@ shap.force_plot(explainer.expected_value, shap_values[n,:], x_shap.iloc[n,:])
 
 
 shap.initjs()
-shap.force_plot(explainer.expected_value, shap_values, x_shap)
+shap.force_plot(valor_esperado, shap_values, x_shap)
 
 
 # É perceptivel que variaveis como 'NSM' e 'Hour' possuem um comportamento similar ao consumo de energia por hora, isso se da pois ambas variaveis estão relacionadas a tempo, onde impacta diretamente no consumo de energia.
@@ -1,4 +1,10 @@
 # Importar bibliotecas
+import os
+import sys
+
+# Permite importar os módulos do pipeline de treinamento, na raiz do projeto
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from src.server.instance import server
 
 from src.controllers.previsao import *
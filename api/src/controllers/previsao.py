@@ -1,10 +1,17 @@
 # Importar bibliotecas
+import os
 import sqlite3
+import threading
+import numpy as np
 import pandas as pd
-from flask import Flask
-from flask_restplus import Api, Resource
+from flask import request
+from flask_restplus import Resource
 from pickle import load
+from datetime import datetime
+from catboost import CatBoost, Pool
 from src.server.instance import server
+from src.services.estatisticas import EstatisticasPrevisao
+from treinamento import calendario
 
 app, api = server.app, server.api
 
@@ -12,6 +19,11 @@ app, api = server.app, server.api
 banco = sqlite3.connect('../database/banco.db', check_same_thread = False)
 cursor = banco.cursor()
 
+# Carregando estatisticas descritivas incrementais, persistidas junto ao banco de dados
+colunas_estatisticas = ['Hour', 'Press_mm_hg', 'Temperatura_Interna', 'Umidade_Interna', 'Previsao_Energia']
+estatisticas = EstatisticasPrevisao.carregar(colunas_estatisticas, '../database/estatisticas_previsao.json')
+lock_estatisticas = threading.Lock()
+
 # Carregando modelo
 pickle_model = open('modelo_iot_energia.pkl', 'rb')
 modelo = load(pickle_model)
@@ -22,53 +34,141 @@ pickle_scale = open('scaler.pkl', 'rb')
 scaler = load(pickle_scale)
 pickle_scale.close()
 
-# Prevendo Appliances
-def prediction(NSM, Hour, Press_mm_hg, T3, T8, RH_3):
+# Carregando limites do IQR usados no treinamento, salvos junto ao scaler (modelos antigos não possuem o arquivo)
+limites_iqr = None
+if os.path.exists('limites_iqr.pkl'):
+    with open('limites_iqr.pkl', 'rb') as f:
+        limites_iqr = load(f)
 
-    dt = 'lights', 'T1', 'RH_1', 'T2', 'RH_2', 'T3', 'RH_3'  
+# Formato da data das leituras recebidas e o formato ISO, também aceito
+FORMATO_DATA = '%d/%m/%Y'
+FORMATOS_ACEITOS = [FORMATO_DATA, '%Y-%m-%d']
 
-    quantitativas = ['lights', 'T1', 'RH_1', 'T2', 'RH_2', 'T3', 'RH_3', 'T4',\
-       'RH_4', 'T5', 'RH_5', 'T6', 'RH_6', 'T7', 'RH_7', 'T8', 'RH_8', 'T9',\
-       'RH_9', 'T_out', 'Press_mm_hg', 'RH_out', 'Windspeed', 'Visibility',\
-       'Tdewpoint', 'NSM']
-   
+quantitativas = ['lights', 'T1', 'RH_1', 'T2', 'RH_2', 'T3', 'RH_3', 'T4',\
+   'RH_4', 'T5', 'RH_5', 'T6', 'RH_6', 'T7', 'RH_7', 'T8', 'RH_8', 'T9',\
+   'RH_9', 'T_out', 'Press_mm_hg', 'RH_out', 'Windspeed', 'Visibility',\
+   'Tdewpoint', 'NSM']
 
-    dt = {'lights': [1], 'T1': [1], 'RH_1': [1], 'T2': [1], 'RH_2': [1], 'T3': [T3], 'RH_3': [RH_3], 'T4': [1], 'RH_4': [1], 'T5': [1],\
-          'RH_5': [1], 'T6': [1], 'RH_6': [1], 'T7': [1], 'RH_7': [1], 'T8': [T8], 'RH_8': [1], 'T9': [1], 'RH_9': [1], 'T_out': [1],\
-              'Press_mm_hg': [Press_mm_hg], 'RH_out': [1], 'Windspeed': [1], 'Visibility': [1], 'Tdewpoint': [1], 'NSM': [NSM],\
-                  'Weekend': [1], 'Day_of_week': [1], 'Month': [1], 'Day': [1], 'Hour': [Hour]} 
+# Variaveis usadas pelo modelo, na ordem do treinamento
+variaveis_modelo = list(getattr(modelo, 'feature_names_', None) or ['T3', 'RH_3', 'T8', 'Press_mm_hg', 'NSM', 'Hour'])
+
+# Media e desvio do scaler somente das variaveis do modelo, a padronização é feita por coluna
+indices_padronizadas = [i for i, variavel in enumerate(variaveis_modelo) if variavel in quantitativas]
+indices_scaler = [quantitativas.index(variaveis_modelo[i]) for i in indices_padronizadas]
+media_scaler = scaler.mean_[indices_scaler]
+escala_scaler = scaler.scale_[indices_scaler]
+
+# Limites do IQR de cada variavel do modelo, sem limite para as variaveis que não foram corrigidas
+limite_inferior = np.full(len(variaveis_modelo), -np.inf)
+limite_superior = np.full(len(variaveis_modelo), np.inf)
+if limites_iqr is not None:
+    for i, variavel in enumerate(variaveis_modelo):
+        if variavel in limites_iqr['colunas']:
+            limite_inferior[i] = limites_iqr['inferior'][limites_iqr['colunas'].index(variavel)]
+            limite_superior[i] = limites_iqr['superior'][limites_iqr['colunas'].index(variavel)]
+
+# Variaveis de calendário usadas pelo modelo, calculadas pela data da leitura
+colunas_calendario = [coluna for coluna in calendario.COLUNAS if coluna in variaveis_modelo]
+
+# Monta a matriz do modelo (uma linha por leitura), aplicando os limites do IQR e o scaler diretamente nas variaveis do modelo
+def montar_matriz(leituras):
+    dt = pd.DataFrame(list(leituras))
+
+    # Feriado, final de semana, dia da semana, mês e dia calculados pela data de todas as leituras em uma única junção
+    if len(colunas_calendario) > 0 and 'data' in dt.columns and dt['data'].notna().any():
+        dtDatas = pd.DataFrame({'data': pd.to_datetime(dt['data'], format = FORMATO_DATA)}).dropna()
+        dt.loc[dtDatas.index, colunas_calendario] = calendario.adicionar_calendario(dtDatas, 'data', colunas_calendario)[colunas_calendario]
+
+    # Variaveis não informadas são preenchidas com 1
+    dt = dt.reindex(columns = variaveis_modelo).fillna(1).to_numpy(dtype = np.float64).reshape(len(dt), len(variaveis_modelo))
+
+    # Corrigindo outliers com os mesmos limites do treinamento
+    dt = np.clip(dt, limite_inferior, limite_superior)
 
-    dt = pd.DataFrame.from_dict(dt)
-    
     # Padronizando dados
-    dt_padronizado = dt.copy()
-    dt_padronizado[quantitativas] = scaler.transform(dt[quantitativas])
+    dt[:, indices_padronizadas] = (dt[:, indices_padronizadas] - media_scaler) / escala_scaler
 
-    # Convertendo para dataframe
-    dt_padronizado = pd.DataFrame(dt_padronizado.copy(), columns = dt.columns) 
+    return dt
+
+# Prevendo Appliances
+def prediction(NSM, Hour, Press_mm_hg, T3, T8, RH_3, data = None):
+    dt = montar_matriz([{'T3': T3, 'RH_3': RH_3, 'T8': T8, 'Press_mm_hg': Press_mm_hg, 'NSM': NSM, 'Hour': Hour, 'data': data}])
 
     # Prevendo Appliances
-    pred = modelo.predict(dt_padronizado[['T3', 'RH_3', 'T8', 'Press_mm_hg', 'NSM', 'Hour']])
+    pred = modelo.predict(dt)
 
     return pred
 
+# Lê uma leitura no formato do POST /previsao, preenchendo NSM e T8 com os valores pre-default
+def ler_leitura(leitura):
+    Hour = int(leitura["Hour"])
+    T3 = float(leitura["T3"])
+
+    valores = {'data': leitura["data"], 'Hour': Hour, 'Press_mm_hg': float(leitura["Press_mm_hg"]), 'T3': T3,
+               'RH_3': float(leitura["RH_3"]), 'NSM': (24 - Hour) * 60 * 60, 'T8': T3 + 0.25}
+
+    # Datas nos formatos aceitos são gravadas no formato das leituras. A data só é obrigatória quando o modelo usa
+    # variaveis de calendário, as outras são gravadas como recebidas
+    for formato in FORMATOS_ACEITOS:
+        try:
+            valores['data'] = datetime.strptime(str(valores['data']), formato).strftime(FORMATO_DATA)
+            break
+        except ValueError:
+            pass
+    else:
+        if len(colunas_calendario) > 0:
+            raise ValueError('Data invalida: {}'.format(valores['data']))
+
+    return valores
+
+# Contribuição de cada variavel (SHAP nativo do CatBoost) para cada linha, em uma única chamada.
+# A última coluna do ShapValues é o valor esperado do modelo
+def contribuicoes(dt):
+    return modelo.get_feature_importance(Pool(dt, feature_names = variaveis_modelo), type = 'ShapValues')[:, :-1]
+
+# Valor esperado do modelo, igual para todas as linhas, calculado uma vez no carregamento
+valor_esperado = None
+if isinstance(modelo, CatBoost):
+    valor_esperado = float(modelo.get_feature_importance(Pool(np.zeros((1, len(variaveis_modelo))), feature_names = variaveis_modelo),
+                                                         type = 'ShapValues')[0, -1])
+
+# Converte os registros do banco de dados para lista de dicionarios
+def converter_registros(temp_list):
+    return_list = []
+    
+    for temp in temp_list:
+        return_list.append({
+            "Id": temp[0],
+            "Data": temp[1],
+            "Hour": temp[2],
+            "Press_mm_hg": temp[3],
+            "Temperatura_Interna": temp[4],
+            "Umidade_Interna": temp[5],
+            "Previsao_Energia": temp[6]})
+    
+    return return_list
+
+# Acrescenta as estatisticas somente os registros inseridos desde a ultima sincronização
+def sincronizar_estatisticas():
+    with lock_estatisticas:
+        cursor_estatisticas = banco.cursor()
+        cursor_estatisticas.execute("SELECT rowid, * FROM previsao_energia WHERE rowid > ? ORDER BY rowid", (estatisticas.ultimo_id, ))
+        
+        novos = converter_registros(cursor_estatisticas.fetchall())
+        
+        for registro in novos:
+            estatisticas.adicionar(registro, registro["Id"])
+        
+        if len(novos) > 0:
+            estatisticas.salvar()
+
 @api.route('/previsao')
 class Previsao(Resource):
     def get(self):
         try:
-            cursor.execute("SELECT * FROM previsao_energia")
-            
-            temp_list = cursor.fetchall() 
-            return_list = []
+            cursor.execute("SELECT rowid, * FROM previsao_energia")
             
-            for temp in temp_list:
-                return_list.append({
-                    "Data": temp[0],
-                    "Hour": temp[1],
-                    "Press_mm_hg": temp[2],
-                    "Temperatura_Interna": temp[3],
-                    "Umidade_Interna": temp[4],
-                    "Previsao_Energia": temp[5]})   
+            return_list = converter_registros(cursor.fetchall())
         except:
             return "Erro na captura dos dados do banco de dados.", 500
         
@@ -80,21 +180,14 @@ class Previsao(Resource):
         
         try:
             # Capturando os dados
-            data = response["data"]
-            Hour = int(response["Hour"])
-            Press_mm_hg = float(response["Press_mm_hg"])
-            T3 = float(response["T3"])
-            RH_3 = float(response["RH_3"])  
-            
-            # Definindo valores pre-default
-            NSM = (24 - Hour) * 60 * 60
-            T8 = T3 + 0.25
+            leitura = ler_leitura(response)
+            data, Hour, Press_mm_hg, T3, RH_3 = leitura["data"], leitura["Hour"], leitura["Press_mm_hg"], leitura["T3"], leitura["RH_3"]
         except:
             return "Formato dos dados invalido.", 400                    
         
         try:
             # Chamando função de previsão
-            result = prediction(NSM, Hour, Press_mm_hg, T3, T8, RH_3)
+            result = prediction(leitura["NSM"], Hour, Press_mm_hg, T3, leitura["T8"], RH_3, data)
         except:
             return "Erro na previsão dos dados", 400
 
@@ -105,8 +198,78 @@ class Previsao(Resource):
         except:
             return "Erro ao inserir dados no banco de dados", 500
         
+        try:
+            # Atualizando estatisticas com o novo registro
+            sincronizar_estatisticas()
+        except:
+            pass
+        
         return str(result), 200
     
+@api.route('/previsao/explicacao')
+class PrevisaoExplicacao(Resource):
+    def post(self, ):
+        # Uma leitura ou uma lista de leituras, no mesmo formato do POST /previsao
+        leituras = api.payload if isinstance(api.payload, list) else [api.payload]
+
+        try:
+            leituras = [ler_leitura(leitura) for leitura in leituras]
+        except:
+            return "Formato dos dados invalido.", 400
+
+        if len(leituras) == 0:
+            return [], 200
+
+        if valor_esperado is None:
+            return "Explicação disponivel somente para modelos CatBoost.", 501
+
+        try:
+            # Previsão e contribuições de todas as leituras em chamadas vetorizadas
+            dt = montar_matriz(leituras)
+            previsoes = modelo.predict(dt)
+            valores_shap = contribuicoes(dt)
+        except:
+            return "Erro na explicação dos dados", 400
+
+        return_list = []
+        for previsao, valores in zip(previsoes, valores_shap):
+            return_list.append({
+                "Previsao_Energia": float(previsao),
+                "Valor_Esperado": valor_esperado,
+                "Contribuicoes": {variavel: float(valor) for variavel, valor in zip(variaveis_modelo, valores)}})
+
+        return return_list, 200
+
+@api.route('/previsao/novos')
+class PrevisaoNovos(Resource):
+    def get(self):
+        try:
+            # Ultimo id ja recebido pelo cliente
+            desde = int(request.args.get('desde', 0))
+        except:
+            return "Formato dos dados invalido.", 400
+        
+        try:
+            # Consulta somente os registros inseridos apos o id informado
+            cursor.execute("SELECT rowid, * FROM previsao_energia WHERE rowid > ? ORDER BY rowid", (desde, ))
+            
+            return_list = converter_registros(cursor.fetchall())
+        except:
+            return "Erro na captura dos dados do banco de dados.", 500
+        
+        return return_list, 200
+    
+@api.route('/previsao/estatisticas')
+class PrevisaoEstatisticas(Resource):
+    def get(self):
+        try:
+            # Inclui registros inseridos por outros processos (app, scripts de carga)
+            sincronizar_estatisticas()
+        except:
+            return "Erro na captura dos dados do banco de dados.", 500
+        
+        return estatisticas.tabela(), 200
+    
 @api.route('/verifica')
 class VerificaDados(Resource):
     def get(self):
@@ -0,0 +1,257 @@
+# Estatisticas descritivas incrementais das previsões (Welford + t-digest)
+
+# Importar bibliotecas
+import json
+import math
+import os
+import threading
+from treinamento.arquivos import gravar_atomico
+
+# Indices da tabela de estatisticas, no mesmo formato do DataFrame.describe()
+INDICES = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+class TDigest():
+    # Resumo aproximado dos quantis, com tamanho limitado pela compressão
+    def __init__(self, compressao = 100):
+        self.compressao = compressao
+        self.medias = []
+        self.pesos = []
+        self.buffer = []
+        self.minimo = math.inf
+        self.maximo = -math.inf
+
+    def _k(self, q):
+        return self.compressao / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inversa(self, k):
+        if k >= self.compressao / 4:
+            return 1.0
+
+        return (math.sin(2 * math.pi * k / self.compressao) + 1) / 2
+
+    def adicionar(self, valor, peso = 1):
+        self.buffer.append((valor, peso))
+        self.minimo = min(self.minimo, valor)
+        self.maximo = max(self.maximo, valor)
+
+        if len(self.buffer) >= self.compressao * 5:
+            self.comprimir()
+
+    def comprimir(self):
+        if len(self.buffer) == 0:
+            return
+
+        pontos = sorted(list(zip(self.medias, self.pesos)) + self.buffer)
+        self.buffer = []
+        total = sum(peso for _, peso in pontos)
+
+        medias, pesos = [], []
+        media_atual, peso_atual = pontos[0]
+        acumulado = 0
+        limite = total * self._k_inversa(self._k(0) + 1)
+
+        # Agrupa pontos vizinhos enquanto o centroide respeitar o tamanho maximo do seu quantil
+        for media, peso in pontos[1:]:
+            if acumulado + peso_atual + peso <= limite:
+                media_atual = (media_atual * peso_atual + media * peso) / (peso_atual + peso)
+                peso_atual += peso
+            else:
+                medias.append(media_atual)
+                pesos.append(peso_atual)
+                acumulado += peso_atual
+                limite = total * self._k_inversa(self._k(acumulado / total) + 1)
+                media_atual, peso_atual = media, peso
+
+        medias.append(media_atual)
+        pesos.append(peso_atual)
+        self.medias, self.pesos = medias, pesos
+
+    def quantil(self, q):
+        self.comprimir()
+
+        if len(self.medias) == 0:
+            return math.nan
+        if len(self.medias) == 1:
+            return self.medias[0]
+
+        total = sum(self.pesos)
+        alvo = q * total
+
+        # Interpola entre os centros dos centroides vizinhos, usando minimo e maximo nas pontas
+        centro_anterior, media_anterior = 0, self.minimo
+        acumulado = 0
+        for media, peso in zip(self.medias, self.pesos):
+            centro = acumulado + peso / 2
+
+            if alvo < centro:
+                fracao = (alvo - centro_anterior) / (centro - centro_anterior) if centro > centro_anterior else 0
+                return media_anterior + fracao * (media - media_anterior)
+
+            centro_anterior, media_anterior = centro, media
+            acumulado += peso
+
+        fracao = (alvo - centro_anterior) / (total - centro_anterior) if total > centro_anterior else 0
+        return media_anterior + fracao * (self.maximo - media_anterior)
+
+    def combinar(self, outro):
+        outro.comprimir()
+        self.buffer.extend(zip(outro.medias, outro.pesos))
+        self.minimo = min(self.minimo, outro.minimo)
+        self.maximo = max(self.maximo, outro.maximo)
+        self.comprimir()
+
+        return self
+
+    def para_dict(self):
+        self.comprimir()
+
+        return {'compressao': self.compressao, 'medias': self.medias, 'pesos': self.pesos,
+                'minimo': self.minimo if self.pesos else None, 'maximo': self.maximo if self.pesos else None}
+
+    @classmethod
+    def de_dict(cls, dados):
+        digest = cls(dados['compressao'])
+        digest.medias = list(dados['medias'])
+        digest.pesos = list(dados['pesos'])
+
+        if dados['minimo'] is not None:
+            digest.minimo, digest.maximo = dados['minimo'], dados['maximo']
+
+        return digest
+
+class Acumulador():
+    # Contagem, media, variancia, minimo e maximo exatos de uma coluna
+    def __init__(self, compressao = 100):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+        self.digest = TDigest(compressao)
+
+    def adicionar(self, valor):
+        valor = float(valor)
+
+        # Atualização de Welford
+        self.n += 1
+        delta = valor - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (valor - self.media)
+
+        self.minimo = min(self.minimo, valor)
+        self.maximo = max(self.maximo, valor)
+        self.digest.adicionar(valor)
+
+    def combinar(self, outro):
+        if outro.n == 0:
+            return self
+
+        # Combinação das medias e variancias de duas partições (Chan et al.)
+        n = self.n + outro.n
+        delta = outro.media - self.media
+        self.media += delta * outro.n / n
+        self.m2 += outro.m2 + delta ** 2 * self.n * outro.n / n
+        self.n = n
+
+        self.minimo = min(self.minimo, outro.minimo)
+        self.maximo = max(self.maximo, outro.maximo)
+        self.digest.combinar(outro.digest)
+
+        return self
+
+    def descrever(self):
+        if self.n == 0:
+            return dict(dict.fromkeys(INDICES), count = 0)
+
+        std = math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else None
+
+        return {'count': self.n, 'mean': self.media, 'std': std, 'min': self.minimo,
+                '25%': self.digest.quantil(0.25), '50%': self.digest.quantil(0.5), '75%': self.digest.quantil(0.75),
+                'max': self.maximo}
+
+    def para_dict(self):
+        return {'n': self.n, 'media': self.media, 'm2': self.m2,
+                'minimo': self.minimo if self.n else None, 'maximo': self.maximo if self.n else None,
+                'digest': self.digest.para_dict()}
+
+    @classmethod
+    def de_dict(cls, dados):
+        acumulador = cls()
+        acumulador.n, acumulador.media, acumulador.m2 = dados['n'], dados['media'], dados['m2']
+
+        if dados['n']:
+            acumulador.minimo, acumulador.maximo = dados['minimo'], dados['maximo']
+
+        acumulador.digest = TDigest.de_dict(dados['digest'])
+
+        return acumulador
+
+class EstatisticasPrevisao():
+    # Estatisticas de todas as colunas numericas, persistidas junto ao banco de dados
+    def __init__(self, colunas, caminho = None):
+        self.colunas = list(colunas)
+        self.caminho = caminho
+        self.acumuladores = {coluna: Acumulador() for coluna in self.colunas}
+        self.ultimo_id = 0
+        self.lock = threading.Lock()
+
+    def adicionar(self, registro, id_registro = None):
+        with self.lock:
+            for coluna in self.colunas:
+                if registro.get(coluna) is not None:
+                    self.acumuladores[coluna].adicionar(registro[coluna])
+
+            if id_registro is not None:
+                self.ultimo_id = max(self.ultimo_id, id_registro)
+
+    def combinar(self, outro):
+        with self.lock:
+            for coluna in self.colunas:
+                self.acumuladores[coluna].combinar(outro.acumuladores[coluna])
+
+            self.ultimo_id = max(self.ultimo_id, outro.ultimo_id)
+
+        return self
+
+    def tabela(self):
+        with self.lock:
+            descricoes = {coluna: self.acumuladores[coluna].descrever() for coluna in self.colunas}
+
+        return [dict({'Indice': indice}, **{coluna: descricoes[coluna][indice] for coluna in self.colunas}) for indice in INDICES]
+
+    def salvar(self, caminho = None):
+        caminho = caminho or self.caminho
+
+        with self.lock:
+            dados = {'colunas': self.colunas, 'ultimo_id': self.ultimo_id,
+                     'acumuladores': {coluna: self.acumuladores[coluna].para_dict() for coluna in self.colunas}}
+
+        with gravar_atomico(caminho) as temporario, open(temporario, 'w') as f:
+            json.dump(dados, f)
+
+    @classmethod
+    def carregar(cls, colunas, caminho):
+        estatisticas = cls(colunas, caminho)
+
+        if not os.path.exists(caminho):
+            return estatisticas
+
+        with open(caminho) as f:
+            dados = json.load(f)
+
+        estatisticas.ultimo_id = dados['ultimo_id']
+        for coluna in estatisticas.colunas:
+            if coluna in dados['acumuladores']:
+                estatisticas.acumuladores[coluna] = Acumulador.de_dict(dados['acumuladores'][coluna])
+
+        return estatisticas
+
+    @classmethod
+    def combinar_arquivos(cls, colunas, caminhos):
+        # Combina as estatisticas de varias partições em uma só
+        estatisticas = cls(colunas)
+
+        for caminho in caminhos:
+            estatisticas.combinar(cls.carregar(colunas, caminho))
+
+        return estatisticas
@@ -6,57 +6,195 @@
 
 from pickle import load
 import streamlit as st
+import numpy as np
 import pandas as pd
+import plotly.graph_objs as go
 import sqlite3
+import threading
+import os
+import tempfile
+import weakref
 from datetime import date
 
 
-# Carregando modelo
-pickle_model = open('modelo_iot_energia.pkl', 'rb')
-modelo = load(pickle_model)
-pickle_model.close()
+# Carregando modelo (uma vez por processo, compartilhado entre as sessões e execuções do script)
+@st.cache_resource
+def carregar_modelo():
+    pickle_model = open('modelo_iot_energia.pkl', 'rb')
+    modelo = load(pickle_model)
+    pickle_model.close()
+    
+    return modelo
 
 # Carregando Scale
-pickle_scale = open('scaler.pkl', 'rb')
-scaler = load(pickle_scale)
-pickle_scale.close()
+@st.cache_resource
+def carregar_scaler():
+    pickle_scale = open('scaler.pkl', 'rb')
+    scaler = load(pickle_scale)
+    pickle_scale.close()
+    
+    return scaler
 
-# Conectando ao banco de dados sqlite
-banco = sqlite3.connect('../database/banco.db')
-cursor = banco.cursor()
+# Conectando ao banco de dados sqlite, as gravações das sessões são serializadas pelo lock
+@st.cache_resource
+def conectar_banco():
+    banco = sqlite3.connect('../database/banco.db', check_same_thread = False)
+    
+    return banco, threading.Lock()
+
+# Gravando a previsão no banco de dados
+def gravar_previsao(data, Hour, Press_mm_hg, T3, RH_3, previsao):
+    banco, lock = conectar_banco()
+    
+    with lock:
+        cursor = banco.cursor()
+        cursor.execute("INSERT INTO previsao_energia VALUES ('" + str(data) + "', '" + str(Hour) + "', '" + str(Press_mm_hg) + "', '" + str(T3) + "', '" + str(RH_3) + "', '" + str(round(previsao, 2)) + "')")    
+        banco.commit()
 
-st.cache()
+# Variaveis padronizadas pelo scaler e variaveis usadas pelo modelo
+quantitativas = ['lights', 'T1', 'RH_1', 'T2', 'RH_2', 'T3', 'RH_3', 'T4',\
+   'RH_4', 'T5', 'RH_5', 'T6', 'RH_6', 'T7', 'RH_7', 'T8', 'RH_8', 'T9',\
+   'RH_9', 'T_out', 'Press_mm_hg', 'RH_out', 'Windspeed', 'Visibility',\
+   'Tdewpoint', 'NSM']
+
+features = ['T3', 'RH_3', 'T8', 'Press_mm_hg', 'NSM', 'Hour']
+
+# Prevendo Appliances para vetores de entradas em uma única chamada ao scaler e ao modelo
+def prediction_lote(NSM, Hour, Press_mm_hg, T3, T8, RH_3):
+    modelo = carregar_modelo()
+    scaler = carregar_scaler()
+
+    # As variaveis não informadas são preenchidas com 1, como na previsão individual
+    dt = pd.DataFrame(np.ones((len(T3), len(quantitativas))), columns = quantitativas)
+    dt['T3'] = np.asarray(T3, dtype = float)
+    dt['RH_3'] = np.asarray(RH_3, dtype = float)
+    dt['T8'] = np.asarray(T8, dtype = float)
+    dt['Press_mm_hg'] = np.asarray(Press_mm_hg, dtype = float)
+    dt['NSM'] = np.asarray(NSM, dtype = float)
+    
+    # Padronizando dados
+    dt_padronizado = pd.DataFrame(scaler.transform(dt), columns = quantitativas)
+    dt_padronizado['Hour'] = np.asarray(Hour)
+
+    # Prevendo Appliances
+    return modelo.predict(dt_padronizado[features])
 
-# Prevendo Appliances
+# Prevendo Appliances (resultado memorizado pelos valores de entrada)
+@st.cache_data
 def prediction(NSM, Hour, Press_mm_hg, T3, T8, RH_3):
+    return prediction_lote([NSM], [Hour], [Press_mm_hg], [T3], [T8], [RH_3])
 
-    dt = 'lights', 'T1', 'RH_1', 'T2', 'RH_2', 'T3', 'RH_3'  
+# Quantidade de linhas processadas por vez no modo de arquivo
+tamanho_lote = 100000
 
-    quantitativas = ['lights', 'T1', 'RH_1', 'T2', 'RH_2', 'T3', 'RH_3', 'T4',\
-       'RH_4', 'T5', 'RH_5', 'T6', 'RH_6', 'T7', 'RH_7', 'T8', 'RH_8', 'T9',\
-       'RH_9', 'T_out', 'Press_mm_hg', 'RH_out', 'Windspeed', 'Visibility',\
-       'Tdewpoint', 'NSM']
-   
+# Colunas lidas do arquivo, a hora é calculada pela coluna date quando não existir
+colunas_arquivo = ['date', 'T3', 'RH_3', 'T8', 'Press_mm_hg', 'NSM', 'Hour']
 
-    dt = {'lights': [1], 'T1': [1], 'RH_1': [1], 'T2': [1], 'RH_2': [1], 'T3': [T3], 'RH_3': [RH_3], 'T4': [1], 'RH_4': [1], 'T5': [1],\
-          'RH_5': [1], 'T6': [1], 'RH_6': [1], 'T7': [1], 'RH_7': [1], 'T8': [T8], 'RH_8': [1], 'T9': [1], 'RH_9': [1], 'T_out': [1],\
-              'Press_mm_hg': [Press_mm_hg], 'RH_out': [1], 'Windspeed': [1], 'Visibility': [1], 'Tdewpoint': [1], 'NSM': [NSM],\
-                  'Weekend': [1], 'Day_of_week': [1], 'Month': [1], 'Day': [1], 'Hour': [Hour]} 
+# Prevendo Appliances de um lote lido do arquivo
+def prediction_arquivo(dt):
+    if 'Hour' not in dt.columns:
+        dt['Hour'] = pd.to_datetime(dt['date']).dt.hour
+    
+    if 'NSM' not in dt.columns:
+        dt['NSM'] = (24 - dt['Hour']) * 60 * 60
+    
+    if 'T8' not in dt.columns:
+        dt['T8'] = dt['T3'] + 0.25
+    
+    dt['Previsao_Energia'] = prediction_lote(dt['NSM'], dt['Hour'], dt['Press_mm_hg'], dt['T3'], dt['T8'], dt['RH_3'])
+    
+    return dt
 
-    dt = pd.DataFrame.from_dict(dt)
+# Processa o arquivo em lotes, gravando o resultado em um arquivo temporario (memória limitada ao tamanho do lote)
+def processar_arquivo(arquivo, formato, progresso):
+    cabecalho = pd.read_csv(arquivo, nrows = 0).columns
+    arquivo.seek(0)
     
-    # Padronizando dados
-    dt_padronizado = dt.copy()
-    dt_padronizado[quantitativas] = scaler.transform(dt[quantitativas])
+    faltantes = [coluna for coluna in ['T3', 'RH_3', 'Press_mm_hg'] if coluna not in cabecalho]
+    if 'Hour' not in cabecalho and 'date' not in cabecalho:
+        faltantes.append('date')
+    if faltantes:
+        raise ValueError('Colunas não encontradas no arquivo: ' + ', '.join(faltantes))
+    
+    saida = tempfile.NamedTemporaryFile(suffix = '.' + formato.lower(), delete = False)
+    saida.close()
+    
+    escritor = None
+    linhas = 0
+    
+    try:
+        for lote in pd.read_csv(arquivo, usecols = [coluna for coluna in colunas_arquivo if coluna in cabecalho], chunksize = tamanho_lote):
+            lote = prediction_arquivo(lote)
+            linhas += len(lote)
+            
+            if formato == 'Parquet':
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                
+                # Os lotes seguintes usam o schema do primeiro, mesmo que o pandas infira outro tipo
+                if escritor is None:
+                    tabela = pa.Table.from_pandas(lote, preserve_index = False)
+                    escritor = pq.ParquetWriter(saida.name, tabela.schema)
+                else:
+                    tabela = pa.Table.from_pandas(lote, schema = escritor.schema, preserve_index = False)
+                escritor.write_table(tabela)
+            else:
+                lote.to_csv(saida.name, mode = 'a', header = (linhas == len(lote)), index = False)
+            
+            progresso.progress(min(arquivo.tell() / max(arquivo.size, 1), 1.0), text = '{} linhas processadas'.format(linhas))
+    except Exception:
+        os.remove(saida.name)
+        raise
+    finally:
+        if escritor is not None:
+            escritor.close()
+    
+    return saida.name, linhas
 
-    # Convertendo para dataframe
-    dt_padronizado = pd.DataFrame(dt_padronizado.copy(), columns = dt.columns) 
+# Função para remover um arquivo temporario, caso ainda exista
+def remover_arquivo(caminho):
+    if os.path.exists(caminho):
+        os.remove(caminho)
 
-    # Prevendo Appliances
-    pred = modelo.predict(dt_padronizado[['T3', 'RH_3', 'T8', 'Press_mm_hg', 'NSM', 'Hour']])
+class ResultadoArquivo():
+    # Resultado do processamento de um arquivo salvo na sessão. O arquivo temporario é removido ao ser substituido,
+    # quando a sessão é descartada ou ao encerrar o processo
+    def __init__(self, chave, caminho, linhas):
+        self.chave = chave
+        self.caminho = caminho
+        self.linhas = linhas
+        self.remover = weakref.finalize(self, remover_arquivo, caminho)
+
+# Intervalo de cada variavel que pode ser usada como eixo na simulação
+variaveis_simulacao = {'Hour': (0, 23), 'T3': (17.0, 30.0), 'RH_3': (28.0, 51.0), 'Press_mm_hg': (720.0, 780.0)}
+
+# Valores de um eixo da simulação (a hora usa somente valores inteiros)
+def valores_eixo(variavel, resolucao):
+    minimo, maximo = variaveis_simulacao[variavel]
+    
+    if variavel == 'Hour':
+        return np.arange(minimo, maximo + 1)
+    
+    return np.linspace(minimo, maximo, resolucao)
 
-    return pred
+# Simulação de todas as combinações de dois eixos, com as demais variaveis fixas
+@st.cache_data
+def simulacao(eixo_x, eixo_y, resolucao, fixos):
+    x = valores_eixo(eixo_x, resolucao)
+    y = valores_eixo(eixo_y, resolucao)
+    
+    # Grade completa em uma matriz, uma linha por combinação
+    grade_x, grade_y = np.meshgrid(x, y)
+    entradas = {variavel: np.full(grade_x.size, valor, dtype = float) for variavel, valor in fixos.items()}
+    entradas[eixo_x] = grade_x.ravel()
+    entradas[eixo_y] = grade_y.ravel()
+    
+    NSM = (24 - entradas['Hour']) * 60 * 60
+    T8 = entradas['T3'] + 0.25
+    
+    pred = prediction_lote(NSM, entradas['Hour'], entradas['Press_mm_hg'], entradas['T3'], T8, entradas['RH_3'])
 
+    return x, y, np.asarray(pred).reshape(grade_x.shape)
 
 # -----------------------
 '''
@@ -101,7 +239,18 @@ def main():
       
     # Display Front End
     st.markdown(html_temp, unsafe_allow_html = True) 
-      
+    
+    modo = st.sidebar.radio("Modo", ["Previsão", "Simulação", "Arquivo"])
+    
+    if modo == "Simulação":
+        simular()
+    elif modo == "Arquivo":
+        prever_arquivo()
+    else:
+        prever()
+
+# Previsão de uma leitura
+def prever():
     # Inputs para o prediction
     #NSM = st.number_input("Segundos até a meia noite", 0, 86400, 0) 
     Hour = st.number_input("Hora do Dia", 0, 23, 0)
@@ -122,8 +271,94 @@ def main():
         st.success(msg)
         
         data = date.today().strftime("%d/%m/%Y")
-        cursor.execute("INSERT INTO previsao_energia VALUES ('" + str(data) + "', '" + str(Hour) + "', '" + str(Press_mm_hg) + "', '" + str(T3) + "', '" + str(RH_3) + "', '" + str(round(result[0], 2)) + "')")    
-        banco.commit()    
+        gravar_previsao(data, Hour, Press_mm_hg, T3, RH_3, result[0])
+
+# Simulação do consumo variando duas entradas ao mesmo tempo
+def simular():
+    nomes = {'Hour': 'Hora do Dia', 'T3': 'Temperatura Interna da Casa', 'RH_3': 'Umidade Relativa Interna da Casa em %', 'Press_mm_hg': 'Pressão em mm/hg'}
+    
+    eixo_x = st.selectbox("Eixo X", list(nomes), index = 0, format_func = nomes.get)
+    eixo_y = st.selectbox("Eixo Y", [variavel for variavel in nomes if variavel != eixo_x], index = 0, format_func = nomes.get)
+    resolucao = st.slider("Resolução da grade", 10, 200, 100)
+    tipo = st.radio("Gráfico", ["Mapa de calor", "Superfície"], horizontal = True)
+    
+    # Valores das variaveis que não estão nos eixos
+    fixos = {}
+    for variavel in nomes:
+        if variavel in (eixo_x, eixo_y):
+            continue
+        
+        minimo, maximo = variaveis_simulacao[variavel]
+        if variavel == 'Hour':
+            fixos[variavel] = st.number_input(nomes[variavel], minimo, maximo, 0)
+        else:
+            fixos[variavel] = st.number_input(nomes[variavel], minimo, maximo, minimo, format = "%.2f")
+    
+    x, y, z = simulacao(eixo_x, eixo_y, resolucao, fixos)
+    
+    if tipo == "Superfície":
+        fig = go.Figure(data = [go.Surface(x = x, y = y, z = z, colorbar = {'title': 'Wh'})])
+        fig.update_layout(scene = {'xaxis_title': nomes[eixo_x], 'yaxis_title': nomes[eixo_y], 'zaxis_title': 'Consumo em Wh'})
+    else:
+        fig = go.Figure(data = [go.Heatmap(x = x, y = y, z = z, colorbar = {'title': 'Wh'})])
+        fig.update_layout(xaxis_title = nomes[eixo_x], yaxis_title = nomes[eixo_y])
+    
+    fig.update_layout(title = 'Previsão do Consumo de Energia em Wh', height = 600)
+    st.plotly_chart(fig, use_container_width = True)
+
+
+# Previsão de todas as leituras de um arquivo CSV (mesmo formato de data/testing.csv)
+def prever_arquivo():
+    arquivo = st.file_uploader("Arquivo CSV com as leituras", type = 'csv')
+    formato = st.radio("Formato do resultado", ["CSV", "Parquet"], horizontal = True)
+    
+    resultado = st.session_state.get('resultado_arquivo')
+    
+    if arquivo is None:
+        # Arquivo removido do upload, o resultado anterior não é mais necessário
+        if resultado is not None:
+            resultado.remover()
+            del st.session_state['resultado_arquivo']
+        return
+    
+    # O resultado fica salvo na sessão para que o download não processe o arquivo novamente
+    chave = (arquivo.name, arquivo.size, formato)
+    
+    if resultado is None or resultado.chave != chave:
+        if not st.button("Processar"):
+            return
+        
+        if resultado is not None:
+            resultado.remover()
+            del st.session_state['resultado_arquivo']
+        
+        progresso = st.progress(0.0, text = 'Processando...')
+        try:
+            caminho, linhas = processar_arquivo(arquivo, formato, progresso)
+        except ImportError:
+            st.error('Para gerar o resultado em Parquet instale o pacote pyarrow')
+            return
+        except ValueError as erro:
+            st.error(str(erro))
+            return
+        
+        resultado = ResultadoArquivo(chave, caminho, linhas)
+        st.session_state['resultado_arquivo'] = resultado
+    
+    st.success('{} leituras processadas'.format(resultado.linhas))
+    
+    # O download_button mantém o conteudo em memória, por isso o arquivo só é lido quando o download for solicitado, e
+    # não a cada execução do script
+    if st.session_state.get('download_arquivo') != chave:
+        if st.button("Preparar download"):
+            st.session_state['download_arquivo'] = chave
+            st.rerun()
+        return
+    
+    nome = os.path.splitext(arquivo.name)[0] + '_previsao.' + formato.lower()
+    with open(resultado.caminho, 'rb') as f:
+        st.download_button("Baixar resultado", f.read(), file_name = nome, mime = 'text/csv' if formato == 'CSV' else 'application/octet-stream',
+                           on_click = lambda: st.session_state.pop('download_arquivo', None))
      
 if __name__=='__main__': 
     main()
@@ -1,10 +1,20 @@
 # Módulo de criação do servidor Dash
 
 # Import
+import os
+import sys
 import dash
 
+# Permite importar os módulos do pipeline de treinamento, na raiz do projeto
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modulos import instrumentacao
+
 # meta_tags são necessárias para que o layout do aplicativo seja responsivo em dispositivos móveis
 app = dash.Dash(__name__, suppress_callback_exceptions = True, meta_tags = [{'name': 'viewport', 'content': 'width=device-width, initial-scale=1.0'}])
 
+# Mede os callbacks quando o diagnóstico estiver ativo
+instrumentacao.instrumentar(app)
+
 # Cria o servidor
 server = app.server
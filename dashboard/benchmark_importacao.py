@@ -0,0 +1,64 @@
+# Mede o tempo de importação da data app (equivalente ao python -X importtime, resumido) e falha se ultrapassar o orçamento
+
+# Imports
+import argparse
+import os
+import subprocess
+import sys
+
+# Função para medir a importação de um módulo em um processo novo
+def medir_importacao(modulo):
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + modulo],
+                              cwd = os.path.dirname(os.path.abspath(__file__)),
+                              stdout = subprocess.DEVNULL, stderr = subprocess.PIPE, universal_newlines = True)
+
+    if processo.returncode != 0:
+        raise RuntimeError('Erro ao importar {}:\n{}'.format(modulo, processo.stderr))
+
+    # Linhas no formato "import time: self [us] | cumulative | imported package"
+    medicoes = []
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+
+        proprio, acumulado, nome = linha[len('import time:'):].split('|')
+        medicoes.append((nome.strip(), int(proprio), int(acumulado), len(nome) - len(nome.lstrip())))
+
+    return medicoes
+
+# Função para resumir o tempo por pacote de primeiro nível
+def resumir(medicoes):
+    # O menor recuo corresponde aos imports feitos diretamente pelo módulo medido
+    recuo = min(medicao[3] for medicao in medicoes)
+    total = sum(medicao[2] for medicao in medicoes if medicao[3] == recuo)
+
+    pacotes = {}
+    for nome, proprio, _, _ in medicoes:
+        pacote = nome.split('.')[0]
+        pacotes[pacote] = pacotes.get(pacote, 0) + proprio
+
+    return total, sorted(pacotes.items(), key = lambda item: item[1], reverse = True)
+
+#  Executa o programa
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Tempo de importação da data app')
+    parser.add_argument('--modulo', default = 'dataapp')
+    parser.add_argument('--orcamento', type = float, default = 600, help = 'Tempo máximo de importação, em milissegundos')
+    parser.add_argument('--top', type = int, default = 15)
+    parser.add_argument('--repeticoes', type = int, default = 3)
+    args = parser.parse_args()
+
+    # Usa a menor medição, descontando o ruido da maquina
+    resultados = [resumir(medir_importacao(args.modulo)) for _ in range(args.repeticoes)]
+    total, pacotes = min(resultados, key = lambda resultado: resultado[0])
+
+    print('Tempo de importação de {}: {:.1f} ms (orçamento: {:.1f} ms)'.format(args.modulo, total / 1000, args.orcamento))
+    print()
+    print('{:<30} {:>12}'.format('Pacote', 'Tempo (ms)'))
+    for pacote, tempo in pacotes[:args.top]:
+        print('{:<30} {:>12.1f}'.format(pacote, tempo / 1000))
+
+    if total / 1000 > args.orcamento:
+        print()
+        print('Tempo de importação acima do orçamento')
+        sys.exit(1)
@@ -1,19 +1,47 @@
 # Arquivo principal do nosso programa
 
 # Imports
+import importlib
 import dash
 import dash_core_components as dcc
 import dash_html_components as html
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output
+from flask import request
 
 # Carrega o arquivo de conexão da app
 from app import app
 from app import server
 
-# Conecta aos módulos de páginas e outros módulos
-from paginas import dashboard, overview, settings, monitoring
-from modulos import navbar, constant
+# Conecta aos módulos (as páginas são importadas somente no primeiro acesso)
+from modulos import navbar, constant, instrumentacao
+
+# Módulo de cada endereço
+PAGINAS = {'/': 'dashboard',
+           '/paginas/dashboard': 'dashboard',
+           '/paginas/overview': 'overview',
+           '/paginas/monitoring': 'monitoring'}
+
+# Páginas que registram callbacks ou geradores no pré-renderizador
+MODULOS_PAGINAS = ['dashboard', 'overview', 'monitoring', 'settings']
+
+if instrumentacao.ATIVO:
+    PAGINAS['/paginas/diagnostico'] = 'diagnostico'
+
+# Função para importar o módulo da página (o Python mantém o módulo em cache após o primeiro import)
+def pagina(nome):
+    return importlib.import_module('paginas.' + nome)
+
+# Função para importar todas as páginas
+def carregar_paginas():
+    for nome in MODULOS_PAGINAS:
+        pagina(nome)
+
+# As páginas precisam estar importadas antes do navegador buscar os callbacks ou chamar algum deles
+@server.before_request
+def registrar_callbacks():
+    if request.path.startswith(app.config.requests_pathname_prefix + '_dash-'):
+        carregar_paginas()
 
 # Carrega as configurações
 CONFIG_OBJECT = constant.read_config()
@@ -27,12 +55,8 @@ app.layout = html.Div([dcc.Location(id = "url"), navbar.layout, content])
 # Callback
 @app.callback(Output('page-content', 'children'), [Input('url', 'pathname')])
 def display_page(pathname):
-    if pathname == '/paginas/dashboard' or pathname == '/':       
-        return dashboard.get_layout()
-    elif pathname == '/paginas/overview':
-        return overview.get_layout()
-    elif pathname == '/paginas/monitoring':
-        return monitoring.get_layout()
+    if pathname in PAGINAS:
+        return pagina(PAGINAS[pathname]).get_layout()
     else:
         return dbc.Jumbotron(
             [
@@ -50,6 +74,11 @@ app.title = 'Smart Looker'
 
 #  Executa o programa
 if __name__ == '__main__':
+    from modulos import pre_renderizador
+
+    # Inicia a pré-renderização das figuras em segundo plano, importando as páginas fora da inicialização
+    pre_renderizador.iniciar(carregar = carregar_paginas)
+
     app.run_server(debug = False, port = 3000, host = '0.0.0.0', threaded = True)
 
 
@@ -0,0 +1,61 @@
+# Módulo cliente da API de previsão, com conexões reaproveitadas, tempo limite e novas tentativas
+
+# Imports
+import os
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Módulos customizados
+from modulos import constant
+
+_lock = threading.Lock()
+_sessao = {'pid': None, 'sessao': None}
+
+# Função para obter a sessão HTTP do processo atual (keep-alive com pool de conexões)
+def sessao():
+    # A sessão não é reaproveitada entre processos (fork dos workers)
+    if _sessao['pid'] != os.getpid():
+        with _lock:
+            if _sessao['pid'] != os.getpid():
+                retry = Retry(total = constant.TENTATIVAS_API,
+                              backoff_factor = constant.BACKOFF_API,
+                              status_forcelist = (500, 502, 503, 504))
+                adapter = HTTPAdapter(pool_connections = constant.POOL_API, pool_maxsize = constant.POOL_API, max_retries = retry)
+
+                nova = requests.Session()
+                nova.mount('http://', adapter)
+                nova.mount('https://', adapter)
+
+                _sessao['sessao'] = nova
+                _sessao['pid'] = os.getpid()
+
+    return _sessao['sessao']
+
+# Função para montar a url de um endpoint da API
+def url(caminho):
+    return 'http://{IP_API}:{PORTA_API}/{CAMINHO}'.format(IP_API = constant.IP_API, PORTA_API = constant.PORTA_API, CAMINHO = caminho.lstrip('/'))
+
+# Função para fazer um GET na API e retornar o JSON da resposta
+def get(caminho, params = None, timeout = None):
+    if timeout is None:
+        timeout = constant.TIMEOUT_API
+
+    resposta = sessao().get(url(caminho), params = params, timeout = timeout)
+    resposta.raise_for_status()
+
+    return resposta.json()
+
+# Função para fazer vários GETs ao mesmo tempo, recebe um dicionario nome -> caminho ou (caminho, params)
+def get_concorrente(consultas, timeout = None):
+    consultas = {nome: consulta if isinstance(consulta, tuple) else (consulta, None) for nome, consulta in consultas.items()}
+
+    if len(consultas) == 0:
+        return {}
+
+    with ThreadPoolExecutor(max_workers = min(len(consultas), constant.POOL_API)) as executor:
+        futuros = {nome: executor.submit(get, caminho, params, timeout) for nome, (caminho, params) in consultas.items()}
+
+        return {nome: futuro.result() for nome, futuro in futuros.items()}
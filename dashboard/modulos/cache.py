@@ -0,0 +1,80 @@
+# Módulo de cache compartilhado entre os workers da data app (arquivo SQLite local)
+
+# Imports
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+# Módulos customizados
+from modulos import constant
+
+_local = threading.local()
+
+# Função para obter a conexão da thread e do processo atual
+def conexao():
+    con = getattr(_local, 'con', None)
+
+    # Conexões SQLite não podem ser reaproveitadas entre processos (fork dos workers)
+    if con is None or getattr(_local, 'pid', None) != os.getpid():
+        diretorio = os.path.dirname(constant.CACHE_FILE)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok = True)
+
+        con = sqlite3.connect(constant.CACHE_FILE, timeout = 30, isolation_level = None)
+        con.execute("PRAGMA journal_mode = WAL")
+        con.execute("PRAGMA synchronous = NORMAL")
+        con.execute("CREATE TABLE IF NOT EXISTS cache (chave TEXT PRIMARY KEY, geracao TEXT, valor BLOB, atualizado REAL)")
+        con.execute("CREATE TABLE IF NOT EXISTS lease (nome TEXT PRIMARY KEY, dono TEXT, expira REAL)")
+
+        _local.con = con
+        _local.pid = os.getpid()
+
+    return con
+
+# Função para serializar a geração (qualquer valor) em texto
+def _geracao(geracao):
+    return None if geracao is None else repr(geracao)
+
+# Função para gravar um valor no cache, associado a geração dos dados que o originou
+def gravar(chave, valor, geracao = None):
+    conexao().execute("INSERT OR REPLACE INTO cache (chave, geracao, valor, atualizado) VALUES (?, ?, ?, ?)",
+                      (chave, _geracao(geracao), pickle.dumps(valor, protocol = pickle.HIGHEST_PROTOCOL), time.time()))
+
+# Função para ler um valor do cache, retornando None caso não exista ou seja de outra geração
+def obter(chave, geracao = None):
+    linha = conexao().execute("SELECT geracao, valor FROM cache WHERE chave = ?", (chave, )).fetchone()
+
+    if linha is None:
+        return None
+    if geracao is not None and linha[0] != _geracao(geracao):
+        return None
+
+    return pickle.loads(linha[1])
+
+# Função para ler a geração de um valor do cache
+def obter_geracao(chave):
+    linha = conexao().execute("SELECT geracao FROM cache WHERE chave = ?", (chave, )).fetchone()
+
+    return None if linha is None else linha[0]
+
+# Função para verificar se o valor do cache pertence a geração informada
+def atualizado(chave, geracao):
+    return obter_geracao(chave) == _geracao(geracao)
+
+# Função para remover valores do cache pelo prefixo da chave
+def invalidar(prefixo = ''):
+    conexao().execute("DELETE FROM cache WHERE chave LIKE ?", (prefixo + '%', ))
+
+# Função para garantir que somente um worker execute uma tarefa (lease com tempo de expiração)
+def adquirir_lease(nome, duracao):
+    dono = '{}:{}'.format(os.uname().nodename if hasattr(os, 'uname') else '', os.getpid())
+    agora = time.time()
+    con = conexao()
+
+    con.execute("INSERT OR IGNORE INTO lease (nome, dono, expira) VALUES (?, '', 0)", (nome, ))
+    cursor = con.execute("UPDATE lease SET dono = ?, expira = ? WHERE nome = ? AND (dono = ? OR expira < ?)",
+                         (dono, agora + duracao, nome, dono, agora))
+
+    return cursor.rowcount == 1
@@ -2,14 +2,45 @@
 
 # Imports
 import json
+import os
+import hashlib
 
 # Constantes
 APP_LOGO = "imagens/logo.png"
 MAPPING_FILE = "config/mapeamento_campos_dataset.json"
 DATAFILE = "datasets/dataset.csv"
+DATAFILE_CACHE = "datasets/cache/dataset.parquet"
+CACHE_FILE = "datasets/cache/smart_looker.db"
 IP_API = '127.0.0.1'
 PORTA_API = '5000'
 
+# Orçamento de pontos por gráfico de linha e tamanho da série a partir do qual é usado WebGL
+PONTOS_GRAFICO = 1500
+LIMITE_WEBGL = 5000
+
+# Tempo limite das chamadas à API e intervalo de verificação do pré-renderizador, em segundos
+TIMEOUT_API = 10
+INTERVALO_PRE_RENDER = 5
+
+# Novas tentativas (com espera exponencial, em segundos) e tamanho do pool de conexões da API
+TENTATIVAS_API = 3
+BACKOFF_API = 0.3
+POOL_API = 10
+
+# Duração do lease do pré-renderizador entre os workers, em segundos
+DURACAO_LEASE = 30
+
+# Diagnóstico: medições mantidas por callback, limite (em milissegundos) e arquivo do log de callbacks lentos
+JANELA_DIAGNOSTICO = 500
+LIMITE_LENTO = 500
+LOG_LENTO = "logs/callbacks_lentos.log"
+
+# Intervalo de atualização do modo ao vivo, em milissegundos
+INTERVALO_AO_VIVO = 10000
+
+# Colunas retornadas pela API de previsão
+COLUNAS_PREVISAO = ['Id', 'Data', 'Hour', 'Press_mm_hg', 'Temperatura_Interna', 'Umidade_Interna', 'Previsao_Energia']
+
 # Formatação dos argumentos da barra lateral
 SIDEBAR_STYLE = {"position": "fixed", 
                  "top": 0, 
@@ -73,6 +104,11 @@ CREATED_DT = 'CreatedDT'
 STATUS_TYPE = 'StatusType'
 CLOSED_ISSUE_STATUS = ["Fechado", "Resolvido", "Solução Proposta", "Pesquisa Realizada", "Solução Aplicada", "Solução Documentada"]
 
+# Configurações carregadas, hash do arquivo e sua data de modificação
+CONFIG_OBJECT = None
+CONFIG_HASH = None
+CONFIG_MTIME = None
+
 # Função para leitura das configurações
 def read_config():
 
@@ -104,9 +140,20 @@ def read_config():
     global FIELD_MAP
     global DATE_FORMAT
 
+    global CONFIG_OBJECT
+    global CONFIG_HASH
+    global CONFIG_MTIME
+
+    # Só carrega novamente o arquivo json caso ele tenha sido alterado
+    mtime = os.stat(MAPPING_FILE).st_mtime_ns
+    if mtime == CONFIG_MTIME:
+        return CONFIG_OBJECT
+
     # Carrega o arquivo json
-    with open(MAPPING_FILE) as f:
-        CONFIG_OBJECT = json.load(f)
+    with open(MAPPING_FILE, 'rb') as f:
+        conteudo = f.read()
+
+    CONFIG_OBJECT = json.loads(conteudo)
 
     # Mapeamento de campos
     FIELD_MAP       = CONFIG_OBJECT["KeyMapping"]["FieldMapping"]
@@ -137,4 +184,9 @@ def read_config():
     CSV_DATA_CRIACAO    = key_list[val_list.index(DATA_CRIACAO)]
     CSV_DATA_FECHAMENTO = key_list[val_list.index(DATA_FECHAMENTO)]
     CSV_TIPO_CHAMADO    = key_list[val_list.index(TIPO_CHAMADO)]
+
+    CONFIG_HASH  = hashlib.sha256(conteudo).hexdigest()
+    CONFIG_MTIME = mtime
+
+    return CONFIG_OBJECT
  
\ No newline at end of file
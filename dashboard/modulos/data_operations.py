@@ -1,14 +1,25 @@
 # Módulo para carga dos dados
 
 # Imports
+import os
 import json
 import pandas as pd
 import pathlib
-import datetime
-from modulos import constant, app_element
+from modulos import constant, api_client, instrumentacao
+from treinamento.arquivos import gravar_atomico
 
-# Função para gerar o dataframe
-def generate_dataframe():
+# Dataframe processado mantido em memória junto da chave das entradas que o geraram
+DATAFRAME_CACHE = {'chave': None, 'dataframe': None}
+
+# Função para gerar a chave do dataframe (data de modificação do csv e hash das configurações)
+def chave_dataframe():
+    constant.read_config()
+    stat = os.stat(constant.DATAFILE)
+
+    return {'mtime': stat.st_mtime_ns, 'tamanho': stat.st_size, 'config': constant.CONFIG_HASH}
+
+# Função para processar o arquivo csv
+def processar_dataframe():
     
     # Carrega o arquivo
     DATAFRAME_MAIN = pd.read_csv(constant.DATAFILE)
@@ -25,11 +36,78 @@ def generate_dataframe():
     DATAFRAME_MAIN[constant.DATA_FECHAMENTO] =  DATAFRAME_MAIN[constant.DATA_FECHAMENTO].dt.date
 
     # Filtra pela coluna de status
-    DATAFRAME_MAIN.loc[DATAFRAME_MAIN.eval('Status != @constant.CLOSED_ISSUE_STATUS'), constant.STATUS_TYPE] = "Aberto"
-    DATAFRAME_MAIN.loc[DATAFRAME_MAIN.eval('Status == @constant.CLOSED_ISSUE_STATUS'), constant.STATUS_TYPE] = "Fechado"
+    fechado = DATAFRAME_MAIN[constant.STATUS].isin(constant.CLOSED_ISSUE_STATUS)
+    DATAFRAME_MAIN[constant.STATUS_TYPE] = pd.Categorical(fechado.map({True: "Fechado", False: "Aberto"}), categories = ["Aberto", "Fechado"])
+
+    # Colunas de texto com poucos valores distintos são armazenadas como categorias
+    categoricas = [constant.STATUS, constant.CRIADO_POR, constant.ATRIBUIDO_A, constant.ATENDIDO_POR, constant.SEVERIDADE,
+                   constant.PRIORIDADE, constant.CLIENTE, constant.TIPO_CHAMADO]
+    for coluna in categoricas:
+        if coluna in DATAFRAME_MAIN.columns:
+            DATAFRAME_MAIN[coluna] = DATAFRAME_MAIN[coluna].astype('category')
 
     return(DATAFRAME_MAIN)
 
+# Função para carregar o dataframe do cache em disco, caso tenha sido gerado com as mesmas entradas
+def ler_cache_dataframe(chave):
+    arquivo_chave = pathlib.Path(constant.DATAFILE_CACHE).with_suffix('.json')
+
+    try:
+        with open(arquivo_chave) as f:
+            if json.load(f) != chave:
+                return None
+
+        return pd.read_parquet(constant.DATAFILE_CACHE)
+    except (OSError, ValueError, ImportError):
+        return None
+
+# Função para gravar o dataframe processado no cache em disco
+def gravar_cache_dataframe(dataframe, chave):
+    arquivo = pathlib.Path(constant.DATAFILE_CACHE)
+    arquivo.parent.mkdir(parents = True, exist_ok = True)
+
+    try:
+        with gravar_atomico(arquivo) as temporario:
+            dataframe.to_parquet(temporario, index = False)
+    except ImportError:
+        # Sem pyarrow/fastparquet o dataframe fica somente no cache em memória
+        return
+
+    with gravar_atomico(arquivo.with_suffix('.json')) as temporario, open(temporario, 'w') as f:
+        json.dump(chave, f)
+
+# Função para gerar o dataframe
+def generate_dataframe():
+
+    # Lê novamente os arquivos somente quando o csv ou as configurações mudarem
+    chave = chave_dataframe()
+    if DATAFRAME_CACHE['chave'] != chave:
+        DATAFRAME_MAIN = ler_cache_dataframe(chave)
+        if DATAFRAME_MAIN is None:
+            DATAFRAME_MAIN = processar_dataframe()
+            gravar_cache_dataframe(DATAFRAME_MAIN, chave)
+
+        DATAFRAME_CACHE['chave'] = chave
+        DATAFRAME_CACHE['dataframe'] = DATAFRAME_MAIN
+
+    # O dataframe é registrado em toda chamada, vindo da memória, do disco ou do csv
+    return(instrumentacao.registrar_dataframe(DATAFRAME_CACHE['dataframe'].copy(deep = False)))
+
+# Função para corrigir os tipos das previsões recebidas da API
+def tipar_previsoes(dt):
+    dt['Hour'] = dt['Hour'].astype(int) 
+    dt[['Press_mm_hg', 'Temperatura_Interna', 'Umidade_Interna', 'Previsao_Energia']] = dt[['Press_mm_hg', 'Temperatura_Interna', 'Umidade_Interna', 'Previsao_Energia']].astype(float)
+    dt['Data'] = dt['Data'] + ' ' + dt['Hour'].astype(str).str.zfill(2) + ':00:00'     
+    dt['Data'] = pd.to_datetime(dt['Data'], format='%d/%m/%Y %H:%M:%S')
+
+    return dt
+
+# Função para capturar as previsões inseridas após o último id recebido
+def get_novas_previsoes(desde):
+    dt = pd.DataFrame(api_client.get('previsao/novos', params = {'desde': desde}), columns = constant.COLUNAS_PREVISAO)
+
+    return tipar_previsoes(dt)
+
 # Função para os tickets abertos
 def get_open_issues(dataframe):
     return (dataframe.query('Status != @constant.CLOSED_ISSUE_STATUS'))
@@ -76,7 +154,7 @@ def write_field_mapping_file(data, dt_format):
         JSON_FILE['KeyMapping']['FieldMapping'].update({item['Mapeado Para'].rstrip(): item['Nome Coluna'].rstrip()})
     
     JSON_FILE["DateFormat"] = dt_format
-    with open(constant.MAPPING_FILE, "w") as f:
+    with gravar_atomico(constant.MAPPING_FILE) as temporario, open(temporario, "w") as f:
         json.dump(JSON_FILE, f, indent = 3)
     
     return 0
\ No newline at end of file
@@ -0,0 +1,91 @@
+# Módulo para gerar os traces dos gráficos de linha
+
+# Imports
+import numpy as np
+import plotly.graph_objs as go
+
+# Módulos customizados
+from modulos import constant
+
+# Função para converter o eixo x em valores numéricos (datas, números ou categorias)
+def eixo_numerico(x):
+    x = np.asarray(x)
+
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(float)
+    elif np.issubdtype(x.dtype, np.number):
+        return x.astype(float)
+
+    # Eixos categoricos usam a posição de cada ponto
+    return np.arange(len(x), dtype = float)
+
+# Função de downsampling Largest-Triangle-Three-Buckets, retorna os indices dos pontos mantidos
+def lttb(x, y, n_pontos):
+    x = eixo_numerico(x)
+    y = np.asarray(y, dtype = float)
+    n = len(y)
+
+    if n_pontos >= n or n_pontos < 3:
+        return np.arange(n)
+
+    # Tamanho de cada bucket, o primeiro e o ultimo ponto são sempre mantidos
+    tamanho = (n - 2) / (n_pontos - 2)
+    indices = np.empty(n_pontos, dtype = np.int64)
+    indices[0] = 0
+    a = 0
+
+    for i in range(n_pontos - 2):
+        inicio = int(np.floor(i * tamanho)) + 1
+        fim = int(np.floor((i + 1) * tamanho)) + 1
+
+        # Media do proximo bucket, usada como terceiro vertice do triangulo
+        prox_inicio = fim
+        prox_fim = min(int(np.floor((i + 2) * tamanho)) + 1, n)
+        media_x = x[prox_inicio:prox_fim].mean()
+        media_y = y[prox_inicio:prox_fim].mean()
+
+        # Area dos triangulos formados pelo ponto anterior, candidatos e media
+        area = np.abs((x[a] - media_x) * (y[inicio:fim] - y[a]) - (x[a] - x[inicio:fim]) * (media_y - y[a]))
+
+        a = inicio + int(np.argmax(area))
+        indices[i + 1] = a
+
+    indices[-1] = n - 1
+
+    return indices
+
+# Função para gerar o trace de linha, reduzindo a série ao orçamento de pontos e usando WebGL em séries grandes
+def criar_trace_linha(x, y, n_pontos = None, **kwargs):
+    if n_pontos is None:
+        n_pontos = constant.PONTOS_GRAFICO
+
+    x = np.asarray(x)
+    y = np.asarray(y)
+    total = len(y)
+
+    if total > n_pontos:
+        indices = lttb(x, y, n_pontos)
+        x, y = x[indices], y[indices]
+
+    # O Scattergl usa apenas marcadores por padrão
+    if total > constant.LIMITE_WEBGL:
+        kwargs.setdefault('mode', 'lines')
+        return go.Scattergl(x = x, y = y, **kwargs)
+
+    return go.Scatter(x = x, y = y, **kwargs)
+
+# Função para capturar o intervalo do eixo x a partir do relayoutData do gráfico
+def intervalo_zoom(relayout_data):
+    if not relayout_data:
+        return None
+
+    if relayout_data.get('xaxis.autorange'):
+        return (None, None)
+
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        return (relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]'])
+
+    if 'xaxis.range' in relayout_data:
+        return tuple(relayout_data['xaxis.range'])
+
+    return None
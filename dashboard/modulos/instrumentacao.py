@@ -0,0 +1,145 @@
+# Módulo de instrumentação dos callbacks e layouts da data app (ativado pela variável de ambiente SMART_LOOKER_DIAGNOSTICO=1)
+
+# Imports
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+# numpy, pandas e plotly são importados somente quando usados, pois este módulo é carregado na inicialização do app
+
+# Módulos customizados
+from modulos import constant
+
+ATIVO = os.environ.get('SMART_LOOKER_DIAGNOSTICO') == '1'
+
+# Medições recentes de cada callback ou layout (por processo)
+MEDICOES = {}
+
+_lock = threading.Lock()
+_local = threading.local()
+_log_lento = None
+
+# Função para obter o log de callbacks lentos
+def log_lento():
+    global _log_lento
+
+    if _log_lento is None:
+        diretorio = os.path.dirname(constant.LOG_LENTO)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok = True)
+
+        handler = logging.FileHandler(constant.LOG_LENTO, encoding = 'utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+
+        _log_lento = logging.getLogger('smart_looker.lento')
+        _log_lento.setLevel(logging.INFO)
+        _log_lento.propagate = False
+        _log_lento.addHandler(handler)
+
+    return _log_lento
+
+# Função para registrar o tamanho de um DataFrame usado pela medição em andamento
+def registrar_dataframe(dataframe):
+    linhas = getattr(_local, 'linhas', None)
+
+    if linhas is not None and hasattr(dataframe, 'shape'):
+        linhas.append(dataframe.shape[0])
+
+    return dataframe
+
+# Função para calcular os bytes enviados ao cliente (mesma serialização usada pelo Dash)
+def tamanho_resposta(resultado):
+    from plotly.utils import PlotlyJSONEncoder
+
+    try:
+        return len(json.dumps(resultado, cls = PlotlyJSONEncoder))
+    except Exception:
+        return None
+
+# Função para armazenar uma medição e gravar no log caso ultrapasse o limite
+def armazenar(nome, tempo_ms, linhas, tamanho):
+    with _lock:
+        if nome not in MEDICOES:
+            MEDICOES[nome] = deque(maxlen = constant.JANELA_DIAGNOSTICO)
+        MEDICOES[nome].append((tempo_ms, linhas, tamanho))
+
+    if tempo_ms > constant.LIMITE_LENTO:
+        log_lento().info('%s demorou %.1f ms (linhas dos DataFrames: %s, bytes enviados: %s)', nome, tempo_ms, linhas, tamanho)
+
+# Decorador que mede o tempo, os DataFrames usados e os bytes enviados pela função
+def medir(nome):
+    def decorador(funcao):
+        if not ATIVO:
+            return funcao
+
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            # Medições aninhadas (layout dentro do display_page) mantêm a lista de DataFrames da medição externa
+            anterior = getattr(_local, 'linhas', None)
+            _local.linhas = []
+            inicio = time.perf_counter()
+            resultado = None
+
+            try:
+                resultado = funcao(*args, **kwargs)
+                return resultado
+            finally:
+                tempo_ms = (time.perf_counter() - inicio) * 1000
+                linhas = _local.linhas
+                _local.linhas = anterior
+                if anterior is not None:
+                    anterior.extend(linhas)
+
+                armazenar(nome, tempo_ms, sum(linhas), tamanho_resposta(resultado) if resultado is not None else 0)
+
+        return medida
+
+    return decorador
+
+# Função para medir todos os callbacks registrados no app
+def instrumentar(app):
+    if not ATIVO:
+        return app
+
+    callback = app.callback
+
+    @functools.wraps(callback)
+    def callback_medido(*args, **kwargs):
+        registrar = callback(*args, **kwargs)
+
+        # Nome qualificado pelo módulo, pois páginas diferentes usam os mesmos nomes de callback (on_ao_vivo, on_intervalo)
+        def decorador(funcao):
+            return registrar(medir(funcao.__module__ + '.' + funcao.__name__)(funcao))
+
+        return decorador
+
+    app.callback = callback_medido
+
+    return app
+
+# Função para gerar o resumo das medições com os percentis
+def resumo():
+    import numpy as np
+    import pandas as pd
+
+    with _lock:
+        medicoes = {nome: list(valores) for nome, valores in MEDICOES.items()}
+
+    linhas = []
+    for nome, valores in medicoes.items():
+        tempos = np.array([valor[0] for valor in valores])
+        tamanhos = [valor[2] for valor in valores if valor[2] is not None]
+
+        linhas.append({'Nome': nome,
+                       'Chamadas': len(valores),
+                       'p50 (ms)': round(float(np.percentile(tempos, 50)), 1),
+                       'p90 (ms)': round(float(np.percentile(tempos, 90)), 1),
+                       'p99 (ms)': round(float(np.percentile(tempos, 99)), 1),
+                       'Máximo (ms)': round(float(tempos.max()), 1),
+                       'Linhas (média)': int(np.mean([valor[1] for valor in valores])),
+                       'Bytes (média)': int(np.mean(tamanhos)) if tamanhos else None})
+
+    return pd.DataFrame(linhas, columns = ['Nome', 'Chamadas', 'p50 (ms)', 'p90 (ms)', 'p99 (ms)', 'Máximo (ms)', 'Linhas (média)', 'Bytes (média)']).sort_values('p90 (ms)', ascending = False)
@@ -0,0 +1,115 @@
+# Módulo de pré-renderização das figuras das páginas em segundo plano
+
+# Imports
+import json
+import logging
+import threading
+import time
+import traceback
+import pandas as pd
+import plotly.graph_objs as go
+from datetime import date
+
+# Módulos customizados
+from modulos import constant, cache, api_client, instrumentacao
+
+# Funções geradoras de cada página (o conteúdo serializado fica no cache compartilhado entre os workers)
+GERADORES = {}
+
+_lock = threading.Lock()
+_worker = None
+
+# Função para registrar a função geradora das figuras de uma página
+def registrar(pagina, gerador):
+    GERADORES[pagina] = gerador
+
+# Função para capturar a geração atual dos dados (quantidade de registros e dia atual)
+def geracao_atual():
+    return (api_client.get('verifica'), date.today().isoformat())
+
+# Função para serializar o conteúdo gerado (figuras em JSON, tabelas em registros)
+def serializar(valor):
+    if isinstance(valor, go.Figure):
+        return ('figura', valor.to_json())
+    elif isinstance(valor, pd.DataFrame):
+        return ('tabela', json.dumps({'columns': list(valor.columns), 'data': valor.to_dict('records')}, default = str))
+
+    return ('valor', json.dumps(valor, default = str))
+
+# Função para desserializar o conteúdo do cache
+def desserializar(tipo, conteudo):
+    conteudo = json.loads(conteudo)
+
+    if tipo == 'tabela':
+        return instrumentacao.registrar_dataframe(pd.DataFrame(conteudo['data'], columns = conteudo['columns']))
+
+    return conteudo
+
+# Chave do conteúdo da página no cache
+def chave(pagina):
+    return 'pagina:' + pagina
+
+# Função para gerar e armazenar o conteúdo de uma página
+def renderizar(pagina, geracao):
+    conteudo = {nome: serializar(valor) for nome, valor in GERADORES[pagina]().items()}
+    cache.gravar(chave(pagina), conteudo, geracao)
+
+    return conteudo
+
+# Função para atualizar as páginas cuja geração dos dados mudou
+def atualizar():
+    # Somente o worker que detém o lease renderiza, os demais leem o resultado do cache
+    if not cache.adquirir_lease('pre_renderizador', constant.DURACAO_LEASE):
+        return
+
+    geracao = geracao_atual()
+
+    with _lock:
+        for pagina in list(GERADORES):
+            if not cache.atualizado(chave(pagina), geracao):
+                try:
+                    renderizar(pagina, geracao)
+                except Exception:
+                    logging.error('Erro ao pré-renderizar a página %s:\n%s', pagina, traceback.format_exc())
+
+# Função para obter o conteúdo de uma página, gerando no momento caso o cache ainda esteja vazio
+def obter(pagina):
+    conteudo = cache.obter(chave(pagina))
+
+    if conteudo is None:
+        with _lock:
+            conteudo = cache.obter(chave(pagina))
+
+            if conteudo is None:
+                conteudo = renderizar(pagina, None)
+
+    return {nome: desserializar(tipo, valor) for nome, (tipo, valor) in conteudo.items()}
+
+# Loop do worker em segundo plano
+def _executar(intervalo, carregar):
+    # Importa as páginas para que registrem seus geradores
+    if carregar is not None:
+        carregar()
+
+    while True:
+        try:
+            atualizar()
+        except Exception:
+            logging.warning('Não foi possível verificar a geração dos dados:\n%s', traceback.format_exc())
+
+        time.sleep(intervalo)
+
+# Função para iniciar o worker de pré-renderização
+def iniciar(intervalo = None, carregar = None):
+    global _worker
+
+    if _worker is not None:
+        return _worker
+
+    if intervalo is None:
+        intervalo = constant.INTERVALO_PRE_RENDER
+
+    _worker = threading.Thread(target = _executar, args = (intervalo, carregar), name = 'pre-renderizador', daemon = True)
+    _worker.start()
+
+    return _worker
@@ -3,86 +3,167 @@
 
 # Imports
 import traceback
+import dash
 import pandas as pd
 import plotly.express as px
 import dash_core_components as dcc
 import dash_bootstrap_components as dbc
 import dash_html_components as html
 import numpy as np
-import requests
-from dash.dependencies import Input, Output
+import plotly.graph_objs as go
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 
 # Módulos customizados
 from app import app
-from modulos import data_operations, constant, app_element
+from modulos import data_operations, constant, app_element, graficos, pre_renderizador, cache, api_client, instrumentacao
+
+# Captura os dados de previsão da API e corrige os tipos
+def carregar_dados(temp_list = None):
+    if temp_list is None:
+        temp_list = api_client.get('previsao')
+    
+    # Convertendo para dicionario e corrigindo os tipos
+    dt = pd.DataFrame(temp_list, columns = constant.COLUNAS_PREVISAO)
+    dt = data_operations.tipar_previsoes(dt)
+    dt = round(dt, 2)
+
+    return instrumentacao.registrar_dataframe(dt)
+
+# Gera a figura de previsão total, reduzida ao orçamento de pontos dentro do intervalo visivel
+def figura_previsoes(dtPrevisoes, inicio = None, fim = None):
+    dtVisivel = dtPrevisoes
+    
+    if inicio is not None and fim is not None:
+        dtVisivel = dtPrevisoes[(dtPrevisoes['Data'] >= pd.to_datetime(inicio)) & (dtPrevisoes['Data'] <= pd.to_datetime(fim))]
+
+    trace = graficos.criar_trace_linha(dtVisivel['Data'], dtVisivel['Previsao_Energia'], name = 'Previsao_Energia')
+    
+    layout = go.Layout(title = 'Previsão do Consumo de Energia em Wh Total por Dia',
+                       xaxis = {'title': 'Data'},
+                       yaxis = {'title': 'Previsão de Energia em Wh'},
+                       uirevision = 'my-line')
+
+    fig = go.Figure(data = [trace], layout = layout)
+
+    # Mantém o zoom atual ao trocar os pontos exibidos
+    if inicio is not None and fim is not None:
+        fig.update_xaxes(range = [inicio, fim])
+
+    return fig
+
+# Função para somar previsões novas à série agregada por data
+def somar_serie(dtPrevisoes, dtNovos):
+    return pd.concat([dtPrevisoes, dtNovos[['Data', 'Previsao_Energia']]]).groupby(['Data'])['Previsao_Energia'].sum().reset_index()
+
+# Função para obter a série agregada atualizada até o último id consumido pela sessão: a série compartilhada entre os
+# workers (identificada pelo último id que contém) mais somente as previsões inseridas depois dela. Retorna a série e o
+# último id incluido
+def serie_atualizada(ultimo_id):
+    dtPrevisoes = cache.obter('dashboard:serie')
+    geracao = cache.obter_geracao('dashboard:serie')
+
+    if dtPrevisoes is None or geracao is None:
+        dt = carregar_dados()
+        return dt.groupby(['Data'])['Previsao_Energia'].sum().reset_index(), int(dt['Id'].max()) if len(dt) > 0 else 0
+
+    geracao = int(geracao)
+    if ultimo_id > geracao:
+        dtNovos = data_operations.get_novas_previsoes(geracao)
+        dtPrevisoes = somar_serie(dtPrevisoes, dtNovos[dtNovos['Id'] <= ultimo_id])
+
+    return dtPrevisoes, max(ultimo_id, geracao)
+
+# Gera as figuras e a tabela da página
+def gerar_figuras():
+    '''
+    # Conectando ao banco de dados sqlite
+    banco = sqlite3.connect('../database/banco.db', check_same_thread = False)
+    cursor = banco.cursor()
+    
+    # Extraindo dados do banco de dados
+    cursor.execute("SELECT * FROM previsao_energia")
+    
+    temp_list = cursor.fetchall() 
+    return_list = []
+    
+    # Convertendo para lista de dicionarios
+    for temp in temp_list:
+        return_list.append({
+            "Data": temp[0],
+            "Hour": temp[1],
+            "Press_mm_hg": temp[2],
+            "Temperatura_Interna": temp[3],
+            "Umidade_Interna": temp[4],
+            "Previsao_Energia": temp[5]})   
+    
+    # Convertendo para dicionario e corrigindo os tipos
+    dt = pd.DataFrame(return_list)
+    dt['Data'] = pd.to_datetime(dt['Data'], format = '%d/%m/%Y')
+    '''
+    
+    # Capturando dados e estatisticas da API ao mesmo tempo
+    respostas = api_client.get_concorrente({'previsao': 'previsao', 'estatisticas': 'previsao/estatisticas'})
+    dt = carregar_dados(respostas['previsao'])
+    
+
+    # Agrupa os dados
+    dtPrevisoes = dt.groupby(['Data'])['Previsao_Energia'].sum().reset_index()
+
+    # Guarda a série agregada no cache compartilhado, usada pelo zoom em qualquer worker, junto do último id que contém
+    cache.gravar('dashboard:serie', dtPrevisoes, int(dt['Id'].max()) if len(dt) > 0 else 0)
+    
+    dtPrevisoesPeriodo = dt.groupby(['Hour'])['Previsao_Energia'].sum().reset_index()
+    dtPrevisoesPeriodo['Hour'] = dtPrevisoesPeriodo['Hour'].replace([0, 1, 2, 3, 4, 5], 'Madrugada')
+    dtPrevisoesPeriodo['Hour'] = dtPrevisoesPeriodo['Hour'].replace([6, 7, 8, 9, 10, 11], 'Manhã')
+    dtPrevisoesPeriodo['Hour'] = dtPrevisoesPeriodo['Hour'].replace([12, 13, 14, 15, 16, 17], 'Tarde')
+    dtPrevisoesPeriodo['Hour'] = dtPrevisoesPeriodo['Hour'].replace([18, 19, 20, 21, 22, 23], 'Noite')
+    dtPrevisoesPeriodo = dtPrevisoesPeriodo.groupby(['Hour'])['Previsao_Energia'].sum().reset_index()
+    
+    # Estatisticas mantidas incrementalmente pela API, sem percorrer todo o historico
+    dtDescribe = pd.DataFrame(respostas['estatisticas'], columns = ['Indice', 'Hour', 'Press_mm_hg', 'Temperatura_Interna', 'Umidade_Interna', 'Previsao_Energia'])
+    dtDescribe = round(dtDescribe, 2)
+    dtDescribe = dtDescribe.rename({'Hour': 'Hora', 'Press_mm_hg': 'Pressão', 'Temperatura_Interna': 'Temperatura Interna', 'Umidade_Interna' : 'Umidade Interna', 'Previsao_Energia': 'Previsão Energia'}, axis = 1)
+
+    # Figura do consumo por período do dia
+    figPeriodo = px.pie(dtPrevisoesPeriodo, 
+                        values = 'Previsao_Energia', 
+                        names = ['Madrugada', 'Manhã', 'Tarde', 'Noite'], 
+                        title = 'Consumo de Energia por Período do Dia em Wh',
+                        hole = 0.3)
+
+    # Estado inicial do modo ao vivo
+    aoVivo = {'ultimo_id': int(dt['Id'].max()) if len(dt) > 0 else 0,
+              'ultima_data': dtPrevisoes['Data'].max().isoformat() if len(dtPrevisoes) > 0 else None,
+              'intervalo': None}
+
+    return {'my-line': figura_previsoes(dtPrevisoes), 'my-pie2': figPeriodo, 'table2': dtDescribe, 'ao-vivo': aoVivo}
 
 # Gera o layout
+@instrumentacao.medir('dashboard.get_layout')
 def get_layout():
     try:
-        '''
-        # Conectando ao banco de dados sqlite
-        banco = sqlite3.connect('../database/banco.db', check_same_thread = False)
-        cursor = banco.cursor()
-        
-        # Extraindo dados do banco de dados
-        cursor.execute("SELECT * FROM previsao_energia")
-        
-        temp_list = cursor.fetchall() 
-        return_list = []
-        
-        # Convertendo para lista de dicionarios
-        for temp in temp_list:
-            return_list.append({
-                "Data": temp[0],
-                "Hour": temp[1],
-                "Press_mm_hg": temp[2],
-                "Temperatura_Interna": temp[3],
-                "Umidade_Interna": temp[4],
-                "Previsao_Energia": temp[5]})   
-        
-        # Convertendo para dicionario e corrigindo os tipos
-        dt = pd.DataFrame(return_list)
-        dt['Data'] = pd.to_datetime(dt['Data'], format = '%d/%m/%Y')
-        '''
-        
-        # Capturando dados da API
-        request = requests.get('http://{IP_API}:{PORTA_API}/previsao'.format(IP_API = constant.IP_API, PORTA_API = constant.PORTA_API))
-        
-        temp_list = request.json()
-        
-        # Convertendo para dicionario e corrigindo os tipos
-        dt = pd.DataFrame(temp_list)
-        dt['Hour'] = dt['Hour'].astype(int) 
-        dt[['Press_mm_hg', 'Temperatura_Interna', 'Umidade_Interna', 'Previsao_Energia']] = dt[['Press_mm_hg', 'Temperatura_Interna', 'Umidade_Interna', 'Previsao_Energia']].astype(float)
-        dt['Data'] = dt['Data'] + ' ' + dt['Hour'].astype(str).str.zfill(2) + ':00:00'     
-        dt['Data'] = pd.to_datetime(dt['Data'], format='%d/%m/%Y %H:%M:%S')
-        dt = round(dt, 2)
-        
-
-        # Agrupa os dados
-        dtPrevisoes = dt.groupby(['Data'])['Previsao_Energia'].sum().reset_index()
-        
-        dtPrevisoesPeriodo = dt.groupby(['Hour'])['Previsao_Energia'].sum().reset_index()
-        dtPrevisoesPeriodo['Hour'] = dtPrevisoesPeriodo['Hour'].replace([0, 1, 2, 3, 4, 5], 'Madrugada')
-        dtPrevisoesPeriodo['Hour'] = dtPrevisoesPeriodo['Hour'].replace([6, 7, 8, 9, 10, 11], 'Manhã')
-        dtPrevisoesPeriodo['Hour'] = dtPrevisoesPeriodo['Hour'].replace([12, 13, 14, 15, 16, 17], 'Tarde')
-        dtPrevisoesPeriodo['Hour'] = dtPrevisoesPeriodo['Hour'].replace([18, 19, 20, 21, 22, 23], 'Noite')
-        dtPrevisoesPeriodo = dtPrevisoesPeriodo.groupby(['Hour'])['Previsao_Energia'].sum().reset_index()
-        
-        dtDescribe = dt.describe().reset_index()
-        dtDescribe = round(dtDescribe, 2)
-        dtDescribe = dtDescribe.rename({'index': 'Indice', 'Hour': 'Hora', 'Press_mm_hg': 'Pressão', 'Temperatura_Interna': 'Temperatura Interna', 'Umidade_Interna' : 'Umidade Interna', 'Previsao_Energia': 'Previsão Energia'}, axis = 1)
+        # Captura as figuras pré-renderizadas
+        conteudo = pre_renderizador.obter('dashboard')
 
         # Gera o container
         layout = dbc.Container([
+                    dbc.Row([
+                        dbc.Col([
+                            dbc.Checklist(id = 'dashboard-ao-vivo',
+                                          options = [{'label': 'Ao vivo', 'value': 'ao_vivo'}],
+                                          value = [],
+                                          switch = True),
+                            dcc.Interval(id = 'dashboard-intervalo', interval = constant.INTERVALO_AO_VIVO, disabled = True),
+                            dcc.Store(id = 'dashboard-estado', data = conteudo['ao-vivo'])
+                        ],
+                        width = 12)
+                    ],
+                    style = {'padding-bottom': '10px'}),
                     dbc.Row([
                         dbc.Col([
                             dcc.Graph(id = 'my-line', 
-                                      figure = px.line(dtPrevisoes, 
-                                                       x = "Data",
-                                                       y = 'Previsao_Energia', 
-                                                       title = 'Previsão do Consumo de Energia em Wh Total por Dia',
-                                                       labels = {'Previsao_Energia': 'Previsão de Energia em Wh'}))
+                                      figure = conteudo['my-line'])
                         ],
                         width=12)
                     ],
@@ -91,16 +172,12 @@ def get_layout():
                     dbc.Row([
                         dbc.Col([
                             dcc.Graph(id = 'my-pie2', 
-                                      figure = px.pie(dtPrevisoesPeriodo, 
-                                                      values = 'Previsao_Energia', 
-                                                      names = ['Madrugada', 'Manhã', 'Tarde', 'Noite'], 
-                                                      title = 'Consumo de Energia por Período do Dia em Wh',
-                                                      hole = 0.3))
+                                      figure = conteudo['my-pie2'])
                         ],
                         width = 5),
                         dbc.Col(dbc.Card([
 								dbc.CardHeader("Descrição Estatística dos dados utilizados para previsão"),
-								app_element.generate_dashtable(identifier = "table2", dataframe = dtDescribe, height_cell = '40px', height = '375px')],
+								app_element.generate_dashtable(identifier = "table2", dataframe = conteudo['table2'], height_cell = '40px', height = '375px')],
 								className = "shadow p-3 bg-light rounded", style={'height':'45vh'}), width = 7)
                         ],
                     style = {'padding-bottom': '10px'},
@@ -121,3 +198,67 @@ def get_layout():
                     ]
                 )
         return layout
+
+# Callback
+@app.callback(Output('dashboard-intervalo', 'disabled'), [Input('dashboard-ao-vivo', 'value')])
+
+# Liga ou desliga o modo ao vivo
+def on_ao_vivo(valor):
+    return 'ao_vivo' not in (valor or [])
+
+# Callback
+@app.callback([Output('my-line', 'figure'), Output('my-line', 'extendData'), Output('dashboard-estado', 'data')],
+              [Input('my-line', 'relayoutData'), Input('dashboard-intervalo', 'n_intervals')],
+              [State('dashboard-estado', 'data')])
+
+# O zoom e o modo ao vivo alteram a mesma figura, por isso são tratados no mesmo callback
+def on_atualizar(relayout_data, n_intervals, estado):
+    disparos = [disparo['prop_id'] for disparo in dash.callback_context.triggered]
+
+    if 'dashboard-intervalo.n_intervals' in disparos:
+        return on_intervalo(n_intervals, estado)
+
+    return on_zoom(relayout_data, estado)
+
+# Ao aplicar zoom, busca novamente os dados em maior resolução para o intervalo visivel
+def on_zoom(relayout_data, estado):
+    intervalo = graficos.intervalo_zoom(relayout_data)
+    
+    if intervalo is None or estado is None:
+        raise PreventUpdate
+
+    # Usa a série agregada compartilhada entre os workers, com as previsões já recebidas pelo modo ao vivo
+    dtPrevisoes, estado['ultimo_id'] = serie_atualizada(estado['ultimo_id'])
+    estado['ultima_data'] = dtPrevisoes['Data'].max().isoformat() if len(dtPrevisoes) > 0 else None
+    estado['intervalo'] = list(intervalo)
+
+    return figura_previsoes(dtPrevisoes, intervalo[0], intervalo[1]), dash.no_update, estado
+
+# Acrescenta ao gráfico as previsões novas desde a última atualização. Datas novas são acrescentadas com extendData, e
+# previsões de datas já exibidas geram a figura completa com os valores somados
+def on_intervalo(n_intervals, estado):
+    if not n_intervals or estado is None:
+        raise PreventUpdate
+
+    dtNovos = data_operations.get_novas_previsoes(estado['ultimo_id'])
+    
+    if len(dtNovos) == 0:
+        raise PreventUpdate
+
+    estado['ultimo_id'] = int(dtNovos['Id'].max())
+    dtNovos = dtNovos.groupby(['Data'])['Previsao_Energia'].sum().reset_index()
+
+    if estado['ultima_data'] is not None and (dtNovos['Data'] <= pd.to_datetime(estado['ultima_data'])).any():
+        dtPrevisoes, estado['ultimo_id'] = serie_atualizada(estado['ultimo_id'])
+        estado['ultima_data'] = dtPrevisoes['Data'].max().isoformat() if len(dtPrevisoes) > 0 else None
+        intervalo = estado.get('intervalo') or [None, None]
+
+        return figura_previsoes(dtPrevisoes, intervalo[0], intervalo[1]), dash.no_update, estado
+
+    estado['ultima_data'] = dtNovos['Data'].max().isoformat()
+    extensao = {'x': [dtNovos['Data'].tolist()], 'y': [round(dtNovos['Previsao_Energia'], 2).tolist()]}
+
+    return dash.no_update, (extensao, [0]), estado
+
+# Registra a página no pré-renderizador
+pre_renderizador.registrar('dashboard', gerar_figuras)
@@ -0,0 +1,41 @@
+# Página de diagnóstico (oculta), com o tempo dos callbacks e layouts medidos pela instrumentação
+
+# Imports
+import traceback
+import dash_html_components as html
+import dash_bootstrap_components as dbc
+
+# Módulos customizados
+from modulos import app_element, constant, instrumentacao
+
+# Função para obter o layout
+def get_layout():
+    try:
+        dtResumo = instrumentacao.resumo()
+
+        # Layout
+        layout = dbc.Container([
+                 dbc.Row([
+                        dbc.Col(dbc.Card([
+                                dbc.CardHeader("Tempo dos Callbacks e Layouts (últimas {} chamadas de cada um, neste worker)".format(constant.JANELA_DIAGNOSTICO)),
+                                app_element.generate_dashtable(identifier = "table-diagnostico", dataframe = dtResumo, height = '800px'),
+                                html.P("Chamadas acima de {} ms são gravadas em {}".format(constant.LIMITE_LENTO, constant.LOG_LENTO), className = "pt-3")],
+                                className = "shadow p-3 bg-light rounded"), width = 12)
+                ])
+        ],
+        fluid = True)
+
+        return layout
+    except:
+        layout = dbc.Jumbotron(
+                    [
+                        html.Div([
+                            html.H1("500: Internal Server Error", className="text-danger"),
+                            html.Hr(),
+                            html.P("O seguinte erro ocorreu:"),
+                            html.Code(traceback.format_exc())
+                        ],
+                        style=constant.NAVITEM_STYLE)
+                    ]
+                )
+        return layout
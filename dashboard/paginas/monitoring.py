@@ -8,102 +8,133 @@ import dash_table
 import dash_html_components as html
 import dash_core_components as dcc
 import dash_bootstrap_components as dbc
-import requests
 import plotly.graph_objs as go
 from dash.dependencies import Input, Output, State
-from datetime import date, datetime
+from dash.exceptions import PreventUpdate
+from datetime import date, datetime, timedelta
 
 # Módulos customizados
 from app import app
-from modulos import app_element, data_operations, constant
+from modulos import app_element, data_operations, constant, graficos, pre_renderizador, api_client, instrumentacao
+
+# Função para formatar o gasto energetico exibido nos indicadores
+def formatar_gasto(valor):
+    return str(round(valor, 2)) + ' Wh'
+
+# Função para somar as previsões por dia ('AAAA-MM-DD') aos totais diarios já existentes
+def somar_diarios(dt, diarios = None):
+    diarios = dict(diarios or {})
+
+    for dia, valor in dt.groupby(dt['Data'].dt.date)['Previsao_Energia'].sum().items():
+        diarios[dia.isoformat()] = diarios.get(dia.isoformat(), 0.0) + float(valor)
+
+    return diarios
+
+# Função para calcular o primeiro dia do mês anterior
+def inicio_mes_anterior(hoje):
+    return (hoje.replace(day = 1) - timedelta(days = 1)).replace(day = 1)
+
+# Função para calcular os indicadores a partir dos totais diarios. São mantidos somente os dias da janela de 30 dias e
+# os do mês anterior em diante, usados no gráfico de comparação entre os meses
+def calcular_totais(diarios, hoje):
+    inicio = inicio_mes_anterior(hoje)
+    diarios = {dia: valor for dia, valor in diarios.items()
+               if (hoje - date.fromisoformat(dia)).days < 30 or date.fromisoformat(dia) >= inicio}
+    totais = {'dia': hoje.isoformat(), 'diarios': diarios, 'hoje': 0.0, '7dias': 0.0, '30dias': 0.0}
+
+    for dia, valor in diarios.items():
+        idade = (hoje - date.fromisoformat(dia)).days
+        if idade < 30:
+            totais['30dias'] += valor
+        if idade < 7:
+            totais['7dias'] += valor
+        if idade == 0:
+            totais['hoje'] += valor
+
+    return totais
+
+# Função para gerar o gráfico do mês vigente x mês anterior a partir dos totais diarios
+def gerar_grafico_meses(diarios, hoje):
+    plot_data = []
+
+    for mes in [hoje, inicio_mes_anterior(hoje)]:
+        dias = [date.fromisoformat(dia) for dia in sorted(diarios)]
+        dias = [dia for dia in dias if dia.year == mes.year and dia.month == mes.month and dia.day != 31]
+
+        # Definição dos dados no plot
+        plot_data.append(graficos.criar_trace_linha([str(dia.day) + '/' + str(dia.year) for dia in dias],
+                                                    [diarios[dia.isoformat()] for dia in dias],
+                                                    name = mes.strftime("%B")))
+
+    # Layout
+    plot_layout = go.Layout(xaxis = {"type": "category", 'title': 'Periodo'},
+                            yaxis = {'title': 'Previsao de Energia'}, 
+                            title = 'Diferenca de Previsao de Energia entre o mes vigente e o anterior',
+                            height = 550)
+    
+    # Plot da figura
+    return go.Figure(data = plot_data, layout = plot_layout)
+
+# Função para gerar as figuras e indicadores da página
+def gerar_figuras():
+    # Capturando dados da API
+    temp_list = api_client.get('previsao')
+    
+    # Convertendo para dicionario e corrigindo os tipos
+    dt = pd.DataFrame(temp_list).reset_index()
+    dt['Hour'] = dt['Hour'].astype(int) 
+    dt[['Press_mm_hg', 'Temperatura_Interna', 'Umidade_Interna', 'Previsao_Energia']] = dt[['Press_mm_hg', 'Temperatura_Interna', 'Umidade_Interna', 'Previsao_Energia']].astype(float)
+    dt['Data'] = dt['Data'] + ' ' + dt['Hour'].astype(str).str.zfill(2) + ':00:00'     
+    dt['Data'] = pd.to_datetime(dt['Data'], format='%d/%m/%Y %H:%M:%S')
+    dt = round(dt, 2)     
+    
+    # Calculando Indicadores pelos totais diarios, os mesmos mantidos pelo modo ao vivo
+    totais = calcular_totais(somar_diarios(dt), date.today())
+    totais['ultimo_id'] = int(dt['Id'].max()) if len(dt) > 0 else 0
+    gastoHoje = formatar_gasto(totais['hoje'])
+    gasto30Dias = formatar_gasto(totais['30dias'])
+    gasto7Dias = formatar_gasto(totais['7dias'])
+    
+    # Plot Mes Atual x Mes Passado, pelos mesmos totais diarios atualizados no modo ao vivo
+    dif_fig = gerar_grafico_meses(totais['diarios'], date.today())
+
+    return {'gasto30Dias': gasto30Dias, 'gasto7Dias': gasto7Dias, 'gastoHoje': gastoHoje, 'dif_graph': dif_fig, 'totais': totais}
 
 # Função para obter o layout
+@instrumentacao.medir('monitoring.get_layout')
 def get_layout():
     try:
-        # Capturando dados da API
-        request = requests.get('http://{IP_API}:{PORTA_API}/previsao'.format(IP_API = constant.IP_API, PORTA_API = constant.PORTA_API))
-        
-        temp_list = request.json()
-        
-        # Convertendo para dicionario e corrigindo os tipos
-        dt = pd.DataFrame(temp_list).reset_index()
-        dt['Hour'] = dt['Hour'].astype(int) 
-        dt[['Press_mm_hg', 'Temperatura_Interna', 'Umidade_Interna', 'Previsao_Energia']] = dt[['Press_mm_hg', 'Temperatura_Interna', 'Umidade_Interna', 'Previsao_Energia']].astype(float)
-        dt2 = dt.copy()
-        dt3 = dt.copy()
-        dt['Data'] = dt['Data'] + ' ' + dt['Hour'].astype(str).str.zfill(2) + ':00:00'     
-        dt['Data'] = pd.to_datetime(dt['Data'], format='%d/%m/%Y %H:%M:%S')
-        dt2['Data'] = pd.to_datetime(dt2['Data'], format='%d/%m/%Y')
-        dt3['Data'] = pd.to_datetime(dt3['Data'], format='%d/%m/%Y')
-        dt = round(dt, 2)     
-        
-        # Calculando Indicadores
-        d = date.today().strftime('%Y-%m-%d') + ' 00:00:00'
-        dt2 = dt2[dt2['Data'] == d]
-        gastoHoje =str(round(dt2['Previsao_Energia'].sum(), 2)) + ' Wh'
-        gasto30Dias = str(round(dt[dt['Data'] > datetime.now() - pd.to_timedelta("30day")]['Previsao_Energia'].sum(), 2)) + ' Wh'
-        gasto7Dias = str(round(dt[dt['Data'] > datetime.now() - pd.to_timedelta("7day")]['Previsao_Energia'].sum(), 2)) + ' Wh'
-        
-        dtMesAtual = dt3[dt3['Data'].dt.month == datetime.now().month]
-        dtMesAtual = dtMesAtual[dtMesAtual['Data'].dt.day != 31]
-        
-        subtractMonth = datetime.now().month       
-        if subtractMonth == 1:
-            subtractMonth = 12
-            dtMesAnterior = dt3[dt3['Data'].dt.month == subtractMonth]
-            dtMesAnterior = dtMesAnterior[dtMesAnterior['Data'].dt.year == datetime.now().year - 1]
-            dtMesAnterior = dtMesAnterior[dtMesAnterior['Data'].dt.day != 31]
-        else:
-            subtractMonth -= 1
-            dtMesAnterior = dt3[dt3['Data'].dt.month == subtractMonth]
-        
-        # Agrupando por data
-        dtMesAtual = dtMesAtual.groupby('Data')['Previsao_Energia'].sum().reset_index()
-        dtMesAnterior = dtMesAnterior.groupby('Data')['Previsao_Energia'].sum().reset_index()
-        
-        dtMesAtual['Data'] = dtMesAtual['Data'].dt.day.astype(str) + '/' + dtMesAtual['Data'].dt.year.astype(str)
-        dtMesAnterior['Data'] = dtMesAnterior['Data'].dt.day.astype(str) + '/' + dtMesAnterior['Data'].dt.year.astype(str)
-        
-        strMesAnterior = datetime.strptime(str(subtractMonth), "%m").strftime("%B")
-        strMesAtual = datetime.strptime(str(datetime.now().month), "%m").strftime("%B")
-        
-        # Plot Mes Atual x Mes Passado
-
-        # Definio dos dados no plot
-        plot_data = [go.Scatter(x = dtMesAtual['Data'],
-                                y = dtMesAtual['Previsao_Energia'],
-                                name = strMesAtual),
-                     go.Scatter(x = dtMesAnterior['Data'],
-                                y = dtMesAnterior['Previsao_Energia'],
-                                name = strMesAnterior)]
-        
-        # Layout
-        plot_layout = go.Layout(xaxis = {"type": "category", 'title': 'Periodo'},
-                                yaxis = {'title': 'Previsao de Energia'}, 
-                                title = 'Diferenca de Previsao de Energia entre o mes vigente e o anterior',
-                                height = 550)
-        
-        # Plot da figura
-        dif_fig = go.Figure(data = plot_data, layout = plot_layout)
-        
+        # Captura o conteúdo pré-renderizado
+        conteudo = pre_renderizador.obter('monitoring')
+
         # Layout
         layout = dbc.Container([
+                 dbc.Row([
+                        dbc.Col([
+                            dbc.Checklist(id = 'monitoring-ao-vivo',
+                                          options = [{'label': 'Ao vivo', 'value': 'ao_vivo'}],
+                                          value = [],
+                                          switch = True),
+                            dcc.Interval(id = 'monitoring-intervalo', interval = constant.INTERVALO_AO_VIVO, disabled = True),
+                            dcc.Store(id = 'monitoring-estado', data = conteudo['totais'])
+                        ], width = 12)],
+                        className= "pb-3"),
                  dbc.Row([
                         dbc.Col([
                         dbc.Card([dbc.CardHeader("Gasto Energetico Ultimos 30 Dias"),
-                                  dbc.CardBody([html.H2(gasto30Dias, className = "card-text")]),], className = "shadow p-3 bg-light rounded")], width = 3),
+                                  dbc.CardBody([html.H2(conteudo['gasto30Dias'], id = 'monitoring-30dias', className = "card-text")]),], className = "shadow p-3 bg-light rounded")], width = 3),
                         dbc.Col([
                         dbc.Card([dbc.CardHeader("Gasto Energetico Ultimos 7 Dias"),
-                                  dbc.CardBody([html.H2(gasto7Dias, className = "card-text")]),], className = "shadow p-3 bg-light rounded")], width = 3),
+                                  dbc.CardBody([html.H2(conteudo['gasto7Dias'], id = 'monitoring-7dias', className = "card-text")]),], className = "shadow p-3 bg-light rounded")], width = 3),
                         dbc.Col([
                         dbc.Card([dbc.CardHeader("Gasto Energetico Hoje"),
-                                  dbc.CardBody([html.H2(gastoHoje, className = "card-text")]),], className = "shadow p-3 bg-light rounded")], width = 3),
+                                  dbc.CardBody([html.H2(conteudo['gastoHoje'], id = 'monitoring-hoje', className = "card-text")]),], className = "shadow p-3 bg-light rounded")], width = 3),
                         dbc.Col([
                         dbc.Card([dbc.CardHeader("Em Caso de Dúvidas Envie E-mail Para"),
                                   dbc.CardBody([html.H2("Suporte BIGF", className = "card-text")]),], className = "shadow p-3 bg-light rounded")], width = 3)],
                         className= "pb-3"),
                  dbc.Row([
-                        dbc.Col(dcc.Graph(id = 'dif_graph', figure = dif_fig), width = 12)
+                        dbc.Col(dcc.Graph(id = 'dif_graph', figure = conteudo['dif_graph']), width = 12)
                 ])
         ],
         fluid = True)
@@ -123,4 +154,37 @@ def get_layout():
                 )
         return layout
 
+# Callback
+@app.callback(Output('monitoring-intervalo', 'disabled'), [Input('monitoring-ao-vivo', 'value')])
+
+# Liga ou desliga o modo ao vivo
+def on_ao_vivo(valor):
+    return 'ao_vivo' not in (valor or [])
+
+# Callback
+@app.callback([Output('monitoring-30dias', 'children'), Output('monitoring-7dias', 'children'),
+               Output('monitoring-hoje', 'children'), Output('dif_graph', 'figure'), Output('monitoring-estado', 'data')],
+              [Input('monitoring-intervalo', 'n_intervals')],
+              [State('monitoring-estado', 'data')])
+
+# Soma aos totais diarios somente as previsões novas desde a última atualização e recalcula as janelas e o gráfico dos
+# meses, que também avançam na virada do dia mesmo sem previsões novas
+def on_intervalo(n_intervals, estado):
+    if not n_intervals or estado is None:
+        raise PreventUpdate
+
+    dtNovos = data_operations.get_novas_previsoes(estado['ultimo_id'])
+    hoje = datetime.now().date()
+
+    if len(dtNovos) == 0 and estado.get('dia') == hoje.isoformat():
+        raise PreventUpdate
+
+    ultimo_id = int(dtNovos['Id'].max()) if len(dtNovos) > 0 else estado['ultimo_id']
+    estado = calcular_totais(somar_diarios(dtNovos, estado.get('diarios')), hoje)
+    estado['ultimo_id'] = ultimo_id
+
+    return (formatar_gasto(estado['30dias']), formatar_gasto(estado['7dias']), formatar_gasto(estado['hoje']),
+            gerar_grafico_meses(estado['diarios'], hoje), estado)
 
+# Registra a página no pré-renderizador
+pre_renderizador.registrar('monitoring', gerar_figuras)
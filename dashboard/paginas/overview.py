@@ -7,52 +7,57 @@ import dash
 import dash_table
 import dash_html_components as html
 import dash_bootstrap_components as dbc
-import requests
 from dash.dependencies import Input, Output, State
 
 # Módulos customizados
 from app import app
-from modulos import app_element, data_operations, constant
+from modulos import app_element, data_operations, constant, pre_renderizador, api_client, instrumentacao
+
+# Função para gerar as figuras e indicadores da página
+def gerar_figuras():
+    '''
+    # Conectando ao banco de dados sqlite
+    banco = sqlite3.connect('../database/banco.db', check_same_thread = False)
+    cursor = banco.cursor()
+    
+    # Extraindo dados do banco de dados
+    cursor.execute("SELECT * FROM previsao_energia")
+    
+    temp_list = cursor.fetchall() 
+    return_list = []
+    
+    # Convertendo para lista de dicionarios
+    for temp in temp_list:
+        return_list.append({
+            "Data": temp[0],
+            "Hour": temp[1],
+            "Press_mm_hg": temp[2],
+            "Temperatura_Interna": temp[3],
+            "Umidade_Interna": temp[4],
+            "Previsao_Energia": temp[5]})   
+    
+    # Convertendo para dicionario e corrigindo os tipos
+    dt = pd.DataFrame(return_list).reset_index()
+    dt = round(dt, 2)
+    '''
+    
+    # Capturando dados da API
+    temp_list = api_client.get('previsao')
+    
+    # Convertendo para dicionario e corrigindo os tipos, sem o id interno usado pelo modo ao vivo
+    dt = pd.DataFrame(temp_list).drop(columns = ['Id'], errors = 'ignore').reset_index()
+    dt = round(dt, 2)     
+    
+    observacoes = dt.shape[0]
+
+    return {'observacoes': observacoes, 'table1': dt}
 
 # Função para obter o layout
+@instrumentacao.medir('overview.get_layout')
 def get_layout():
     try:
-        '''
-        # Conectando ao banco de dados sqlite
-        banco = sqlite3.connect('../database/banco.db', check_same_thread = False)
-        cursor = banco.cursor()
-        
-        # Extraindo dados do banco de dados
-        cursor.execute("SELECT * FROM previsao_energia")
-        
-        temp_list = cursor.fetchall() 
-        return_list = []
-        
-        # Convertendo para lista de dicionarios
-        for temp in temp_list:
-            return_list.append({
-                "Data": temp[0],
-                "Hour": temp[1],
-                "Press_mm_hg": temp[2],
-                "Temperatura_Interna": temp[3],
-                "Umidade_Interna": temp[4],
-                "Previsao_Energia": temp[5]})   
-        
-        # Convertendo para dicionario e corrigindo os tipos
-        dt = pd.DataFrame(return_list).reset_index()
-        dt = round(dt, 2)
-        '''
-        
-        # Capturando dados da API
-        request = requests.get('http://{IP_API}:{PORTA_API}/previsao'.format(IP_API = constant.IP_API, PORTA_API = constant.PORTA_API))
-        
-        temp_list = request.json()
-        
-        # Convertendo para dicionario e corrigindo os tipos
-        dt = pd.DataFrame(temp_list).reset_index()
-        dt = round(dt, 2)     
-        
-        observacoes = dt.shape[0]     
+        # Captura o conteúdo pré-renderizado
+        conteudo = pre_renderizador.obter('overview')
 
         # Layout
         layout = dbc.Container([
@@ -62,7 +67,7 @@ def get_layout():
                                   dbc.CardBody([html.H2("Data App", className = "card-text")]),], className = "shadow p-3 bg-light rounded")], width = 3),
                         dbc.Col([
                         dbc.Card([dbc.CardHeader("Número de Registros Analisados"),
-                                  dbc.CardBody([html.H2(str(observacoes), className = "card-text")]),], className = "shadow p-3 bg-light rounded")], width = 3),
+                                  dbc.CardBody([html.H2(str(conteudo['observacoes']), className = "card-text")]),], className = "shadow p-3 bg-light rounded")], width = 3),
                         dbc.Col([
                         dbc.Card([dbc.CardHeader("Período de Coleta dos Dados"),
                                   dbc.CardBody([html.H2("2021", className = "card-text")]),], className = "shadow p-3 bg-light rounded")], width = 3),
@@ -73,7 +78,7 @@ def get_layout():
                  dbc.Row([
                         dbc.Col(dbc.Card([
                                 dbc.CardHeader("Registros Analisados"),
-                                app_element.generate_dashtable(identifier = "table1", dataframe = dt, height = '800px')],
+                                app_element.generate_dashtable(identifier = "table1", dataframe = conteudo['table1'], height = '800px')],
                                 className = "shadow p-3 bg-light rounded"), width = 12)
                 ])
         ],
@@ -94,4 +99,5 @@ def get_layout():
                 )
         return layout
 
-
+# Registra a página no pré-renderizador
+pre_renderizador.registrar('overview', gerar_figuras)
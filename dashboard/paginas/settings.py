@@ -11,9 +11,10 @@ from dash.dependencies import Input, Output, State
 
 # Módulos customizados
 from app import app
-from modulos import data_operations, constant
+from modulos import data_operations, constant, instrumentacao
 
 # Função para o layout
+@instrumentacao.medir('settings.get_layout')
 def get_layout():
     try:
 
@@ -93,8 +94,14 @@ def get_layout():
 def on_button_click(num_click, table_data, dt_format):
     if num_click > 0:
         if data_operations.write_field_mapping_file(table_data,dt_format) == 0:
-            config_df = data_operations.read_config_in_df()
-            return "Configurações Salvas com Sucesso!"
+
+            # Processa o dataset com o novo mapeamento (atualizando o cache em Parquet), validando os campos e o formato de data
+            try:
+                dataframe = data_operations.generate_dataframe()
+            except (KeyError, ValueError) as erro:
+                return f"Configurações salvas, mas o dataset não pôde ser carregado com elas: {erro}"
+
+            return f"Configurações Salvas com Sucesso! {len(dataframe)} registros carregados."
         else:    
             return "Erro ao Gravar os Arquivos de Configuração."
 
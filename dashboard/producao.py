@@ -0,0 +1,43 @@
+# Executa a data app em produção, com o servidor Dash em múltiplos workers (gunicorn)
+
+# Imports
+import argparse
+import multiprocessing
+from gunicorn.app.base import BaseApplication
+
+class DataApp(BaseApplication):
+    # Aplicação gunicorn que carrega o servidor Flask da data app em cada worker
+    def __init__(self, opcoes):
+        self.opcoes = opcoes
+        super().__init__()
+
+    def load_config(self):
+        for chave, valor in self.opcoes.items():
+            self.cfg.set(chave, valor)
+
+    def load(self):
+        from dataapp import server
+
+        return server
+
+# Hook executado em cada worker após o fork
+def post_fork(server, worker):
+    from dataapp import carregar_paginas
+    from modulos import pre_renderizador
+
+    # Todos os workers iniciam o pré-renderizador, mas somente o que detém o lease renderiza
+    pre_renderizador.iniciar(carregar = carregar_paginas)
+
+#  Executa o programa
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Executa a data app com múltiplos workers')
+    parser.add_argument('--workers', type = int, default = multiprocessing.cpu_count() * 2 + 1)
+    parser.add_argument('--threads', type = int, default = 4)
+    parser.add_argument('--porta', default = '3000')
+    args = parser.parse_args()
+
+    DataApp({'bind': '0.0.0.0:{}'.format(args.porta),
+             'workers': args.workers,
+             'threads': args.threads,
+             'timeout': 120,
+             'post_fork': post_fork}).run()
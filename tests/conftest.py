@@ -0,0 +1,12 @@
+# Configuração dos testes: os módulos do pipeline, da API e do dashboard são importados como nas suas execuções
+# (raiz do projeto, diretório da API e diretório do dashboard no sys.path)
+
+# Importar bibliotecas
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for caminho in [RAIZ, os.path.join(RAIZ, 'api'), os.path.join(RAIZ, 'dashboard')]:
+    if caminho not in sys.path:
+        sys.path.append(caminho)
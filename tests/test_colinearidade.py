@@ -0,0 +1,68 @@
+# Testes do VIF pela inversa da matriz de correlação contra o VIF por minimos quadrados (uma regressão por variavel)
+
+# Importar bibliotecas
+import numpy as np
+import pandas as pd
+import pytest
+from treinamento import colinearidade
+
+@pytest.fixture
+def X():
+    gerador = np.random.default_rng(0)
+    base = gerador.normal(size = (500, 4))
+
+    dados = pd.DataFrame(base, columns = ['a', 'b', 'c', 'd'])
+    dados['e'] = dados['a'] + 0.1 * gerador.normal(size = 500)
+    dados['f'] = dados['b'] - dados['c'] + 0.05 * gerador.normal(size = 500)
+    dados['g'] = 5 + dados['d'] + 0.5 * gerador.normal(size = 500)
+
+    return dados
+
+# VIF_i = 1 / (1 - R²_i), com R² da regressão da variavel i sobre as demais (com ou sem intercepto)
+def vif_minimos_quadrados(X, centralizar = True):
+    valores = X.to_numpy(dtype = np.float64)
+    vif = []
+
+    for i in range(valores.shape[1]):
+        y = valores[:, i]
+        outras = np.delete(valores, i, axis = 1)
+        if centralizar:
+            outras = np.column_stack([np.ones(len(y)), outras])
+
+        coeficientes = np.linalg.lstsq(outras, y, rcond = None)[0]
+        residuo = y - outras @ coeficientes
+        total = y - y.mean() if centralizar else y
+        vif.append(1 / (residuo @ residuo / (total @ total)))
+
+    return np.array(vif)
+
+@pytest.mark.parametrize('centralizar', [True, False])
+def test_vif_igual_ao_de_minimos_quadrados(X, centralizar):
+    vif = colinearidade.calcular_vif(X, centralizar)
+
+    assert list(vif['Features']) == list(X.columns)
+    np.testing.assert_allclose(vif['VIF'], vif_minimos_quadrados(X, centralizar), rtol = 1e-8)
+
+def test_remocao_igual_a_recalcular_a_cada_passo(X):
+    colunas, historico = colinearidade.remover_colinearidade(X, limite = 5)
+
+    # Mesmo resultado recalculando todos os VIF por minimos quadrados após cada remoção
+    restantes = list(X.columns)
+    for _, remocao in historico.iterrows():
+        vif = vif_minimos_quadrados(X[restantes])
+        assert restantes[int(np.argmax(vif))] == remocao['Features']
+        assert vif.max() == pytest.approx(remocao['VIF'], rel = 1e-6)
+        restantes.remove(remocao['Features'])
+
+    assert colunas == restantes
+    assert vif_minimos_quadrados(X[colunas]).max() <= 5
+
+def test_remocao_respeita_manter(X):
+    colunas, historico = colinearidade.remover_colinearidade(X, limite = 5, manter = ['e', 'f'])
+
+    assert 'e' in colunas and 'f' in colunas
+    assert not historico['Features'].isin(['e', 'f']).any()
+
+def test_variavel_constante_gera_erro(X):
+    with pytest.raises(ValueError, match = 'constantes'):
+        colinearidade.calcular_vif(X.assign(h = 1.0))
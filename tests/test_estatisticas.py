@@ -0,0 +1,84 @@
+# Testes das estatisticas descritivas incrementais da API (Welford + t-digest)
+
+# Importar bibliotecas
+import numpy as np
+import pandas as pd
+import pytest
+from src.services.estatisticas import Acumulador, EstatisticasPrevisao, TDigest
+
+@pytest.fixture
+def valores():
+    return np.random.default_rng(0).lognormal(3, 1, 20000)
+
+def test_welford_exato(valores):
+    acumulador = Acumulador()
+    for valor in valores:
+        acumulador.adicionar(valor)
+
+    descricao = acumulador.descrever()
+    assert descricao['count'] == len(valores)
+    assert descricao['mean'] == pytest.approx(valores.mean(), rel = 1e-12)
+    assert descricao['std'] == pytest.approx(valores.std(ddof = 1), rel = 1e-10)
+    assert descricao['min'] == valores.min() and descricao['max'] == valores.max()
+
+def test_welford_estavel_com_deslocamento_grande():
+    valores = 1e9 + np.random.default_rng(1).normal(size = 1000)
+    acumulador = Acumulador()
+    for valor in valores:
+        acumulador.adicionar(valor)
+
+    assert acumulador.descrever()['std'] == pytest.approx(valores.std(ddof = 1), rel = 1e-6)
+
+def test_tdigest_quantis_aproximados(valores):
+    digest = TDigest()
+    for valor in valores:
+        digest.adicionar(valor)
+
+    # Erro de posição (em quantil) pequeno, maior perto da mediana que nas caudas
+    ordenados = np.sort(valores)
+    for q in [0.01, 0.25, 0.5, 0.75, 0.99]:
+        posicao = np.searchsorted(ordenados, digest.quantil(q)) / len(valores)
+        assert abs(posicao - q) < 0.01
+
+    assert digest.quantil(0) == valores.min() and digest.quantil(1) == valores.max()
+
+def test_tdigest_tamanho_limitado(valores):
+    digest = TDigest(compressao = 100)
+    for valor in valores:
+        digest.adicionar(valor)
+    digest.comprimir()
+
+    assert len(digest.medias) < 200
+    assert sum(digest.pesos) == len(valores)
+
+def test_combinar_particoes_igual_a_uma_passagem(valores):
+    particoes = np.array_split(valores, 7)
+    combinado = Acumulador()
+    for particao in particoes:
+        acumulador = Acumulador()
+        for valor in particao:
+            acumulador.adicionar(valor)
+        combinado.combinar(acumulador)
+
+    descricao = combinado.descrever()
+    assert descricao['count'] == len(valores)
+    assert descricao['mean'] == pytest.approx(valores.mean(), rel = 1e-12)
+    assert descricao['std'] == pytest.approx(valores.std(ddof = 1), rel = 1e-10)
+    assert abs(np.searchsorted(np.sort(valores), descricao['50%']) / len(valores) - 0.5) < 0.01
+
+def test_tabela_no_formato_do_describe_e_persistencia(tmp_path):
+    dt = pd.DataFrame(np.random.default_rng(2).normal(size = (500, 2)), columns = ['Hour', 'Previsao_Energia'])
+    estatisticas = EstatisticasPrevisao(dt.columns, str(tmp_path / 'estatisticas.json'))
+    for id_registro, registro in enumerate(dt.to_dict('records'), start = 1):
+        estatisticas.adicionar(registro, id_registro)
+    estatisticas.salvar()
+
+    carregadas = EstatisticasPrevisao.carregar(dt.columns, str(tmp_path / 'estatisticas.json'))
+    tabela = pd.DataFrame(carregadas.tabela()).set_index('Indice')
+    describe = dt.describe()
+
+    assert carregadas.ultimo_id == 500
+    assert list(tabela.index) == list(describe.index)
+    for indice in ['count', 'mean', 'std', 'min', 'max']:
+        assert np.allclose(tabela.loc[indice].astype(float), describe.loc[indice], rtol = 1e-10)
+    assert np.allclose(tabela.loc['50%'].astype(float), describe.loc['50%'], atol = 0.1)
@@ -0,0 +1,59 @@
+# Testes da aditividade dos valores SHAP (nativo do CatBoost e KernelExplainer em lotes) e do cache em disco
+
+# Importar bibliotecas
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from catboost import CatBoostRegressor
+from sklearn.linear_model import LinearRegression
+from treinamento import explicacao
+
+@pytest.fixture
+def dados():
+    gerador = np.random.default_rng(0)
+    X = pd.DataFrame(gerador.normal(size = (200, 4)), columns = ['T3', 'RH_3', 'T8', 'Hour'])
+    y = 2 * X['T3'] - X['RH_3'] + X['T8'] * X['Hour'] + gerador.normal(size = 200)
+
+    return X, y
+
+def test_shap_nativo_soma_a_previsao(dados, tmp_path):
+    X, y = dados
+    modelo = CatBoostRegressor(iterations = 50, depth = 4, verbose = False, allow_writing_files = False, random_seed = 0).fit(X, y)
+
+    valores, esperado = explicacao.valores_shap(modelo, X, diretorio = str(tmp_path))
+
+    assert valores.shape == X.shape
+    np.testing.assert_allclose(valores.sum(axis = 1) + esperado, modelo.predict(X), atol = 1e-6)
+
+@pytest.mark.parametrize('processos', [1, 2])
+def test_kernel_shap_soma_a_previsao(dados, tmp_path, processos):
+    X, y = dados
+    modelo = LinearRegression().fit(X, y)
+
+    # Lotes menores que os dados, para combinar os resultados de varios lotes
+    valores, esperado = explicacao.valores_shap(modelo, X.iloc[:30], fundo = X, k = 10, lote = 8, processos = processos,
+                                                diretorio = str(tmp_path))
+
+    np.testing.assert_allclose(valores.sum(axis = 1) + esperado, modelo.predict(X.iloc[:30]), atol = 1e-6)
+
+    # No modelo linear o SHAP é coeficiente x (valor - média do fundo resumido)
+    fundo = explicacao.resumir_fundo(X, 10)
+    media_fundo = np.average(fundo.data, axis = 0, weights = fundo.weights)
+    np.testing.assert_allclose(valores, modelo.coef_ * (X.iloc[:30].to_numpy() - media_fundo), atol = 1e-6)
+
+def test_cache_reaproveitado_e_invalidado_pelo_modelo(dados, tmp_path):
+    X, y = dados
+    modelo = LinearRegression().fit(X, y)
+
+    valores, esperado = explicacao.valores_shap(modelo, X.iloc[:10], fundo = X, k = 5, processos = 1, diretorio = str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 1
+
+    lidos, esperado_lido = explicacao.valores_shap(modelo, X.iloc[:10], fundo = X, k = 5, processos = 1, diretorio = str(tmp_path))
+    np.testing.assert_array_equal(lidos, valores)
+    assert esperado_lido == esperado
+
+    # Outro modelo (ou outros dados) gera outra entrada no cache
+    explicacao.valores_shap(LinearRegression().fit(X, -y), X.iloc[:10], fundo = X, k = 5, processos = 1, diretorio = str(tmp_path))
+    explicacao.valores_shap(modelo, X.iloc[:11], fundo = X, k = 5, processos = 1, diretorio = str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 3
@@ -0,0 +1,75 @@
+# Testes das variaveis temporais (defasagens, janelas móveis e expansivas) contra o pandas, em lote e em streaming
+
+# Importar bibliotecas
+import numpy as np
+import pandas as pd
+import pytest
+from treinamento import features
+
+JANELAS = [1, 3, 24]
+LAGS = [1, 6]
+
+@pytest.fixture
+def dados():
+    gerador = np.random.default_rng(0)
+    n = 400
+
+    # Série com deslocamento grande, que perderia precisão na variância sem a centralização
+    return pd.DataFrame({'casa': np.repeat(['a', 'b'], n // 2),
+                         'T1': 1e6 + np.cumsum(gerador.normal(size = n)),
+                         'RH_1': gerador.uniform(20, 60, n)})
+
+# Variaveis de referência calculadas com o pandas, separadamente para cada casa
+def referencia(dados, coluna, deslocamento):
+    grupos = dados.groupby('casa', sort = False)[coluna]
+    serie = grupos.shift(deslocamento) if deslocamento else dados[coluna]
+    grupos_serie = serie.groupby(dados['casa'], sort = False)
+    saida = {}
+
+    for k in LAGS:
+        saida['{}_lag{}'.format(coluna, k)] = grupos.shift(k)
+
+    for janela in JANELAS:
+        movel = grupos_serie.rolling(janela)
+        saida['{}_media{}'.format(coluna, janela)] = movel.mean().reset_index(level = 0, drop = True)
+        saida['{}_desvio{}'.format(coluna, janela)] = movel.std().reset_index(level = 0, drop = True)
+        saida['{}_min{}'.format(coluna, janela)] = movel.min().reset_index(level = 0, drop = True)
+        saida['{}_max{}'.format(coluna, janela)] = movel.max().reset_index(level = 0, drop = True)
+
+    expansiva = grupos_serie.expanding()
+    saida['{}_media_exp'.format(coluna)] = expansiva.mean().reset_index(level = 0, drop = True)
+    saida['{}_desvio_exp'.format(coluna)] = expansiva.std().reset_index(level = 0, drop = True)
+
+    return pd.DataFrame(saida).sort_index()
+
+@pytest.mark.parametrize('deslocamento', [0, 1, 3])
+def test_gerar_features_igual_ao_pandas(dados, deslocamento):
+    resultado = features.gerar_features(dados, ['T1', 'RH_1'], LAGS, JANELAS, True, grupo = 'casa', deslocamento = deslocamento)
+
+    for coluna in ['T1', 'RH_1']:
+        esperado = referencia(dados, coluna, deslocamento)
+        pd.testing.assert_frame_equal(resultado[esperado.columns], esperado, check_exact = False, rtol = 1e-7, atol = 1e-7)
+
+def test_extremos_moveis_nos_limites_dos_blocos():
+    x = np.random.default_rng(1).normal(size = 101)
+
+    for janela in [1, 2, 7, 100, 101, 102]:
+        serie = pd.Series(x).rolling(janela)
+        np.testing.assert_array_equal(features.minimo_movel(x, janela), serie.min().to_numpy())
+        np.testing.assert_array_equal(features.maximo_movel(x, janela), serie.max().to_numpy())
+
+@pytest.mark.parametrize('deslocamento', [0, 2])
+def test_streaming_igual_ao_lote(dados, deslocamento):
+    lote = features.gerar_features(dados, ['T1', 'RH_1'], LAGS, JANELAS, True, grupo = 'casa', deslocamento = deslocamento)
+    janela = features.JanelaStreaming(['T1', 'RH_1'], LAGS, JANELAS, True, deslocamento)
+
+    streaming = pd.DataFrame([janela.adicionar(registro['casa'], registro) for registro in dados.to_dict('records')], index = dados.index)
+
+    pd.testing.assert_frame_equal(streaming[lote.columns], lote, check_exact = False, rtol = 1e-7, atol = 1e-7)
+
+def test_streaming_guarda_somente_a_janela(dados):
+    janela = features.JanelaStreaming(['T1'], LAGS, JANELAS, True, deslocamento = 1)
+    for registro in dados.to_dict('records'):
+        janela.adicionar(registro['casa'], registro)
+
+    assert all(len(historico) == max(JANELAS) + 1 for historico in janela.historico.values())
@@ -0,0 +1,63 @@
+# Testes do downsampling LTTB dos gráficos de linha do dashboard
+
+# Importar bibliotecas
+import numpy as np
+import pandas as pd
+from modulos import graficos
+
+# Implementação de referência do LTTB, ponto a ponto (Steinarsson, 2013)
+def lttb_referencia(x, y, n_pontos):
+    n = len(y)
+    tamanho = (n - 2) / (n_pontos - 2)
+    indices = [0]
+    a = 0
+
+    for i in range(n_pontos - 2):
+        inicio = int(np.floor(i * tamanho)) + 1
+        fim = int(np.floor((i + 1) * tamanho)) + 1
+        prox_fim = min(int(np.floor((i + 2) * tamanho)) + 1, n)
+
+        media_x = sum(x[fim:prox_fim]) / (prox_fim - fim)
+        media_y = sum(y[fim:prox_fim]) / (prox_fim - fim)
+
+        melhor, maior_area = inicio, -1.0
+        for j in range(inicio, fim):
+            area = abs((x[a] - media_x) * (y[j] - y[a]) - (x[a] - x[j]) * (media_y - y[a]))
+            if area > maior_area:
+                melhor, maior_area = j, area
+
+        indices.append(melhor)
+        a = melhor
+
+    return indices + [n - 1]
+
+def test_lttb_igual_a_referencia():
+    gerador = np.random.default_rng(0)
+    x = np.cumsum(gerador.uniform(0.5, 1.5, 1000))
+    y = np.cumsum(gerador.normal(size = 1000))
+
+    for n_pontos in [3, 10, 97, 500]:
+        assert list(graficos.lttb(x, y, n_pontos)) == lttb_referencia(list(x), list(y), n_pontos)
+
+def test_lttb_um_ponto_por_bucket_e_extremos():
+    y = np.sin(np.linspace(0, 20, 5000))
+    indices = graficos.lttb(np.arange(5000), y, 100)
+
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 4999
+    assert np.all(np.diff(indices) > 0)
+
+def test_lttb_mantem_pico_isolado():
+    y = np.zeros(1000)
+    y[537] = 100.0
+
+    assert 537 in graficos.lttb(np.arange(1000), y, 50)
+
+def test_lttb_sem_reducao_quando_orcamento_maior():
+    assert list(graficos.lttb(np.arange(10), np.arange(10), 20)) == list(range(10))
+
+def test_lttb_eixo_de_datas_igual_ao_numerico():
+    datas = pd.date_range('2021-01-01', periods = 300, freq = 'h')
+    y = np.random.default_rng(1).normal(size = 300)
+
+    assert list(graficos.lttb(datas.to_numpy(), y, 30)) == list(graficos.lttb(datas.asi8.astype(float), y, 30))
@@ -0,0 +1,82 @@
+# Testes do cache das etapas do pipeline de treinamento: chave das etapas e reaproveitamento/invalidação dos resultados
+
+# Importar bibliotecas
+import importlib
+import inspect
+import logging
+import re
+import sys
+import types
+import pytest
+from treinamento import pipeline
+
+# Parâmetros de uma execução pequena, com o mesmo arquivo no treino e no teste
+PARAMETROS = {'carregar': {'treino': pipeline.os.path.join(pipeline.RAIZ, 'data', 'testing.csv'),
+                           'teste': pipeline.os.path.join(pipeline.RAIZ, 'data', 'testing.csv')}}
+
+def etapas_executadas(caplog):
+    return [re.search(r'Etapa (\w+): executada', registro.getMessage()).group(1)
+            for registro in caplog.records if re.search(r'Etapa \w+: executada', registro.getMessage())]
+
+def test_chave_muda_com_parametros_dependencias_e_codigo(tmp_path, monkeypatch):
+    cache = pipeline.CacheEtapas(str(tmp_path))
+
+    # Módulo auxiliar temporario, alterado entre as chaves
+    monkeypatch.syspath_prepend(str(tmp_path))
+    (tmp_path / 'auxiliar_teste.py').write_text('def f(x):\n    return x\n')
+    auxiliar = importlib.import_module('auxiliar_teste')
+
+    chave = cache.chave('limpar', pipeline.etapa_limpar, {'a': 1}, ['d1'], [auxiliar])
+    assert chave == cache.chave('limpar', pipeline.etapa_limpar, {'a': 1}, ['d1'], [auxiliar])
+    assert chave != cache.chave('limpar', pipeline.etapa_limpar, {'a': 2}, ['d1'], [auxiliar])
+    assert chave != cache.chave('limpar', pipeline.etapa_limpar, {'a': 1}, ['d2'], [auxiliar])
+    assert chave != cache.chave('escalar', pipeline.etapa_limpar, {'a': 1}, ['d1'], [auxiliar])
+
+    (tmp_path / 'auxiliar_teste.py').write_text('def f(x):\n    return x + 1\n')
+    importlib.reload(auxiliar)
+    assert chave != cache.chave('limpar', pipeline.etapa_limpar, {'a': 1}, ['d1'], [auxiliar])
+
+    sys.modules.pop('auxiliar_teste', None)
+
+@pytest.mark.parametrize('nome', [nome for nome in pipeline.ETAPAS if nome != 'exportar'])
+def test_codigo_das_etapas_inclui_os_auxiliares_chamados(nome):
+    funcao = getattr(pipeline, 'etapa_' + nome)
+    codigo = pipeline.CODIGO_ETAPAS.get(nome, [])
+    fonte = inspect.getsource(funcao)
+
+    # Módulos do treinamento e funções do próprio pipeline chamados pela etapa fazem parte da chave
+    for chamado in set(re.findall(r'\b(\w+)\s*[.(]', fonte)):
+        objeto = getattr(pipeline, chamado, None)
+
+        if isinstance(objeto, types.ModuleType) and objeto.__name__.startswith('treinamento.'):
+            assert objeto in codigo, '{} chama {} fora da chave do cache'.format(funcao.__name__, chamado)
+        elif inspect.isfunction(objeto) and objeto.__module__ == pipeline.__name__ and objeto is not funcao:
+            assert objeto in codigo, '{} chama {} fora da chave do cache'.format(funcao.__name__, chamado)
+
+def test_etapas_reaproveitadas_e_invalidadas(tmp_path, caplog, monkeypatch):
+    caplog.set_level(logging.INFO)
+
+    pipeline.executar(PARAMETROS, 'features', str(tmp_path))
+    assert etapas_executadas(caplog) == ['carregar', 'limpar', 'escalar', 'features']
+
+    caplog.clear()
+    pipeline.executar(PARAMETROS, 'features', str(tmp_path))
+    assert etapas_executadas(caplog) == []
+
+    # Alterar o código de um auxiliar executa novamente somente as etapas que o usam
+    fonte = inspect.getsource
+    monkeypatch.setattr(pipeline.inspect, 'getsource',
+                        lambda objeto: fonte(objeto) + ('# alterado' if objeto is pipeline.features else ''))
+    caplog.clear()
+    pipeline.executar(PARAMETROS, 'features', str(tmp_path))
+    assert etapas_executadas(caplog) == ['features']
+
+    # Alterar um parâmetro executa novamente a etapa e as seguintes
+    caplog.clear()
+    pipeline.executar(dict(PARAMETROS, limpar = {'sem_iqr': pipeline.COLUNAS_SEM_IQR + ['T1']}), 'features', str(tmp_path))
+    assert etapas_executadas(caplog) == ['limpar', 'escalar', 'features']
+
+    # Sem o cache todas as etapas são executadas
+    caplog.clear()
+    pipeline.executar(PARAMETROS, 'features', str(tmp_path), usar_cache = False)
+    assert etapas_executadas(caplog) == ['carregar', 'limpar', 'escalar', 'features']
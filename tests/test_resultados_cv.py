@@ -0,0 +1,49 @@
+# Testes do reaproveitamento dos resultados da validação cruzada na grade do CatBoost
+
+# Importar bibliotecas
+import glob
+import logging
+import os
+import re
+import pytest
+from treinamento import agendador, pipeline
+
+# Grade pequena sem calibração dos núcleos, com o mesmo arquivo no treino e no teste
+PARAMETROS = {'carregar': {'treino': os.path.join(pipeline.RAIZ, 'data', 'testing.csv'),
+                           'teste': os.path.join(pipeline.RAIZ, 'data', 'testing.csv')},
+              'tunar': {'grade': {'iterations': [20], 'depth': [2, 3]}, 'cv': 2, 'n_jobs': 1}}
+
+def lidos(caplog):
+    return [int(re.search(r'(\d+) lidos', registro.getMessage()).group(1))
+            for registro in caplog.records if 'lidos dos resultados salvos' in registro.getMessage()]
+
+def test_resultados_no_diretorio_do_cache_e_ignorados_sem_cache(tmp_path, caplog, monkeypatch):
+    caplog.set_level(logging.INFO)
+    padrao = os.path.join(pipeline.RAIZ, 'treinamento', 'cache', pipeline.ARQUIVO_RESULTADOS_CV)
+    modificacao = os.path.getmtime(padrao) if os.path.exists(padrao) else None
+
+    pipeline.executar(PARAMETROS, 'tunar', str(tmp_path))
+    assert os.path.exists(tmp_path / pipeline.ARQUIVO_RESULTADOS_CV)
+    assert (os.path.getmtime(padrao) if os.path.exists(padrao) else None) == modificacao
+
+    # Com a etapa fora do cache, os pontos são lidos dos resultados salvos sem criar o agendador
+    for arquivo in glob.glob(str(tmp_path / 'tunar-*.pkl')):
+        os.remove(arquivo)
+    monkeypatch.setattr(agendador, 'criar', lambda *args, **kwargs: pytest.fail('agendador criado com a grade no cache'))
+    caplog.clear()
+    resultado = pipeline.executar(PARAMETROS, 'tunar', str(tmp_path))['tunar'][1]
+    assert lidos(caplog) == [2]
+    assert 'agendador' not in resultado
+    assert set(resultado['resultados']['origem']) == {'cache'}
+
+    # Sem o cache os resultados salvos não são lidos
+    monkeypatch.undo()
+    caplog.clear()
+    pipeline.executar(PARAMETROS, 'tunar', str(tmp_path), usar_cache = False)
+    assert lidos(caplog) == [0]
+
+def test_grade_sem_pontos_validos_gera_erro(tmp_path):
+    parametros = dict(PARAMETROS, tunar = dict(PARAMETROS['tunar'], grade = {'iterations': [20], 'depth': [20]}))
+
+    with pytest.raises(ValueError, match = 'Nenhum ponto da grade'):
+        pipeline.executar(parametros, 'tunar', str(tmp_path), usar_cache = False)
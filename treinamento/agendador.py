@@ -0,0 +1,115 @@
+# Divisão dos núcleos da maquina entre tarefas simultâneas (folds/configurações) e threads de cada modelo do CatBoost
+#
+# Com n_jobs = -1 no GridSearchCV e o CatBoost usando todos os núcleos em cada modelo, a maquina executa N x N threads
+# disputando os mesmos núcleos. O agendador mantém tarefas x threads <= núcleos e escolhe a divisão por uma calibração rápida.
+
+# Importar bibliotecas
+import contextlib
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from catboost import CatBoostRegressor
+
+# Função para contar os núcleos disponiveis para o processo
+def nucleos():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+# Função para listar as divisões (tarefas simultâneas, threads por modelo) que usam todos os núcleos sem ultrapassá-los
+def divisoes(total_nucleos, max_tarefas = None):
+    max_tarefas = min(total_nucleos, max_tarefas or total_nucleos)
+
+    # Para cada quantidade de threads fica a maior quantidade de tarefas
+    return [(tarefas, total_nucleos // tarefas) for tarefas in range(1, max_tarefas + 1)
+            if tarefas == max_tarefas or total_nucleos // tarefas != total_nucleos // (tarefas + 1)]
+
+class Agendador():
+    # Executa as tarefas em paralelo com a divisão escolhida, medindo o tempo e o uso de CPU
+    def __init__(self, tarefas = 1, threads = None):
+        self.tarefas = tarefas
+        self.threads = threads or max(1, nucleos() // tarefas)
+        self.tempo = 0.0
+        self.tempo_cpu = 0.0
+        self.execucoes = 0
+
+    # As funções recebem o thread_count do CatBoost como primeiro argumento. O CatBoost libera o GIL durante o
+    # treino, então threads do Python são suficientes para executar os modelos em paralelo
+    def map(self, funcao, itens):
+        itens = list(itens)
+
+        with self.medir(len(itens)):
+            if self.tarefas == 1 or len(itens) <= 1:
+                return [funcao(self.threads, item) for item in itens]
+
+            with ThreadPoolExecutor(max_workers = self.tarefas) as executor:
+                return list(executor.map(lambda item: funcao(self.threads, item), itens))
+
+    # Mede um trecho que paraleliza por conta própria (ex.: GridSearchCV com o backend de threads do joblib)
+    @contextlib.contextmanager
+    def medir(self, execucoes = 1):
+        inicio, inicio_cpu = time.perf_counter(), time.process_time()
+
+        try:
+            yield self
+        finally:
+            self.tempo += time.perf_counter() - inicio
+            self.tempo_cpu += time.process_time() - inicio_cpu
+            self.execucoes += execucoes
+
+    def relatorio(self):
+        total_nucleos = nucleos()
+
+        return {'nucleos': total_nucleos,
+                'tarefas': self.tarefas,
+                'threads': self.threads,
+                'execucoes': self.execucoes,
+                'tempo': self.tempo,
+                'tempo_cpu': self.tempo_cpu,
+                'utilizacao': self.tempo_cpu / (self.tempo * total_nucleos) if self.tempo > 0 else 0.0}
+
+# Função para escolher a divisão com maior vazão (modelos por segundo), treinando modelos curtos com cada divisão
+def calibrar(X, y, parametros, max_tarefas = None, iteracoes = 30, amostras = 20000, seed = 194):
+    X = np.asarray(X)[:amostras]
+    y = np.asarray(y)[:amostras]
+    total_nucleos = nucleos()
+
+    def treinar(threads, _):
+        modelo = CatBoostRegressor(**dict(parametros, iterations = iteracoes, thread_count = threads,
+                                          random_seed = seed, verbose = False, allow_writing_files = False))
+        modelo.fit(X, y)
+
+    candidatas = divisoes(total_nucleos, max_tarefas)
+    medicoes = []
+
+    for tarefas, threads in candidatas:
+        agendador = Agendador(tarefas, threads)
+        agendador.map(treinar, range(tarefas))
+
+        relatorio = agendador.relatorio()
+        medicoes.append({'tarefas': tarefas, 'threads': threads, 'vazao': tarefas / relatorio['tempo'],
+                         'utilizacao': relatorio['utilizacao']})
+
+    melhor = max(medicoes, key = lambda medicao: medicao['vazao'])
+    logging.info('Calibração (%d núcleos): %s -> %d tarefas x %d threads', total_nucleos,
+                 ', '.join('{}x{}: {:.2f} modelos/s'.format(medicao['tarefas'], medicao['threads'], medicao['vazao']) for medicao in medicoes),
+                 melhor['tarefas'], melhor['threads'])
+
+    return Agendador(melhor['tarefas'], melhor['threads']), medicoes
+
+# Função para montar o agendador a partir dos parâmetros: n_jobs fixo, divisão informada ou calibração
+def criar(X, y, parametros_modelo, n_jobs = None, tarefas = None, threads = None, calibracao = True, max_tarefas = None):
+    if n_jobs is not None:
+        tarefas = nucleos() if n_jobs < 0 else min(n_jobs, nucleos())
+        return Agendador(tarefas, max(1, nucleos() // tarefas)), []
+
+    if tarefas is not None:
+        return Agendador(tarefas, threads), []
+
+    if calibracao and nucleos() > 1:
+        return calibrar(X, y, parametros_modelo, max_tarefas)
+
+    return Agendador(1, nucleos()), []
@@ -0,0 +1,18 @@
+# Gravação de arquivos em um arquivo temporario substituido ao final, para não deixar um arquivo incompleto ou corrompido
+
+# Importar bibliotecas
+import contextlib
+import os
+
+# Context manager que retorna o caminho temporario onde o arquivo deve ser gravado. Ao final o temporario substitui o
+# arquivo, e em caso de erro é removido. O sufixo deve manter a extensão exigida pelo gravador (ex.: '.tmp.npy' no np.save)
+@contextlib.contextmanager
+def gravar_atomico(caminho, sufixo = '.tmp'):
+    temporario = os.fspath(caminho) + sufixo
+
+    try:
+        yield temporario
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
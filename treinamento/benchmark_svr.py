@@ -0,0 +1,97 @@
+# Compara o tempo de treino e o RMSE do SVR exato com o SVR de kernel aproximado para tamanhos crescentes de treino
+#
+# O dataset possui cerca de 20 mil linhas, os tamanhos maiores são gerados por reamostragem das linhas de treino com um
+# ruido pequeno nas variaveis. O teste é sempre a separação de teste real do pipeline.
+#
+# Uso: python -m treinamento.benchmark_svr [--tamanhos 10000 100000 1000000] [--componentes 300 2000] [--limite-exato 10000]
+
+# Importar bibliotecas
+import argparse
+import json
+import logging
+import time
+import numpy as np
+import pandas as pd
+from sklearn.svm import SVR
+from sklearn.metrics import mean_squared_error, r2_score
+from treinamento import pipeline
+from treinamento.svr_aproximado import SVRAproximado
+
+# Parâmetros do SVR final do notebook
+PARAMETROS_SVR = {'kernel': 'rbf', 'C': 10000, 'gamma': 0.5}
+
+# Função para gerar n linhas de treino por reamostragem, com ruido de 'ruido' desvios padrão em cada variavel
+def ampliar(X, y, n, ruido = 0.05, seed = pipeline.seed_):
+    rng = np.random.default_rng(seed)
+    indices = rng.integers(0, len(X), n)
+
+    X_ampliado = X[indices] + rng.standard_normal((n, X.shape[1])) * (ruido * X.std(axis = 0))
+
+    return X_ampliado, y[indices]
+
+# Função para treinar e avaliar um modelo
+def medir(nome, modelo, x_train, y_train, x_test, y_test):
+    inicio = time.perf_counter()
+    modelo.fit(x_train, y_train)
+    tempo = time.perf_counter() - inicio
+
+    y_pred = modelo.predict(x_test)
+
+    return {'modelo': nome, 'tempo_fit': tempo, 'rmse': float(np.sqrt(mean_squared_error(y_test, y_pred))), 'r2': r2_score(y_test, y_pred)}
+
+#  Executa o programa
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Benchmark do SVR exato contra o SVR de kernel aproximado')
+    parser.add_argument('--parametros', help = 'Arquivo JSON com os parâmetros do pipeline (ex.: caminho dos dados)')
+    parser.add_argument('--cache', help = 'Diretório do cache das etapas do pipeline')
+    parser.add_argument('--tamanhos', type = int, nargs = '*', default = [10000, 100000, 1000000])
+    parser.add_argument('--componentes', type = int, nargs = '*', default = [300, 2000])
+    parser.add_argument('--limite-exato', type = int, default = 10000, help = 'Maior tamanho de treino do SVR exato')
+    parser.add_argument('--limite-linear-svr', type = int, default = 100000, help = 'Maior tamanho de treino do regressor LinearSVR (em memória)')
+    parser.add_argument('--saida', help = 'Arquivo CSV com os resultados')
+    args = parser.parse_args()
+
+    logging.basicConfig(level = logging.INFO, format = '%(asctime)s %(message)s')
+
+    parametros = {}
+    if args.parametros:
+        with open(args.parametros) as f:
+            parametros = json.load(f)
+
+    # Mesmas variaveis e separação em treino e teste do pipeline
+    resultados_pipeline = pipeline.executar(parametros, 'selecionar', args.cache)
+    parametros_tunar = pipeline.mesclar(pipeline.PARAMETROS_PADRAO, parametros)['tunar']
+    x_train, x_test, y_train, y_test = pipeline.separar(resultados_pipeline['selecionar'][1], parametros_tunar)
+
+    x_train, x_test = x_train.to_numpy(dtype = np.float64), x_test.to_numpy(dtype = np.float64)
+
+    resultados = []
+    for tamanho in args.tamanhos:
+        x_amostra, y_amostra = ampliar(x_train, y_train, tamanho)
+
+        modelos = []
+        if tamanho <= args.limite_exato:
+            modelos.append(('SVR exato', SVR(cache_size = 1000, **PARAMETROS_SVR)))
+
+        for componentes in args.componentes:
+            for metodo in ['nystroem', 'rff']:
+                modelos.append(('{} {} ridge'.format(metodo, componentes),
+                                SVRAproximado(metodo, componentes, PARAMETROS_SVR['gamma'], PARAMETROS_SVR['C'], regressor = 'ridge')))
+
+                if tamanho <= args.limite_linear_svr:
+                    modelos.append(('{} {} LinearSVR'.format(metodo, componentes),
+                                    SVRAproximado(metodo, componentes, PARAMETROS_SVR['gamma'], PARAMETROS_SVR['C'], regressor = 'svr')))
+
+        for nome, modelo in modelos:
+            resultado = dict(medir(nome, modelo, x_amostra, y_amostra, x_test, y_test), tamanho = tamanho)
+            logging.info('%d linhas, %s: %.1f s, RMSE %.3f', tamanho, nome, resultado['tempo_fit'], resultado['rmse'])
+            resultados.append(resultado)
+
+        if tamanho > args.limite_exato:
+            logging.info('%d linhas, SVR exato: não executado (acima de --limite-exato)', tamanho)
+
+    tabela = pd.DataFrame(resultados)[['tamanho', 'modelo', 'tempo_fit', 'rmse', 'r2']]
+    print(tabela.to_string(index = False))
+
+    if args.saida:
+        tabela.to_csv(args.saida, index = False)
@@ -0,0 +1,53 @@
+# Variaveis de calendário (feriado, final de semana, dia da semana, mês e dia) a partir de uma tabela indexada por data
+
+# Importar bibliotecas
+import functools
+import holidays
+import numpy as np
+import pandas as pd
+
+# País da residência onde os dados foram coletados
+PAIS = 'BE'
+
+COLUNAS = ['Holiday', 'Weekend', 'Day_of_week', 'Month', 'Day']
+
+# Função para gerar a tabela de calendário de todos os dias dos anos informados (mantida em memória)
+@functools.lru_cache(maxsize = 32)
+def tabela_calendario(ano_inicial, ano_final, pais = PAIS):
+    datas = pd.date_range('{}-01-01'.format(ano_inicial), '{}-12-31'.format(ano_final), freq = 'D', name = 'data')
+    feriados = pd.to_datetime(list(holidays.country_holidays(pais, years = range(ano_inicial, ano_final + 1)).keys()))
+
+    # Dia de semana = 0, final de semana = 1
+    tabela = pd.DataFrame({'Holiday': datas.isin(feriados).astype(np.int64),
+                           'Weekend': (datas.dayofweek >= 5).astype(np.int64),
+                           'Day_of_week': datas.dayofweek.astype(np.int64),
+                           'Month': datas.month.astype(np.int64),
+                           'Day': datas.day.astype(np.int64)},
+                          index = datas)
+
+    return tabela
+
+# Função para adicionar as variaveis de calendário aos dados, pela data de cada linha
+def adicionar_calendario(data, coluna_data, colunas = COLUNAS, pais = PAIS):
+    dias = pd.to_datetime(data[coluna_data]).to_numpy().astype('datetime64[D]')
+
+    if len(dias) == 0:
+        for coluna in colunas:
+            data[coluna] = pd.Series(dtype = np.int64)
+        return data
+
+    tabela = tabela_calendario(pd.Timestamp(dias.min()).year, pd.Timestamp(dias.max()).year, pais)
+
+    # Junção vetorizada: a posição de cada dia na tabela é a distância em dias até o primeiro dia da tabela
+    posicoes = (dias - tabela.index[0].to_datetime64().astype('datetime64[D]')).astype(np.int64)
+    for coluna in colunas:
+        data[coluna] = tabela[coluna].to_numpy()[posicoes]
+
+    return data
+
+# Função para capturar as variaveis de calendário de uma única data
+def variaveis_data(data, formato = '%d/%m/%Y', pais = PAIS):
+    dia = pd.to_datetime(data, format = formato).normalize()
+    tabela = tabela_calendario(dia.year, dia.year, pais)
+
+    return {coluna: int(valor) for coluna, valor in tabela.loc[dia].items()}
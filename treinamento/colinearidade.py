@@ -0,0 +1,67 @@
+# VIF de todas as variaveis em uma única inversão de matriz e remoção iterativa da multicolinearidade
+#
+# O VIF de cada variavel é o elemento da diagonal da inversa da matriz de correlação (VIF_i = [R^-1]_ii), sem uma regressão
+# por coluna. Ao remover uma variavel a inversa da matriz restante é atualizada pelo complemento de Schur em O(p²):
+# P' = P[-k, -k] - P[-k, k] P[k, -k] / P[k, k].
+#
+# Com centralizar = False a matriz é a de cossenos (X'X normalizada pela diagonal), que reproduz o variance_inflation_factor
+# do statsmodels aplicado sem a constante, como no notebook.
+
+# Importar bibliotecas
+import numpy as np
+import pandas as pd
+
+# Função para calcular a matriz de correlação (centralizar = True) ou de cossenos das colunas (centralizar = False)
+def matriz_correlacao(X, centralizar = True):
+    valores = pd.DataFrame(X).to_numpy(dtype = np.float64)
+
+    if centralizar:
+        valores = valores - valores.mean(axis = 0)
+
+    normas = np.sqrt(np.einsum('ij,ij->j', valores, valores))
+    constantes = [coluna for coluna, norma in zip(pd.DataFrame(X).columns, normas) if norma == 0]
+    if len(constantes) > 0:
+        raise ValueError('Variaveis constantes não possuem VIF: {}'.format(constantes))
+
+    valores = valores / normas
+
+    return valores.T @ valores
+
+# Função para inverter a matriz de correlação, usando a pseudo-inversa quando ela for singular
+def _inverter(correlacao):
+    try:
+        return np.linalg.inv(correlacao)
+    except np.linalg.LinAlgError:
+        return np.linalg.pinv(correlacao, hermitian = True)
+
+# Função para calcular o VIF de todas as variaveis, no mesmo formato do calcular_VIF do notebook
+def calcular_vif(X, centralizar = True):
+    X = pd.DataFrame(X)
+    inversa = _inverter(matriz_correlacao(X, centralizar))
+
+    return pd.DataFrame({'Features': X.columns, 'VIF': np.diag(inversa)})
+
+# Função para remover a variavel de maior VIF até que todas fiquem com VIF <= limite. Variaveis em 'manter' não são
+# removidas. Retorna as variaveis mantidas e o histórico das remoções (ordem, variavel e VIF no momento da remoção)
+def remover_colinearidade(X, limite = 10.0, centralizar = True, manter = ()):
+    X = pd.DataFrame(X)
+    colunas = list(X.columns)
+    inversa = _inverter(matriz_correlacao(X, centralizar))
+    historico = []
+
+    while len(colunas) > 1:
+        vif = np.diag(inversa).copy()
+        vif[[coluna in manter for coluna in colunas]] = -np.inf
+
+        k = int(np.argmax(vif))
+        if vif[k] <= limite:
+            break
+
+        historico.append({'ordem': len(historico) + 1, 'Features': colunas[k], 'VIF': float(vif[k])})
+
+        # Inversa da matriz sem a variavel k (complemento de Schur)
+        restantes = np.arange(len(colunas)) != k
+        inversa = inversa[np.ix_(restantes, restantes)] - np.outer(inversa[restantes, k], inversa[k, restantes]) / inversa[k, k]
+        colunas.pop(k)
+
+    return colunas, pd.DataFrame(historico, columns = ['ordem', 'Features', 'VIF'])
@@ -0,0 +1,95 @@
+# Valores SHAP com fundo resumido por k-means, lotes em paralelo e cache em disco
+#
+# Modelos CatBoost usam o SHAP nativo (get_feature_importance com type = 'ShapValues'), calculado em uma única chamada.
+# Os demais modelos usam o KernelExplainer com o fundo resumido em k centroides (no lugar de todo o treino), explicando
+# lotes de linhas em processos separados. As matrizes ficam salvas em .npy, identificadas pelo hash do modelo e dos dados.
+
+# Importar bibliotecas
+import hashlib
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import shap
+from catboost import CatBoost, Pool
+from treinamento.arquivos import gravar_atomico
+from treinamento.resultados_cv import hash_dados
+
+DIRETORIO_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'shap')
+
+# Função para calcular o hash do modelo serializado
+def hash_modelo(modelo):
+    return hashlib.sha256(pickle.dumps(modelo, protocol = 4)).hexdigest()
+
+# Função para resumir o fundo em k centroides ponderados pelo tamanho de cada grupo
+def resumir_fundo(X, k = 50):
+    X = pd.DataFrame(X)
+
+    if len(X) <= k:
+        return X.to_numpy(dtype = np.float64)
+
+    return shap.kmeans(X.to_numpy(dtype = np.float64), k)
+
+# Explainer de cada processo, criado uma vez no inicio do processo
+_explainer = None
+
+def _iniciar_processo(funcao, fundo):
+    global _explainer
+    _explainer = shap.KernelExplainer(funcao, fundo)
+
+def _explicar_lote(lote):
+    return _explainer.shap_values(lote, silent = True)
+
+# Função para calcular os valores SHAP com o KernelExplainer, em lotes distribuidos entre os processos
+def _kernel_shap(modelo, X, fundo, lote, processos):
+    funcao = modelo.predict
+    esperado = float(shap.KernelExplainer(funcao, fundo).expected_value)
+    lotes = [X[inicio:inicio + lote] for inicio in range(0, len(X), lote)]
+
+    if processos == 1 or len(lotes) == 1:
+        _iniciar_processo(funcao, fundo)
+        valores = [_explicar_lote(parte) for parte in lotes]
+    else:
+        with ProcessPoolExecutor(max_workers = processos, initializer = _iniciar_processo, initargs = (funcao, fundo)) as executor:
+            valores = list(executor.map(_explicar_lote, lotes))
+
+    return np.vstack(valores), esperado
+
+# Função para calcular os valores SHAP (n x variaveis) e o valor esperado do modelo, lendo do cache quando existir
+def valores_shap(modelo, X, fundo = None, k = 50, lote = 100, processos = None, diretorio = DIRETORIO_CACHE, usar_cache = True):
+    X = pd.DataFrame(X)
+    nativo = isinstance(modelo, CatBoost)
+
+    # O fundo só altera o resultado do KernelExplainer
+    sha = hashlib.sha256('{}|{}|{}'.format(hash_modelo(modelo), hash_dados(X, []), 'nativo' if nativo else k).encode())
+    if not nativo and fundo is not None:
+        sha.update(hash_dados(pd.DataFrame(fundo), []).encode())
+    caminho = os.path.join(diretorio, '{}.npy'.format(sha.hexdigest()[:32]))
+
+    # Matriz salva com o valor esperado na última coluna (mesmo formato do ShapValues do CatBoost)
+    if usar_cache and os.path.exists(caminho):
+        matriz = np.load(caminho)
+        return matriz[:, :-1], float(matriz[0, -1]) if len(matriz) > 0 else None
+
+    if nativo:
+        matriz = modelo.get_feature_importance(Pool(X), type = 'ShapValues')
+    else:
+        fundo_resumido = resumir_fundo(fundo if fundo is not None else X, k)
+        valores, esperado = _kernel_shap(modelo, X.to_numpy(dtype = np.float64), fundo_resumido, lote, processos or os.cpu_count())
+        matriz = np.hstack([valores, np.full((len(valores), 1), esperado)])
+
+    if usar_cache:
+        os.makedirs(diretorio, exist_ok = True)
+        with gravar_atomico(caminho, '.tmp.npy') as temporario:
+            np.save(temporario, matriz)
+
+    return matriz[:, :-1], float(matriz[0, -1]) if len(matriz) > 0 else None
+
+# Função para montar o objeto Explanation do shap, usado pelos gráficos (waterfall, force, summary)
+def explicar(modelo, X, fundo = None, **parametros):
+    X = pd.DataFrame(X)
+    valores, esperado = valores_shap(modelo, X, fundo, **parametros)
+
+    return shap.Explanation(values = valores, base_values = np.full(len(valores), esperado), data = X.to_numpy(),
+                            feature_names = list(X.columns))
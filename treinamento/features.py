@@ -0,0 +1,215 @@
+# Variaveis temporais (defasagens, estatisticas móveis e acumuladas) calculadas em O(n) com somas e extremos acumulados do NumPy
+#
+# As janelas são contadas em observações (10 minutos cada no dataset) e terminam na observação atual.
+# Os dados devem estar ordenados pela data e não possuir valores faltantes.
+
+# Importar bibliotecas
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# Função para defasar a série em k observações
+def lag(x, k):
+    x = np.asarray(x, dtype = np.float64)
+
+    if k == 0:
+        return x
+
+    saida = np.empty(len(x))
+    saida[:min(k, len(x))] = np.nan
+    if k < len(x):
+        saida[k:] = x[:len(x) - k]
+
+    return saida
+
+# Função para calcular as somas acumuladas (com zero inicial) dos valores centralizados e de seus quadrados,
+# a centralização evita a perda de precisão da variância. O resultado pode ser reaproveitado entre as janelas
+def acumulados(x):
+    x = np.asarray(x, dtype = np.float64)
+    media = x.mean() if len(x) > 0 else 0.0
+    centrado = x - media
+
+    soma = np.zeros(len(x) + 1)
+    soma_quadrados = np.zeros(len(x) + 1)
+    np.cumsum(centrado, out = soma[1:])
+    np.cumsum(centrado * centrado, out = soma_quadrados[1:])
+
+    return media, soma, soma_quadrados
+
+# Média móvel
+def media_movel(x, janela, acumulado = None):
+    media, soma, _ = acumulado if acumulado is not None else acumulados(x)
+    saida = np.full(len(soma) - 1, np.nan)
+
+    if janela <= len(saida):
+        saida[janela - 1:] = (soma[janela:] - soma[:-janela]) / janela + media
+
+    return saida
+
+# Desvio padrão móvel (amostral)
+def desvio_movel(x, janela, ddof = 1, acumulado = None):
+    _, soma, soma_quadrados = acumulado if acumulado is not None else acumulados(x)
+    saida = np.full(len(soma) - 1, np.nan)
+
+    if janela <= len(saida) and janela > ddof:
+        s1 = soma[janela:] - soma[:-janela]
+        s2 = soma_quadrados[janela:] - soma_quadrados[:-janela]
+
+        variancia = np.maximum((s2 - s1 * s1 / janela) / (janela - ddof), 0)
+        np.sqrt(variancia, out = saida[janela - 1:])
+
+    return saida
+
+# Extremo móvel em O(n) (van Herk/Gil-Werman): acumulados do inicio e do fim de blocos do tamanho da janela
+def _extremo_movel(x, janela, acumular, neutro):
+    x = np.asarray(x, dtype = np.float64)
+    saida = np.full(len(x), np.nan)
+
+    if janela <= len(x):
+        blocos = -(-len(x) // janela)
+        completo = np.full(blocos * janela, neutro)
+        completo[:len(x)] = x
+
+        # Blocos nas colunas, para acumular ao longo do eixo 0 (vetorizado entre os blocos)
+        completo = np.ascontiguousarray(completo.reshape(blocos, janela).T)
+        prefixo = acumular.accumulate(completo, axis = 0).T.ravel()
+        sufixo = acumular.accumulate(completo[::-1], axis = 0)[::-1].T.ravel()
+
+        # A janela [i, i + janela - 1] cobre o fim de um bloco e o inicio do seguinte
+        acumular(sufixo[:len(x) - janela + 1], prefixo[janela - 1:len(x)], out = saida[janela - 1:])
+
+    return saida
+
+# Minimo móvel
+def minimo_movel(x, janela):
+    return _extremo_movel(x, janela, np.minimum, np.inf)
+
+# Maximo móvel
+def maximo_movel(x, janela):
+    return _extremo_movel(x, janela, np.maximum, -np.inf)
+
+# Média de todas as observações até a atual
+def media_expansiva(x, acumulado = None):
+    media, soma, _ = acumulado if acumulado is not None else acumulados(x)
+
+    return soma[1:] / np.arange(1, len(soma)) + media
+
+# Desvio padrão (amostral) de todas as observações até a atual
+def desvio_expansivo(x, ddof = 1, acumulado = None):
+    _, soma, soma_quadrados = acumulado if acumulado is not None else acumulados(x)
+    saida = np.full(len(soma) - 1, np.nan)
+
+    if len(saida) > ddof:
+        contagem = np.arange(ddof + 1, len(soma))
+        s1 = soma[ddof + 1:]
+        variancia = (soma_quadrados[ddof + 1:] - s1 * s1 / contagem) / (contagem - ddof)
+        np.sqrt(np.maximum(variancia, 0), out = saida[ddof:])
+
+    return saida
+
+# Função para calcular as variaveis de uma série, retorna um dicionario nome -> valores
+def variaveis_serie(x, nome, lags = (), janelas = (), expansivas = False, deslocamento = 0):
+    x = np.asarray(x, dtype = np.float64)
+    variaveis = {}
+
+    # Somas acumuladas calculadas uma vez para todas as janelas
+    acumulado = acumulados(x) if len(janelas) > 0 or expansivas else None
+
+    for k in lags:
+        variaveis['{}_lag{}'.format(nome, k)] = lag(x, k)
+
+    # Estatisticas da série deslocada são as estatisticas da série original deslocadas
+    for janela in janelas:
+        variaveis['{}_media{}'.format(nome, janela)] = lag(media_movel(x, janela, acumulado = acumulado), deslocamento)
+        variaveis['{}_desvio{}'.format(nome, janela)] = lag(desvio_movel(x, janela, acumulado = acumulado), deslocamento)
+        variaveis['{}_min{}'.format(nome, janela)] = lag(minimo_movel(x, janela), deslocamento)
+        variaveis['{}_max{}'.format(nome, janela)] = lag(maximo_movel(x, janela), deslocamento)
+
+    if expansivas:
+        variaveis['{}_media_exp'.format(nome)] = lag(media_expansiva(x, acumulado), deslocamento)
+        variaveis['{}_desvio_exp'.format(nome)] = lag(desvio_expansivo(x, acumulado = acumulado), deslocamento)
+
+    return variaveis
+
+# Função para gerar as variaveis temporais das colunas informadas, separadamente para cada grupo (casa)
+def gerar_features(dados, colunas, lags = (), janelas = (), expansivas = False, grupo = None, deslocamento = 0):
+    if grupo is None:
+        grupos = [np.arange(len(dados))]
+    else:
+        grupos = list(dados.groupby(grupo, sort = False).indices.values())
+
+    saida = {}
+    for coluna in colunas:
+        valores = dados[coluna].to_numpy(dtype = np.float64)
+
+        for indices in grupos:
+            for nome, resultado in variaveis_serie(valores[indices], coluna, lags, janelas, expansivas, deslocamento).items():
+                if nome not in saida:
+                    saida[nome] = np.full(len(dados), np.nan)
+                saida[nome][indices] = resultado
+
+    return pd.DataFrame(saida, index = dados.index)
+
+class JanelaStreaming():
+    # Mesmas variaveis do gerar_features, atualizadas a cada nova observação e guardando somente as ultimas W de cada casa
+    def __init__(self, colunas, lags = (), janelas = (), expansivas = False, deslocamento = 0):
+        self.colunas = list(colunas)
+        self.lags = list(lags)
+        self.janelas = list(janelas)
+        self.expansivas = expansivas
+        self.deslocamento = deslocamento
+        self.tamanho = max(self.lags + [janela + deslocamento for janela in self.janelas] + [deslocamento + 1])
+        self.historico = {}
+        self.acumulado = {}
+
+    def adicionar(self, casa, registro):
+        if casa not in self.historico:
+            self.historico[casa] = deque(maxlen = self.tamanho)
+            self.acumulado[casa] = {coluna: [0, 0.0, 0.0] for coluna in self.colunas}
+
+        historico = self.historico[casa]
+        historico.append([float(registro[coluna]) for coluna in self.colunas])
+
+        valores = np.array(historico)
+        n = len(valores)
+        variaveis = {}
+
+        for i, coluna in enumerate(self.colunas):
+            x = valores[:, i]
+
+            for k in self.lags:
+                variaveis['{}_lag{}'.format(coluna, k)] = x[n - 1 - k] if k < n else np.nan
+
+            # Janela terminando na observação deslocada
+            fim = n - self.deslocamento
+            for janela in self.janelas:
+                if fim >= janela:
+                    trecho = x[fim - janela:fim]
+                    variaveis['{}_media{}'.format(coluna, janela)] = trecho.mean()
+                    variaveis['{}_desvio{}'.format(coluna, janela)] = trecho.std(ddof = 1) if janela > 1 else np.nan
+                    variaveis['{}_min{}'.format(coluna, janela)] = trecho.min()
+                    variaveis['{}_max{}'.format(coluna, janela)] = trecho.max()
+                else:
+                    for estatistica in ['media', 'desvio', 'min', 'max']:
+                        variaveis['{}_{}{}'.format(coluna, estatistica, janela)] = np.nan
+
+            if self.expansivas:
+                variaveis.update(self._expansivas(casa, coluna, x, fim))
+
+        return variaveis
+
+    def _expansivas(self, casa, coluna, x, fim):
+        # Atualização de Welford com a observação que atingiu o deslocamento
+        acumulado = self.acumulado[casa][coluna]
+
+        if fim >= 1:
+            valor = x[fim - 1]
+            acumulado[0] += 1
+            delta = valor - acumulado[1]
+            acumulado[1] += delta / acumulado[0]
+            acumulado[2] += delta * (valor - acumulado[1])
+
+        n, media, m2 = acumulado
+
+        return {'{}_media_exp'.format(coluna): media if n > 0 else np.nan,
+                '{}_desvio_exp'.format(coluna): np.sqrt(m2 / (n - 1)) if n > 1 else np.nan}
@@ -0,0 +1,491 @@
+# Pipeline de treinamento do modelo de previsão de energia (versão executável do notebook IoT-Previsao-de-Uso-de-Energia)
+#
+# Etapas: carregar -> limpar -> escalar -> features -> selecionar -> quantizar -> tunar -> ajustar -> exportar
+#
+# Cada etapa salva o seu resultado em disco, identificado pelo hash do seu código, dos seus parâmetros e das
+# chaves das etapas anteriores. Alterar um parâmetro só executa novamente a etapa alterada e as seguintes.
+#
+# Uso: python -m treinamento.pipeline [--ate ETAPA] [--parametros arquivo.json] [--metodo halving] [--catboost depth=10 ...]
+
+# Importar bibliotecas
+import argparse
+import copy
+import hashlib
+import inspect
+import json
+import logging
+import os
+import pickle
+import time
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.feature_selection import SelectFromModel
+from sklearn.model_selection import train_test_split, KFold, ParameterGrid
+from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
+import catboost
+from catboost import CatBoostRegressor, CatBoostError
+from treinamento import preprocessamento, calendario, features, tuner, agendador, pool_quantizado
+from treinamento.arquivos import gravar_atomico
+from treinamento.resultados_cv import ResultadosCV, hash_dados
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+seed_ = 194
+
+# Variaveis escolhidas no notebook para o modelo final
+VARIAVEIS = ['T3', 'RH_3', 'T8', 'Press_mm_hg', 'NSM', 'Hour']
+
+# Colunas sem correção de outliers pelo IQR
+COLUNAS_SEM_IQR = ['lights', 'Weekend', 'Day_of_week', 'Month', 'Day', 'Hour']
+
+# Parâmetros fixos do CatBoost e grade do modelo final. Sem arquivos de treino do CatBoost, que seriam gravados em
+# catboost_info a cada ajuste (tuning, validação cruzada e modelo final)
+CATBOOST_BASE = {'loss_function': 'RMSE', 'eval_metric': 'RMSE', 'random_seed': seed_,
+                 'verbose': False, 'metric_period': 1, 'od_type': 'Iter', 'od_wait': 10, 'allow_writing_files': False}
+
+GRADE_CATBOOST = {'depth': [11],
+                  'langevin': [True],
+                  'diffusion_temperature': [10000],
+                  'learning_rate': [0.025],
+                  'grow_policy': ['Depthwise'],
+                  'iterations' : [5000],
+                  'score_function': ['Cosine'],
+                  'l2_leaf_reg': [2.5],
+                  'subsample': [0.8],
+                  'bootstrap_type': ['Bernoulli'],
+                  'random_strength': [1.0],
+                  'min_data_in_leaf': [1]}
+
+# Arquivo dos resultados de validação cruzada de todas as execuções (reaproveitados entre grades), no diretório do cache
+ARQUIVO_RESULTADOS_CV = 'resultados_cv.db'
+
+ETAPAS = ['carregar', 'limpar', 'escalar', 'features', 'selecionar', 'quantizar', 'tunar', 'ajustar', 'exportar']
+
+PARAMETROS_PADRAO = {'carregar': {'treino': os.path.join(RAIZ, 'data', 'training.csv'),
+                                  'teste': os.path.join(RAIZ, 'data', 'testing.csv')},
+                     'limpar': {'sem_iqr': COLUNAS_SEM_IQR},
+                     'escalar': {},
+                     'features': {'pais': calendario.PAIS,
+                                  'temporais': {'colunas': [], 'lags': [], 'janelas': [], 'expansivas': False, 'deslocamento': 0}},
+                     'selecionar': {'variaveis': VARIAVEIS, 'seletor_rf': False},
+                     'quantizar': pool_quantizado.QUANTIZACAO_PADRAO,
+                     'tunar': {'grade': GRADE_CATBOOST, 'base': CATBOOST_BASE, 'cv': 5, 'test_size': 0.3, 'seed': seed_, 'metodo': 'grade',
+                               # n_jobs fixo ou divisão dos núcleos entre tarefas e threads do CatBoost (calibrada quando não informada)
+                               'n_jobs': None, 'nucleos': {'tarefas': None, 'threads': None, 'calibrar': True},
+                               # True (arquivo no diretório do cache), False ou o caminho do arquivo de resultados da validação cruzada
+                               'cache_cv': True,
+                               'halving': {'espaco': None, 'configuracoes': 81, 'iteracoes_min': 100, 'iteracoes_max': 5000, 'eta': 3, 'chaves': None}},
+                     'ajustar': {},
+                     'exportar': {'diretorio': os.path.join(RAIZ, 'modelos')}}
+
+# ---------------------------------------------------------------------------------------------------------------
+# Cache das etapas
+
+# Função para calcular o hash do conteudo de um arquivo
+def hash_arquivo(caminho, bloco = 1 << 20):
+    sha = hashlib.sha256()
+
+    with open(caminho, 'rb') as f:
+        for parte in iter(lambda: f.read(bloco), b''):
+            sha.update(parte)
+
+    return sha.hexdigest()
+
+class CacheEtapas():
+    # Resultados das etapas salvos em disco, identificados pelo hash das entradas
+    def __init__(self, diretorio, ativo = True):
+        self.diretorio = diretorio
+        self.ativo = ativo
+
+        os.makedirs(diretorio, exist_ok = True)
+
+    # O código da etapa e o das funções e módulos auxiliares que ela chama fazem parte da chave
+    def chave(self, nome, funcao, parametros, dependencias, codigo = ()):
+        sha = hashlib.sha256()
+        sha.update(nome.encode())
+        sha.update(inspect.getsource(funcao).encode())
+
+        for objeto in codigo:
+            sha.update(inspect.getsource(objeto).encode())
+
+        sha.update(json.dumps(parametros, sort_keys = True, default = str).encode())
+
+        for dependencia in dependencias:
+            sha.update(dependencia.encode())
+
+        return sha.hexdigest()
+
+    def caminho(self, nome, chave):
+        return os.path.join(self.diretorio, '{}-{}.pkl'.format(nome, chave[:16]))
+
+    def executar(self, nome, funcao, parametros, dependencias, codigo = ()):
+        chave = self.chave(nome, funcao, parametros, [dependencia for dependencia, _ in dependencias], codigo)
+        caminho = self.caminho(nome, chave)
+
+        if self.ativo and os.path.exists(caminho):
+            logging.info('Etapa %s: resultado carregado do cache (%s)', nome, os.path.basename(caminho))
+
+            with open(caminho, 'rb') as f:
+                return chave, pickle.load(f)
+
+        inicio = time.perf_counter()
+        resultado = funcao(parametros, *[resultado for _, resultado in dependencias])
+        logging.info('Etapa %s: executada em %.1f s', nome, time.perf_counter() - inicio)
+
+        with gravar_atomico(caminho) as temporario, open(temporario, 'wb') as f:
+            pickle.dump(resultado, f, protocol = pickle.HIGHEST_PROTOCOL)
+
+        return chave, resultado
+
+# ---------------------------------------------------------------------------------------------------------------
+# Etapas
+
+# Carregamento do dataset de treino e teste
+def etapa_carregar(parametros):
+    dtTreino = pd.read_csv(parametros['treino'])
+    dtTeste = pd.read_csv(parametros['teste'])
+
+    return pd.concat([dtTreino, dtTeste], axis = 0).reset_index(drop = True)
+
+# Conversão dos tipos, colunas temporais e correção de outliers
+def etapa_limpar(parametros, dtFull):
+    dtProcessado = dtFull.copy()
+
+    # Convertendo a coluna 'date' para 'datetime'
+    dtProcessado['date'] = pd.to_datetime(dtProcessado['date'], format='%Y-%m-%d %H:%M:%S')
+
+    # Variaveis randomicas
+    dtProcessado = dtProcessado.drop(['rv1', 'rv2'], axis = 1)
+
+    # Dia de semana = 0, final de semana = 1, e colunas de Mês, Dia e Hora
+    dtProcessado = dtProcessado.rename(columns = {'WeekStatus': 'Weekend'})
+    dtProcessado = calendario.adicionar_calendario(dtProcessado, 'date', ['Weekend', 'Day_of_week', 'Month', 'Day'])
+    dtProcessado['Hour'] = dtProcessado['date'].dt.hour
+
+    datas = dtProcessado['date'].copy()
+    dtProcessado = dtProcessado.drop(['date'], axis = 1)
+
+    # Tratando outliers
+    colunas_iqr = [coluna for coluna in dtProcessado.columns if coluna not in parametros['sem_iqr']]
+    dtProcessado_IQR, limites = preprocessamento.aplicar_IQR(dtProcessado, colunas_iqr)
+
+    return {'dados': dtProcessado_IQR, 'datas': datas, 'limites': limites}
+
+# Normalização dos dados
+def etapa_escalar(parametros, limpo):
+    dtProcessado_IQR = limpo['dados']
+    quantitativas = [coluna for coluna in dtProcessado_IQR.columns if coluna not in ['Appliances', 'Weekend', 'Day_of_week', 'Month', 'Day', 'Hour']]
+
+    scaler = StandardScaler()
+    dtProcessado_IQR_normalizado = dtProcessado_IQR.copy()
+    dtProcessado_IQR_normalizado[quantitativas] = scaler.fit_transform(dtProcessado_IQR[quantitativas])
+
+    return {'dados': dtProcessado_IQR_normalizado, 'scaler': scaler}
+
+# Incremento nas features, feriados no periodo de coleta dos dados
+def etapa_features(parametros, escalado, limpo):
+    dtFeriados = calendario.adicionar_calendario(pd.DataFrame({'date': limpo['datas']}), 'date', ['Holiday'], parametros['pais'])
+
+    dtProcessado_incremento = escalado['dados'].copy()
+    dtProcessado_incremento['Holiday'] = dtFeriados['Holiday'].values
+
+    # Defasagens e estatisticas móveis, calculadas na ordem das datas (treino e teste são amostras da mesma série).
+    # Para a variavel alvo usar deslocamento >= 1, para que a observação atual não entre nas estatisticas
+    temporais = parametros['temporais']
+    if len(temporais['colunas']) > 0:
+        ordem = np.argsort(limpo['datas'].to_numpy(), kind = 'stable')
+        dtTemporais = features.gerar_features(dtProcessado_incremento.iloc[ordem], temporais['colunas'], temporais['lags'],
+                                              temporais['janelas'], temporais['expansivas'], deslocamento = temporais['deslocamento'])
+
+        for coluna in dtTemporais.columns:
+            valores = np.empty(len(ordem))
+            valores[ordem] = dtTemporais[coluna].to_numpy()
+            dtProcessado_incremento[coluna] = valores
+
+    # Removendo 'lights', que representa parte do próprio consumo
+    return dtProcessado_incremento.drop('lights', axis = 1)
+
+# Seleção das variaveis do modelo
+def etapa_selecionar(parametros, dtFinal):
+    X_fs = dtFinal.drop(['Appliances'], axis = 1)
+    y_fs = dtFinal['Appliances'].values
+
+    selecao = {'variaveis': list(parametros['variaveis'])}
+
+    # Seleção pelo Random Forest, usada no lugar das variaveis fixas quando solicitado
+    if parametros['seletor_rf']:
+        seleciona_fs = SelectFromModel(RandomForestRegressor(random_state = seed_))
+        seleciona_fs.fit(X_fs, y_fs)
+
+        selecao['variaveis_rf'] = list(X_fs.columns[seleciona_fs.get_support()])
+        selecao['variaveis'] = selecao['variaveis_rf']
+
+    selecao['X'] = X_fs[selecao['variaveis']]
+    selecao['y'] = y_fs
+
+    return selecao
+
+# Função para separar em treino e teste
+def separar(selecao, parametros):
+    return train_test_split(selecao['X'], selecao['y'], test_size = parametros['test_size'], random_state = parametros['seed'])
+
+# Quantização dos pools de treino e teste do CatBoost, uma única vez por versão dos dados (salvos no diretório do cache)
+def etapa_quantizar(parametros, selecao):
+    x_train, x_test, y_train, y_test = separar(selecao, parametros['separacao'])
+
+    return pool_quantizado.salvar_pools(x_train, y_train, x_test, y_test, parametros['diretorio'], parametros['quantizacao'])
+
+# Tuning dos hiperparametros do CatBoost com validação cruzada, pela grade ou por successive halving
+def etapa_tunar(parametros, selecao, pools):
+    x_train, x_test, y_train, y_test = separar(selecao, parametros)
+    grade = list(ParameterGrid(parametros['grade']))
+
+    # Divisão dos núcleos entre os modelos simultâneos e as threads de cada modelo, criada (e calibrada) somente quando
+    # algum modelo for treinado
+    halving = parametros['halving']
+    nucleos = parametros['nucleos']
+
+    def criar_agendador(max_tarefas):
+        return agendador.criar(x_train, y_train, dict(parametros['base'], **grade[0]), parametros['n_jobs'],
+                               nucleos['tarefas'], nucleos['threads'], nucleos['calibrar'], max_tarefas)
+
+    # No halving o espaço padrão é o das grades do notebook, e os pontos da grade são sempre avaliados com o orçamento máximo
+    if parametros['metodo'] == 'halving':
+        incluir = [{chave: valor for chave, valor in ponto.items() if chave != 'iterations'} for ponto in grade]
+        agendador_tunar, calibracao = criar_agendador(halving['configuracoes'] * parametros['cv'])
+
+        resultado = tuner.halving_sucessivo(x_train, y_train, parametros['base'], halving['espaco'], halving['configuracoes'], incluir,
+                                            halving['iteracoes_min'], halving['iteracoes_max'], halving['eta'], parametros['cv'],
+                                            parametros['seed'], halving['chaves'], agendador_tunar, pool_quantizado.carregar(pools['treino']))
+        resultado['agendador'] = dict(agendador_tunar.relatorio(), calibracao = calibracao)
+    else:
+        resultado = tunar_grade(parametros, x_train, y_train, grade, criar_agendador, pools)
+
+    return resultado
+
+# Função para avaliar os pontos da grade com validação cruzada sobre os folds do pool quantizado (folds do KFold, como no
+# GridSearchCV). Os pontos já avaliados com os mesmos dados, estimador, quantização e folds são lidos do arquivo de
+# resultados, e uma grade de um único ponto já avaliado não treina nenhum modelo
+def tunar_grade(parametros, x_train, y_train, grade, criar_agendador, pools):
+    scoring = 'neg_root_mean_squared_error'
+    avaliacoes = [None] * len(grade)
+    chaves = [None] * len(grade)
+
+    if parametros['cache_cv']:
+        resultados_cv = ResultadosCV(parametros['cache_cv'])
+        dados = hash_dados(x_train, y_train)
+        estimador = {'classe': 'CatBoostRegressor', 'versao': catboost.__version__, 'base': parametros['base']}
+        cv = {'tipo': 'KFold', 'n_splits': parametros['cv'], 'scoring': scoring, 'bordas': hash_arquivo(pools['bordas'])}
+
+        chaves = [resultados_cv.chave(dados, estimador, ponto, cv) for ponto in grade]
+        avaliacoes = [resultados_cv.obter(chave) for chave in chaves]
+
+    pendentes = [indice for indice, avaliacao in enumerate(avaliacoes) if avaliacao is None]
+    logging.info('Grade: %d pontos, %d lidos dos resultados salvos', len(grade), len(grade) - len(pendentes))
+
+    relatorio = None
+    if len(pendentes) > 0:
+        agendador_tunar, calibracao = criar_agendador(len(pendentes) * parametros['cv'])
+        pool = pool_quantizado.carregar(pools['treino'])
+        y_train = np.asarray(y_train, dtype = np.float64)
+        folds = [(pool.slice(treino), pool.slice(valid), y_train[valid]) for treino, valid in KFold(n_splits = parametros['cv']).split(y_train)]
+
+        # Combinações inválidas no CatBoost recebem score NaN, como no GridSearchCV
+        def avaliar(threads, item):
+            indice, (treino, valid, y_valid) = item
+            inicio = time.perf_counter()
+
+            try:
+                modelo = CatBoostRegressor(**dict(parametros['base'], **grade[indice], thread_count = threads))
+                modelo.fit(treino)
+            except CatBoostError as erro:
+                logging.info('Ponto %s descartado: %s', grade[indice], str(erro).splitlines()[0])
+                return np.nan, time.perf_counter() - inicio
+
+            return -float(np.sqrt(mean_squared_error(y_valid, modelo.predict(valid)))), time.perf_counter() - inicio
+
+        medicoes = agendador_tunar.map(avaliar, [(indice, fold) for indice in pendentes for fold in folds])
+
+        for posicao, indice in enumerate(pendentes):
+            medicoes_ponto = medicoes[posicao * len(folds):(posicao + 1) * len(folds)]
+            scores = [score for score, _ in medicoes_ponto]
+            tempo = sum(tempo for _, tempo in medicoes_ponto)
+            avaliacoes[indice] = {'score': float(np.mean(scores)), 'scores': scores, 'tempo': tempo, 'origem': 'cv'}
+
+            if parametros['cache_cv']:
+                resultados_cv.gravar(chaves[indice], dados, estimador, grade[indice], cv, scores, tempo)
+
+        relatorio = dict(agendador_tunar.relatorio(), calibracao = calibracao)
+
+    if parametros['cache_cv']:
+        resultados_cv.fechar()
+
+    tabela = pd.DataFrame({'params': grade,
+                           'mean_test_score': [np.nan if avaliacao['score'] is None else avaliacao['score'] for avaliacao in avaliacoes],
+                           'std_test_score': [float(np.std(avaliacao['scores'])) for avaliacao in avaliacoes],
+                           'tempo': [avaliacao['tempo'] for avaliacao in avaliacoes],
+                           'origem': [avaliacao.get('origem', 'cache') for avaliacao in avaliacoes]})
+    tabela['rank_test_score'] = tabela['mean_test_score'].rank(ascending = False, method = 'min')
+
+    if tabela['mean_test_score'].isna().all():
+        raise ValueError('Nenhum ponto da grade foi avaliado pelo CatBoost (todos os scores são NaN): {}'.format(grade))
+
+    melhor = int(np.nanargmax(tabela['mean_test_score'].to_numpy()))
+
+    resultado = {'melhores_parametros': grade[melhor], 'melhor_score': float(tabela['mean_test_score'][melhor]), 'resultados': tabela}
+
+    # Sem modelos treinados não há uso dos núcleos a informar
+    if relatorio is not None:
+        resultado['agendador'] = relatorio
+
+    return resultado
+
+# Função para calcular as metricas de regressão
+def metricas(y_teste, y_pred):
+    return {'r2': r2_score(y_teste, y_pred),
+            'mae': mean_absolute_error(y_teste, y_pred),
+            'mse': mean_squared_error(y_teste, y_pred),
+            'rmse': float(np.sqrt(mean_squared_error(y_teste, y_pred)))}
+
+# Treinamento do modelo final com os melhores hiperparametros
+def etapa_ajustar(parametros, tunado, selecao, pools):
+    x_train, x_test, y_train, y_test = separar(selecao, parametros['tunar'])
+    pool_treino = pool_quantizado.carregar(pools['treino'])
+
+    modelo = CatBoostRegressor(**parametros['tunar']['base'], **tunado['melhores_parametros'])
+    modelo.fit(pool_treino)
+
+    return {'modelo': modelo, 'metricas_teste': metricas(y_test, modelo.predict(pool_quantizado.carregar(pools['teste']))),
+            'metricas_treino': metricas(y_train, modelo.predict(pool_treino))}
+
+# Exportação do modelo, do scaler e dos limites do IQR
+def etapa_exportar(parametros, ajustado, escalado, limpo):
+    os.makedirs(parametros['diretorio'], exist_ok = True)
+
+    with open(os.path.join(parametros['diretorio'], 'modelo_final.pkl'), 'wb') as f:
+        pickle.dump(ajustado['modelo'], f)
+
+    with open(os.path.join(parametros['diretorio'], 'scaler.pkl'), 'wb') as f:
+        pickle.dump(escalado['scaler'], f)
+
+    preprocessamento.salvar_limites(limpo['limites'], parametros['diretorio'])
+
+    return parametros['diretorio']
+
+# ---------------------------------------------------------------------------------------------------------------
+# Execução
+
+# Funções e módulos auxiliares chamados por cada etapa, cujo código faz parte da chave do cache da etapa
+CODIGO_ETAPAS = {'limpar': [calendario, preprocessamento],
+                 'features': [calendario, features],
+                 'quantizar': [separar, pool_quantizado, hash_dados],
+                 'tunar': [separar, tunar_grade, tuner, agendador, pool_quantizado, ResultadosCV, hash_dados],
+                 'ajustar': [separar, metricas, pool_quantizado]}
+
+# Função para executar o pipeline até a etapa informada, retornando o resultado de cada etapa
+def executar(parametros = None, ate = 'exportar', diretorio_cache = None, usar_cache = True):
+    parametros = mesclar(PARAMETROS_PADRAO, parametros or {})
+    cache = CacheEtapas(diretorio_cache or os.path.join(RAIZ, 'treinamento', 'cache'), usar_cache)
+    resultados = {}
+
+    def etapa(nome, funcao, parametros_etapa, dependencias):
+        resultados[nome] = cache.executar(nome, funcao, parametros_etapa, dependencias, CODIGO_ETAPAS.get(nome, []))
+        return nome == ate
+
+    # O conteudo dos arquivos faz parte da chave da carga
+    parametros_carga = dict(parametros['carregar'], hashes = [hash_arquivo(parametros['carregar']['treino']), hash_arquivo(parametros['carregar']['teste'])])
+
+    if etapa('carregar', etapa_carregar, parametros_carga, []):
+        return resultados
+    if etapa('limpar', etapa_limpar, parametros['limpar'], [resultados['carregar']]):
+        return resultados
+    if etapa('escalar', etapa_escalar, parametros['escalar'], [resultados['limpar']]):
+        return resultados
+    if etapa('features', etapa_features, parametros['features'], [resultados['escalar'], resultados['limpar']]):
+        return resultados
+    if etapa('selecionar', etapa_selecionar, parametros['selecionar'], [resultados['features']]):
+        return resultados
+    # Pools salvos junto ao cache das etapas, com a mesma separação em treino e teste do tuning
+    separacao = {'test_size': parametros['tunar']['test_size'], 'seed': parametros['tunar']['seed']}
+    if etapa('quantizar', etapa_quantizar, {'quantizacao': parametros['quantizar'], 'separacao': separacao, 'diretorio': cache.diretorio},
+             [resultados['selecionar']]):
+        return resultados
+    # Os resultados da validação cruzada ficam no diretório do cache, e não são lidos nem gravados sem o cache
+    parametros_tunar = dict(parametros['tunar'])
+    if not usar_cache:
+        parametros_tunar['cache_cv'] = False
+    elif parametros_tunar['cache_cv'] is True:
+        parametros_tunar['cache_cv'] = os.path.join(cache.diretorio, ARQUIVO_RESULTADOS_CV)
+
+    if etapa('tunar', etapa_tunar, parametros_tunar, [resultados['selecionar'], resultados['quantizar']]):
+        return resultados
+    # O ajuste usa a mesma separação em treino e teste do tuning
+    if etapa('ajustar', etapa_ajustar, dict(parametros['ajustar'], tunar = parametros['tunar']), [resultados['tunar'], resultados['selecionar'], resultados['quantizar']]):
+        return resultados
+
+    # A exportação grava os arquivos finais e sempre é executada
+    resultados['exportar'] = (None, etapa_exportar(parametros['exportar'], resultados['ajustar'][1], resultados['escalar'][1], resultados['limpar'][1]))
+
+    return resultados
+
+# Função para mesclar os parâmetros informados sobre os padrões
+def mesclar(padrao, parametros):
+    mesclado = copy.deepcopy(padrao)
+
+    for nome, valores in parametros.items():
+        if isinstance(valores, dict) and isinstance(mesclado.get(nome), dict):
+            mesclado[nome] = mesclar(mesclado[nome], valores)
+        else:
+            mesclado[nome] = valores
+
+    return mesclado
+
+# Função para converter 'chave=valor' da linha de comando
+def parametro_cli(texto):
+    chave, valor = texto.split('=', 1)
+
+    try:
+        valor = json.loads(valor)
+    except ValueError:
+        pass
+
+    return chave, valor
+
+#  Executa o programa
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Pipeline de treinamento do modelo de previsão de energia')
+    parser.add_argument('--ate', choices = ETAPAS, default = 'exportar', help = 'Ultima etapa executada')
+    parser.add_argument('--parametros', help = 'Arquivo JSON com os parâmetros de cada etapa')
+    parser.add_argument('--metodo', choices = ['grade', 'halving'], help = 'Método de tuning do CatBoost')
+    parser.add_argument('--catboost', nargs = '*', default = [], metavar = 'CHAVE=VALOR', help = 'Valores da grade do CatBoost')
+    parser.add_argument('--cache', help = 'Diretório do cache das etapas')
+    parser.add_argument('--sem-cache', action = 'store_true', help = 'Executa todas as etapas novamente')
+    args = parser.parse_args()
+
+    logging.basicConfig(level = logging.INFO, format = '%(asctime)s %(message)s')
+
+    parametros = {}
+    if args.parametros:
+        with open(args.parametros) as f:
+            parametros = json.load(f)
+
+    # Cada valor informado substitui a lista da grade do parâmetro
+    for chave, valor in map(parametro_cli, args.catboost):
+        parametros.setdefault('tunar', {}).setdefault('grade', {})[chave] = valor if isinstance(valor, list) else [valor]
+
+    if args.metodo:
+        parametros.setdefault('tunar', {})['metodo'] = args.metodo
+
+    resultados = executar(parametros, args.ate, args.cache, not args.sem_cache)
+
+    if 'tunar' in resultados and 'relatorio' in resultados['tunar'][1]:
+        logging.info('Relatório do halving: %s', resultados['tunar'][1]['relatorio'])
+    if 'tunar' in resultados and 'agendador' in resultados['tunar'][1]:
+        logging.info('Uso dos núcleos no tuning: %s', resultados['tunar'][1]['agendador'])
+
+    if 'ajustar' in resultados:
+        ajustado = resultados['ajustar'][1]
+        logging.info('Metricas de teste: %s', ajustado['metricas_teste'])
+        logging.info('Metricas de treino: %s', ajustado['metricas_treino'])
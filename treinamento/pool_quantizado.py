@@ -0,0 +1,72 @@
+# Pools do CatBoost quantizados uma única vez por versão dos dados e salvos em disco
+#
+# Cada fit do CatBoost com dados em float calcula novamente as bordas e quantiza as variaveis. Os pools de treino e teste são
+# quantizados com as bordas do treino e salvos com o hash do conteudo no nome. Os experimentos, os folds da validação
+# cruzada (pool.slice) e o ajuste final carregam o mesmo arquivo.
+
+# Importar bibliotecas
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from catboost import Pool
+from treinamento.arquivos import gravar_atomico
+from treinamento.resultados_cv import hash_dados
+
+# Parâmetros de quantização (os mesmos padrões do CatBoost em CPU)
+QUANTIZACAO_PADRAO = {'border_count': 254, 'feature_border_type': 'GreedyLogSum'}
+
+# Função para calcular a chave do pool: conteudo dos dados e parâmetros de quantização
+def chave(X, y, quantizacao, bordas = None):
+    sha = hashlib.sha256()
+    sha.update(hash_dados(X, y).encode())
+    sha.update(json.dumps(quantizacao, sort_keys = True).encode())
+
+    if bordas is not None:
+        with open(bordas, 'rb') as f:
+            sha.update(f.read())
+
+    return sha.hexdigest()[:16]
+
+# Função para carregar um pool quantizado salvo
+def carregar(caminho):
+    if not os.path.exists(caminho):
+        raise FileNotFoundError('Pool quantizado não encontrado: {}'.format(caminho))
+
+    return Pool('quantized://' + caminho)
+
+# Função para quantizar e salvar um pool (somente se ainda não existir), retornando o caminho do arquivo.
+# Com 'bordas' o pool usa as bordas de outro pool (ex.: teste com as bordas do treino)
+def salvar(X, y, diretorio, nome, quantizacao = None, bordas = None):
+    quantizacao = quantizacao or QUANTIZACAO_PADRAO
+    caminho = os.path.join(diretorio, 'pool-{}-{}.bin'.format(nome, chave(X, y, quantizacao, bordas)))
+
+    if os.path.exists(caminho):
+        return caminho
+
+    os.makedirs(diretorio, exist_ok = True)
+
+    pool = Pool(pd.DataFrame(X), np.asarray(y, dtype = np.float64))
+    if bordas is None:
+        pool.quantize(**quantizacao)
+    else:
+        pool.quantize(input_borders = bordas)
+
+    with gravar_atomico(caminho) as temporario:
+        pool.save(temporario)
+
+    return caminho
+
+# Função para quantizar os pools de treino e teste, o teste com as bordas calculadas no treino
+def salvar_pools(x_train, y_train, x_test, y_test, diretorio, quantizacao = None):
+    treino = salvar(x_train, y_train, diretorio, 'treino', quantizacao)
+
+    bordas = treino[:-len('.bin')] + '.bordas.tsv'
+    if not os.path.exists(bordas):
+        with gravar_atomico(bordas) as temporario:
+            carregar(treino).save_quantization_borders(temporario)
+
+    teste = salvar(x_test, y_test, diretorio, 'teste', quantizacao, bordas)
+
+    return {'treino': treino, 'teste': teste, 'bordas': bordas}
@@ -0,0 +1,51 @@
+# Correção de outliers pelo IQR, com os limites calculados em uma única passagem e salvos para uso na previsão
+
+# Importar bibliotecas
+import os
+import pickle
+import numpy as np
+
+# Nome do arquivo dos limites, salvo junto ao scaler.pkl
+ARQUIVO_LIMITES = 'limites_iqr.pkl'
+
+# Função para calcular os limites inferior e superior do IQR de todas as colunas de uma vez
+def calcular_limites_IQR(data, columns, fator = 1.5):
+    valores = data[list(columns)].to_numpy(dtype = np.float64)
+
+    # Quantis de todas as colunas em uma única chamada
+    if np.isnan(valores).any():
+        Q1, Q3 = np.nanquantile(valores, [0.25, 0.75], axis = 0)
+    else:
+        Q1, Q3 = np.quantile(valores, [0.25, 0.75], axis = 0)
+
+    IQR = Q3 - Q1
+
+    return {'colunas': list(columns), 'inferior': Q1 - fator * IQR, 'superior': Q3 + fator * IQR}
+
+# Função para mover os valores fora dos limites para os limites (somente as colunas presentes nos dados)
+def aplicar_limites_IQR(data, limites, superior = True, inferior = True):
+    indices = [i for i, coluna in enumerate(limites['colunas']) if coluna in data.columns]
+    colunas = [limites['colunas'][i] for i in indices]
+
+    if len(colunas) == 0 or not (superior or inferior):
+        return data
+
+    minimo = np.asarray(limites['inferior'])[indices] if inferior else None
+    maximo = np.asarray(limites['superior'])[indices] if superior else None
+
+    data[colunas] = np.clip(data[colunas].to_numpy(dtype = np.float64), minimo, maximo)
+
+    return data
+
+# Função para calcular e aplicar o IQR, retornando os dados e os limites usados
+def aplicar_IQR(data, columns, superior = True, inferior = True):
+    limites = calcular_limites_IQR(data, columns)
+
+    return aplicar_limites_IQR(data, limites, superior, inferior), limites
+
+# Função para salvar os limites no diretório do scaler
+def salvar_limites(limites, diretorio):
+    with open(os.path.join(diretorio, ARQUIVO_LIMITES), 'wb') as f:
+        pickle.dump({'colunas': limites['colunas'],
+                     'inferior': [float(valor) for valor in limites['inferior']],
+                     'superior': [float(valor) for valor in limites['superior']]}, f)
@@ -0,0 +1,62 @@
+# Resultados da validação cruzada salvos em um arquivo SQLite local, identificados pelo hash dos dados, do estimador,
+# dos parâmetros e da validação cruzada. Pontos repetidos entre grades são lidos do arquivo e não treinados novamente.
+
+# Importar bibliotecas
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+
+# Parâmetros que não alteram o resultado do modelo e ficam fora da chave
+PARAMETROS_IGNORADOS = ['thread_count', 'verbose', 'allow_writing_files', 'train_dir']
+
+# Função para calcular o hash do conteudo dos dados de treino
+def hash_dados(X, y):
+    sha = hashlib.sha256()
+    sha.update(pd.util.hash_pandas_object(pd.DataFrame(X), index = False).to_numpy().tobytes())
+    sha.update(json.dumps(list(pd.DataFrame(X).columns), default = str).encode())
+    sha.update(np.ascontiguousarray(np.asarray(y, dtype = np.float64)).tobytes())
+
+    return sha.hexdigest()
+
+# Função para serializar em JSON com as chaves ordenadas
+def _json(valor):
+    return json.dumps(valor, sort_keys = True, default = str)
+
+class ResultadosCV():
+    # Arquivo de resultados, uma linha por avaliação (dados, estimador, parâmetros, validação cruzada)
+    def __init__(self, caminho):
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok = True)
+
+        self.con = sqlite3.connect(caminho, timeout = 30, isolation_level = None)
+        self.con.execute("PRAGMA journal_mode = WAL")
+        self.con.execute("CREATE TABLE IF NOT EXISTS resultados (chave TEXT PRIMARY KEY, dados TEXT, estimador TEXT, params TEXT, "
+                         "cv TEXT, score REAL, scores TEXT, tempo REAL, criado REAL)")
+
+    def chave(self, dados, estimador, params, cv):
+        params = {nome: valor for nome, valor in params.items() if nome not in PARAMETROS_IGNORADOS}
+
+        return hashlib.sha256(_json([dados, estimador, params, cv]).encode()).hexdigest()
+
+    # Retorna {'score', 'scores', 'tempo'} da avaliação ou None quando ainda não existe
+    def obter(self, chave):
+        linha = self.con.execute("SELECT score, scores, tempo FROM resultados WHERE chave = ?", (chave, )).fetchone()
+
+        if linha is None:
+            return None
+
+        return {'score': linha[0], 'scores': json.loads(linha[1]), 'tempo': linha[2]}
+
+    def gravar(self, chave, dados, estimador, params, cv, scores, tempo):
+        self.con.execute("INSERT OR REPLACE INTO resultados (chave, dados, estimador, params, cv, score, scores, tempo, criado) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (chave, dados, _json(estimador), _json(params), _json(cv), float(np.mean(scores)),
+                          _json([float(score) for score in scores]), tempo, time.time()))
+
+    def fechar(self):
+        self.con.close()
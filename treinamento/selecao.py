@@ -0,0 +1,167 @@
+# Seleção de variaveis com os metodos da seção 6 do notebook executados em paralelo sobre os mesmos folds
+#
+# X, y e o fold de cada linha são salvos uma vez em .npy e abertos por memmap em cada processo, sem serializar os dados
+# para cada tarefa. Cada tarefa é um par (seletor, fold). Cada seletor ordena as variaveis em cada fold, e o consenso é a
+# média das posições médias de cada seletor.
+#
+# - random_forest: importancia do RandomForestRegressor. As selecionadas são as de importancia >= média, o limite padrão do
+#   SelectFromModel, e assim o mesmo ajuste atende às seções 6.1 e 6.2
+# - lasso: |coeficientes| do LassoCV, selecionadas as de coeficiente diferente de zero
+# - rfe: RFE com LinearSVR, removendo 'step' variaveis por ajuste no lugar de uma
+#
+# Uso: python -m treinamento.selecao [--cv 5] [--processos N] [--saida ranking.csv]
+
+# Importar bibliotecas
+import argparse
+import json
+import logging
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.feature_selection import RFE
+from sklearn.linear_model import LassoCV
+from sklearn.model_selection import KFold
+from sklearn.svm import LinearSVR
+from treinamento import agendador
+from treinamento.arquivos import gravar_atomico
+from treinamento.resultados_cv import hash_dados
+
+DIRETORIO_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'selecao')
+
+# Parâmetros de cada seletor, os mesmos do notebook
+PARAMETROS_SELETORES = {'random_forest': {'n_estimators': 100},
+                        'lasso': {'alphas': [10, 1, 0.1, 0.01, 0.001]},
+                        'rfe': {'n_features_to_select': 8, 'step': 3, 'max_iter': 3000}}
+
+# Função para salvar X, y e o fold de cada linha em .npy (somente se ainda não existirem), retornando os caminhos
+def salvar_folds(X, y, cv = 5, seed = 194, diretorio = DIRETORIO_CACHE):
+    nome = '{}-{}-{}'.format(hash_dados(X, y)[:16], cv, seed)
+    arquivos = {parte: os.path.join(diretorio, '{}-{}.npy'.format(nome, parte)) for parte in ['X', 'y', 'folds']}
+
+    if all(os.path.exists(caminho) for caminho in arquivos.values()):
+        return arquivos
+
+    os.makedirs(diretorio, exist_ok = True)
+
+    folds = np.empty(len(y), dtype = np.int32)
+    for fold, (_, valid) in enumerate(KFold(n_splits = cv, shuffle = True, random_state = seed).split(folds)):
+        folds[valid] = fold
+
+    for parte, valores in [('X', pd.DataFrame(X).to_numpy(dtype = np.float64)), ('y', np.asarray(y, dtype = np.float64)), ('folds', folds)]:
+        with gravar_atomico(arquivos[parte], '.tmp.npy') as temporario:
+            np.save(temporario, valores)
+
+    return arquivos
+
+# Função para pontuar as variaveis com um seletor, retornando a pontuação (maior = melhor) e a máscara das selecionadas
+def pontuar(nome, X, y, parametros, seed = 194):
+    if nome == 'random_forest':
+        modelo = RandomForestRegressor(random_state = seed, n_jobs = 1, **parametros).fit(X, y)
+        importancia = modelo.feature_importances_
+
+        return importancia, importancia >= importancia.mean()
+
+    if nome == 'lasso':
+        modelo = LassoCV(random_state = seed, n_jobs = 1, **parametros).fit(X, y)
+
+        # Mesmo limite do SelectFromModel para modelos com penalidade L1
+        return np.abs(modelo.coef_), np.abs(modelo.coef_) > 1e-5
+
+    if nome == 'rfe':
+        parametros = dict(parametros)
+        svr = LinearSVR(max_iter = parametros.pop('max_iter'), random_state = seed)
+        rfe = RFE(svr, **parametros).fit(X, y)
+
+        # ranking_ = 1 para as selecionadas, maior para as removidas antes
+        return -rfe.ranking_.astype(np.float64), rfe.support_
+
+    raise ValueError('Seletor desconhecido: {}'.format(nome))
+
+# Função executada em cada processo: treina o seletor no treino do fold, com os dados abertos por memmap
+def _executar_tarefa(tarefa):
+    nome, fold, arquivos, parametros, seed = tarefa
+    inicio = time.time()
+
+    X = np.load(arquivos['X'], mmap_mode = 'r')
+    y = np.load(arquivos['y'], mmap_mode = 'r')
+    treino = np.flatnonzero(np.load(arquivos['folds'], mmap_mode = 'r') != fold)
+
+    # O LassoCV com alpha baixo e o LinearSVR não convergem em alguns folds, como no notebook
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        pontuacao, selecionadas = pontuar(nome, X[treino], y[treino], parametros, seed)
+
+    return nome, fold, pontuacao, selecionadas, inicio, time.time()
+
+# Função para executar os seletores em paralelo sobre os folds, retornando o ranking de consenso, as variaveis
+# selecionadas por cada seletor (na maioria dos folds) e o tempo de cada seletor
+def selecionar(X, y, seletores = None, cv = 5, seed = 194, processos = None, diretorio = DIRETORIO_CACHE):
+    X = pd.DataFrame(X)
+    seletores = seletores or PARAMETROS_SELETORES
+    arquivos = salvar_folds(X, y, cv, seed, diretorio)
+
+    # Os seletores mais lentos primeiro, para não ficarem sozinhos no fim da execução
+    ordem = sorted(seletores, key = lambda nome: ['rfe', 'random_forest', 'lasso'].index(nome) if nome in PARAMETROS_SELETORES else 0)
+    tarefas = [(nome, fold, arquivos, seletores[nome], seed) for nome in ordem for fold in range(cv)]
+
+    inicio = time.time()
+    with ProcessPoolExecutor(max_workers = processos or agendador.nucleos()) as executor:
+        execucoes = list(executor.map(_executar_tarefa, tarefas))
+    tempo_total = time.time() - inicio
+
+    posicoes, selecionadas, tempos = {}, {}, []
+    for nome in ordem:
+        resultados = [execucao for execucao in execucoes if execucao[0] == nome]
+
+        # Posição média entre os folds (1 = melhor) e fração dos folds em que a variavel foi selecionada
+        posicoes[nome] = np.mean([pd.Series(pontuacao).rank(ascending = False).to_numpy() for _, _, pontuacao, _, _, _ in resultados], axis = 0)
+        frequencia = np.mean([mascara for _, _, _, mascara, _, _ in resultados], axis = 0)
+        selecionadas[nome] = list(X.columns[frequencia >= 0.5])
+
+        tempos.append({'seletor': nome, 'tempo_parede': max(fim for *_, fim in resultados) - min(comeco for *_, comeco, _ in resultados),
+                       'tempo_tarefas': sum(fim - comeco for *_, comeco, fim in resultados), 'tarefas': len(resultados)})
+
+    ranking = pd.DataFrame(posicoes, index = X.columns)
+    ranking['votos'] = [sum(variavel in selecionadas[nome] for nome in ordem) for variavel in X.columns]
+    ranking['consenso'] = ranking[ordem].mean(axis = 1)
+    ranking = ranking.sort_values(['consenso', 'votos'], ascending = [True, False])
+
+    return {'ranking': ranking, 'selecionadas': selecionadas, 'tempos': pd.DataFrame(tempos), 'tempo_total': tempo_total}
+
+#  Executa o programa
+if __name__ == '__main__':
+    from treinamento import pipeline
+
+    parser = argparse.ArgumentParser(description = 'Seleção de variaveis em paralelo com ranking de consenso')
+    parser.add_argument('--parametros', help = 'Arquivo JSON com os parâmetros do pipeline (ex.: caminho dos dados)')
+    parser.add_argument('--cache', help = 'Diretório do cache das etapas do pipeline')
+    parser.add_argument('--cv', type = int, default = 5)
+    parser.add_argument('--processos', type = int, help = 'Número de processos (padrão: núcleos disponiveis)')
+    parser.add_argument('--saida', help = 'Arquivo CSV com o ranking')
+    args = parser.parse_args()
+
+    logging.basicConfig(level = logging.INFO, format = '%(asctime)s %(message)s')
+
+    parametros = {}
+    if args.parametros:
+        with open(args.parametros) as f:
+            parametros = json.load(f)
+
+    # Mesmo dataset da seleção do pipeline
+    dtFinal = pipeline.executar(parametros, 'features', args.cache)['features'][1]
+    resultado = selecionar(dtFinal.drop(['Appliances'], axis = 1), dtFinal['Appliances'].values, cv = args.cv,
+                           seed = pipeline.seed_, processos = args.processos)
+
+    print(resultado['ranking'].to_string())
+    for nome, variaveis in resultado['selecionadas'].items():
+        logging.info('Selecionadas (%s): %s', nome, variaveis)
+    print(resultado['tempos'].to_string(index = False))
+    logging.info('Tempo total: %.1f s', resultado['tempo_total'])
+
+    if args.saida:
+        resultado['ranking'].to_csv(args.saida)
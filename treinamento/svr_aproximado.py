@@ -0,0 +1,85 @@
+# SVR com kernel RBF aproximado: Nystroem ou random Fourier features seguidos de um regressor linear
+#
+# O SVR exato do notebook (kernel = 'rbf', C = 10000, gamma = 0.5) tem custo entre n² e n³ no número de linhas. Com o
+# kernel aproximado por m componentes o custo é O(n * m²), e com o regressor 'ridge' a memória é O(m²): as equações
+# normais são acumuladas em lotes, sem manter a matriz transformada inteira.
+
+# Importar bibliotecas
+import numpy as np
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.svm import LinearSVR
+
+class SVRAproximado(BaseEstimator, RegressorMixin):
+    # metodo: 'nystroem' ou 'rff' (random Fourier features); regressor: 'ridge' (em lotes) ou 'svr' (LinearSVR em memória)
+    def __init__(self, metodo = 'nystroem', componentes = 500, gamma = 0.5, C = 10000, epsilon = 0.0, regressor = 'ridge',
+                 lote = 20000, max_iter = 10000, random_state = 194):
+        self.metodo = metodo
+        self.componentes = componentes
+        self.gamma = gamma
+        self.C = C
+        self.epsilon = epsilon
+        self.regressor = regressor
+        self.lote = lote
+        self.max_iter = max_iter
+        self.random_state = random_state
+
+    def _mapa(self):
+        if self.metodo == 'nystroem':
+            return Nystroem(kernel = 'rbf', gamma = self.gamma, n_components = self.componentes, random_state = self.random_state)
+        if self.metodo == 'rff':
+            return RBFSampler(gamma = self.gamma, n_components = self.componentes, random_state = self.random_state)
+
+        raise ValueError("metodo deve ser 'nystroem' ou 'rff': {}".format(self.metodo))
+
+    # Transformação em lotes, para não alocar n x m de uma vez
+    def _lotes(self, X):
+        for inicio in range(0, len(X), self.lote):
+            yield inicio, self.mapa_.transform(X[inicio:inicio + self.lote])
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype = np.float64)
+        y = np.asarray(y, dtype = np.float64)
+
+        # O Nystroem usa somente uma amostra de 'componentes' linhas para montar o mapa
+        self.mapa_ = self._mapa().fit(X)
+
+        if self.regressor == 'ridge':
+            # Mesma regularização do SVR com perda quadrática: 1/(2C) * ||w||² + soma dos residuos²
+            self.media_y_ = y.mean()
+            gram = np.zeros((self.componentes + 1, self.componentes + 1))
+            correlacao = np.zeros(self.componentes + 1)
+
+            for inicio, Z in self._lotes(X):
+                Z = np.hstack([Z, np.ones((len(Z), 1))])
+                gram += Z.T @ Z
+                correlacao += Z.T @ (y[inicio:inicio + len(Z)] - self.media_y_)
+
+            # O intercepto (última coluna) não é regularizado
+            regularizacao = np.full(self.componentes + 1, 1 / (2 * self.C))
+            regularizacao[-1] = 0.0
+            coeficientes = np.linalg.solve(gram + np.diag(regularizacao), correlacao)
+
+            self.coef_ = coeficientes[:-1]
+            self.intercept_ = coeficientes[-1] + self.media_y_
+        elif self.regressor == 'svr':
+            # Forma primal com perda epsilon-insensitive quadrática: converge com C alto, onde o dual do liblinear não converge
+            self.svr_ = LinearSVR(C = self.C, epsilon = self.epsilon, loss = 'squared_epsilon_insensitive', dual = False,
+                                  max_iter = self.max_iter, random_state = self.random_state)
+            self.svr_.fit(self.mapa_.transform(X), y)
+
+            self.coef_ = self.svr_.coef_
+            self.intercept_ = float(np.ravel(self.svr_.intercept_)[0])
+        else:
+            raise ValueError("regressor deve ser 'ridge' ou 'svr': {}".format(self.regressor))
+
+        return self
+
+    def predict(self, X):
+        X = np.asarray(X, dtype = np.float64)
+        previsoes = np.empty(len(X))
+
+        for inicio, Z in self._lotes(X):
+            previsoes[inicio:inicio + len(Z)] = Z @ self.coef_ + self.intercept_
+
+        return previsoes
@@ -0,0 +1,162 @@
+# Tuning do CatBoost por successive halving, no lugar da sequência de grades exaustivas do notebook (modelos 06 a 24)
+#
+# As configurações começam com poucas iterações. A cada rodada somente a fração 1/eta de melhor RMSE na validação
+# cruzada continua, com eta vezes mais iterações. Os modelos das rodadas anteriores são continuados (init_model) e não
+# treinados novamente, e o detector de overfitting do CatBoost encerra os folds que já convergiram.
+
+# Importar bibliotecas
+import logging
+import time
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import KFold, ParameterSampler
+from catboost import CatBoostRegressor, CatBoostError, Pool
+from treinamento.agendador import Agendador
+
+# Espaço de busca combinado das grades do notebook
+ESPACO_CATBOOST = {'depth': [5, 6, 7, 8, 9, 10, 11],
+                   'learning_rate': [0.01, 0.02, 0.025, 0.03, 0.04, 0.05, 0.06, 0.07, 0.1, 0.2],
+                   'grow_policy': ['SymmetricTree', 'Depthwise', 'Lossguide'],
+                   'langevin': [False, True],
+                   'diffusion_temperature': [9000, 10000, 11000],
+                   'score_function': ['Cosine', 'L2', 'NewtonCosine', 'NewtonL2'],
+                   'l2_leaf_reg': [2.4, 2.5, 2.6, 2.8, 3.0],
+                   'subsample': [0.7, 0.8, 0.9, 1.0],
+                   'bootstrap_type': ['Bernoulli', 'MVS'],
+                   'random_strength': [0.8, 0.9, 1.0, 1.1, 1.2],
+                   'min_data_in_leaf': [1, 2, 3, 6, 9]}
+
+# Função para montar as configurações avaliadas: amostra do espaço mais as configurações obrigatórias (ex.: modelo final do notebook)
+def gerar_configuracoes(espaco, quantidade, seed, incluir = ()):
+    configuracoes = [dict(configuracao) for configuracao in incluir]
+
+    for configuracao in ParameterSampler(espaco, quantidade, random_state = seed):
+        if configuracao not in configuracoes:
+            configuracoes.append(configuracao)
+
+    return configuracoes
+
+# Função para calcular as iterações de cada rodada: iteracoes_min * eta^r, limitadas a iteracoes_max
+def orcamentos(iteracoes_min, iteracoes_max, eta):
+    rodadas = [iteracoes_min]
+
+    while rodadas[-1] < iteracoes_max:
+        rodadas.append(min(rodadas[-1] * eta, iteracoes_max))
+
+    return rodadas
+
+# Função para continuar o treino de um fold até o orçamento informado, retornando o RMSE da validação e as iterações treinadas
+def _treinar_fold(estado, parametros, treino, valid, orcamento):
+    anterior = estado.get('modelo')
+    feitas = anterior.tree_count_ if anterior is not None else 0
+
+    modelo = CatBoostRegressor(**dict(parametros, iterations = orcamento - feitas))
+    modelo.fit(treino, eval_set = valid, use_best_model = True, init_model = anterior)
+
+    curva = modelo.get_evals_result()['validation'][parametros['eval_metric']]
+    treinadas = len(curva)
+
+    # Parou antes do orçamento: o detector de overfitting encontrou o melhor ponto e o fold não precisa de mais iterações
+    estado['convergido'] = treinadas < orcamento - feitas
+    estado['score'] = min(estado.get('score', np.inf), float(np.min(curva)))
+    estado['modelo'] = modelo
+
+    return treinadas
+
+# Função para executar uma chave (bracket) do successive halving a partir da rodada informada
+def _chave(folds, parametros_base, candidatos, rodadas, eta, numero, agendador):
+    estados = [[{} for _ in folds] for _ in candidatos]
+    ativos = list(range(len(candidatos)))
+    historico = []
+    iteracoes_treinadas = 0
+
+    # Treina um fold de uma configuração, as combinações inválidas no CatBoost (ex.: Cosine com Lossguide) são descartadas
+    # como no GridSearchCV
+    def treinar(threads, item):
+        indice, estado, (treino, valid), orcamento = item
+        parametros = dict(parametros_base, **candidatos[indice], thread_count = threads)
+
+        try:
+            return _treinar_fold(estado, parametros, treino, valid, orcamento)
+        except CatBoostError as erro:
+            logging.info('Configuração %s descartada: %s', candidatos[indice], str(erro).splitlines()[0])
+            estado['score'] = np.inf
+            estado['convergido'] = True
+            return 0
+
+    for rodada, orcamento in enumerate(rodadas):
+        # Todos os folds de todas as configurações da rodada são independentes e executados pelo agendador
+        pendentes = [(indice, estado, fold, orcamento) for indice in ativos for estado, fold in zip(estados[indice], folds)
+                     if not estado.get('convergido')]
+        iteracoes_treinadas += sum(agendador.map(treinar, pendentes))
+
+        scores = {}
+        for indice in ativos:
+            scores[indice] = float(np.mean([estado['score'] for estado in estados[indice]]))
+            historico.append({'chave': numero, 'rodada': rodada, 'iteracoes': orcamento, 'params': candidatos[indice], 'rmse': scores[indice]})
+
+        # Os modelos das configurações eliminadas não são mais necessários
+        ordem = sorted(ativos, key = lambda indice: scores[indice])
+        sobreviventes = ordem[:max(1, len(ordem) // eta)] if rodada < len(rodadas) - 1 else ordem[:1]
+
+        for indice in set(ativos) - set(sobreviventes):
+            for estado in estados[indice]:
+                estado.pop('modelo', None)
+
+        logging.info('Chave %d, rodada %d: %d configurações com %d iterações, melhor RMSE %.4f', numero, rodada, len(ativos), orcamento, scores[ordem[0]])
+        ativos = sobreviventes
+
+    melhor = ativos[0]
+    iteracoes = [estado['modelo'].tree_count_ for estado in estados[melhor] if 'modelo' in estado]
+
+    return {'params': candidatos[melhor], 'rmse': scores[melhor], 'iteracoes': int(round(np.mean(iteracoes))) if iteracoes else rodadas[-1],
+            'historico': historico, 'iteracoes_treinadas': iteracoes_treinadas, 'configuracoes': len(candidatos)}
+
+# Função para executar o successive halving com validação cruzada (Hyperband quando chaves > 1).
+# Cada chave começa em uma rodada mais alta com menos configurações, para que learning rates baixos, lentos nas
+# primeiras iterações, não sejam eliminados cedo. As configurações de 'incluir' entram na chave de orçamento máximo.
+def halving_sucessivo(X, y, base, espaco = None, configuracoes = 81, incluir = (), iteracoes_min = 100,
+                      iteracoes_max = 5000, eta = 3, cv = 5, seed = 194, chaves = None, agendador = None, pool = None):
+    agendador = agendador or Agendador()
+
+    # Folds iguais ao GridSearchCV (KFold sem embaralhar), recortados uma vez do pool (quantizado quando informado)
+    pool = pool if pool is not None else Pool(pd.DataFrame(X).reset_index(drop = True), np.asarray(y, dtype = np.float64))
+    folds = [(pool.slice(treino), pool.slice(valid)) for treino, valid in KFold(n_splits = cv).split(np.arange(pool.num_row()))]
+    parametros_base = dict(base, metric_period = 1)
+    parametros_base.setdefault('eval_metric', 'RMSE')
+
+    rodadas = orcamentos(iteracoes_min, iteracoes_max, eta)
+    chaves = len(rodadas) if chaves is None else min(chaves, len(rodadas))
+
+    inicio = time.perf_counter()
+    resultados = []
+
+    for numero in range(chaves):
+        quantidade = max(1, int(configuracoes // eta ** numero))
+        candidatos = gerar_configuracoes(espaco or ESPACO_CATBOOST, quantidade, seed + numero,
+                                         incluir if numero == chaves - 1 else ())
+        resultados.append(_chave(folds, parametros_base, candidatos, rodadas[numero:], eta, numero, agendador))
+
+    melhor = min(resultados, key = lambda resultado: resultado['rmse'])
+    melhores_parametros = dict(melhor['params'], iterations = melhor['iteracoes'])
+
+    # Custo das grades exaustivas: todas as configurações em todos os folds com o orçamento máximo
+    total_configuracoes = sum(resultado['configuracoes'] for resultado in resultados)
+    iteracoes_treinadas = sum(resultado['iteracoes_treinadas'] for resultado in resultados)
+    iteracoes_grade = total_configuracoes * len(folds) * iteracoes_max
+
+    relatorio = {'configuracoes': total_configuracoes,
+                 'rodadas': rodadas,
+                 'chaves': chaves,
+                 'iteracoes_treinadas': iteracoes_treinadas,
+                 'iteracoes_grade': iteracoes_grade,
+                 'economia': 1 - iteracoes_treinadas / iteracoes_grade,
+                 'tempo': time.perf_counter() - inicio}
+
+    logging.info('Halving: %d configurações, %d de %d iterações (%.1f%% economizado) em %.1f s', total_configuracoes,
+                 iteracoes_treinadas, iteracoes_grade, 100 * relatorio['economia'], relatorio['tempo'])
+
+    return {'melhores_parametros': melhores_parametros,
+            'melhor_score': -melhor['rmse'],
+            'resultados': pd.DataFrame([registro for resultado in resultados for registro in resultado['historico']]),
+            'relatorio': relatorio}